@@ -0,0 +1,78 @@
+"""
+Benchmark: N llamadas a /api/cart/add vs una llamada a /api/cart/add/batch.
+
+Uso:
+    $ gunicorn wsgi --chdir ./src/ -w 4 -b 127.0.0.1:3001 &
+    $ python benchmarks/cart_batch.py --url http://127.0.0.1:3001 --lines 1 5 20 50
+
+Para cada tamaño N arma carritos de N líneas de las dos formas (cada
+repetición con un user_id distinto, conexión HTTP keep-alive) y reporta la
+latencia media por carrito completo y cuántas veces más rápido es el lote.
+"""
+import argparse
+import http.client
+import json
+import sys
+import time
+import urllib.parse
+
+PRODUCT_IDS = [1, 2, 3]
+
+
+class Client:
+    def __init__(self, url):
+        parsed = urllib.parse.urlparse(url)
+        self._conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+
+    def post(self, path, body):
+        self._conn.request("POST", path, body=json.dumps(body),
+                           headers={"Content-Type": "application/json"})
+        response = self._conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status}")
+
+
+def lines_for(n):
+    return [{"product_id": PRODUCT_IDS[i % len(PRODUCT_IDS)], "quantity": 1} for i in range(n)]
+
+
+def run(client, n, repeat, first_user):
+    lines = lines_for(n)
+
+    started = time.perf_counter()
+    for r in range(repeat):
+        user_id = first_user + r
+        for line in lines:
+            client.post("/api/cart/add", {"user_id": user_id, **line})
+    sequential = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for r in range(repeat):
+        client.post("/api/cart/add/batch", {"user_id": first_user + repeat + r, "items": lines})
+    batch = (time.perf_counter() - started) / repeat
+
+    return sequential, batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="N x /add vs /add/batch")
+    parser.add_argument("--url", default="http://127.0.0.1:3001")
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--repeat", type=int, default=200, help="Carritos por tamaño y modo")
+    args = parser.parse_args(argv)
+
+    client = Client(args.url)
+    # Usuarios altos para no mezclarse con carritos existentes
+    first_user = 10 ** 9 + int(time.time()) % 10 ** 6 * 1000
+
+    print(f"{'líneas':>7}{'N x /add ms':>14}{'/add/batch ms':>16}{'speedup':>10}")
+    for n in args.lines:
+        sequential, batch = run(client, n, args.repeat, first_user)
+        first_user += 2 * args.repeat
+        print(f"{n:>7}{sequential * 1000:>14.2f}{batch * 1000:>16.2f}{sequential / batch:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Prueba de memoria sostenida del carrito.
+
+Uso:
+    $ python benchmarks/cart_soak.py --reads 10000000
+    $ python benchmarks/cart_soak.py --reads 100000 --churn-seconds 20 --ttl 2
+
+Fase 1: N lecturas GET /api/cart/ de visitantes anónimos distintos; como leer
+no crea el carrito, la memoria (RSS) y carts_db no deben crecer.
+Fase 2: durante --churn-seconds se agregan productos a carritos nuevos con un
+TTL corto y el barrido corre cada --sweep segundos; los carritos vivos deben
+estabilizarse en ~ritmo * TTL en lugar de crecer sin límite.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+parser = argparse.ArgumentParser(description="Memoria del carrito con lecturas anónimas y vencimiento")
+parser.add_argument("--reads", type=int, default=10000000)
+parser.add_argument("--churn-seconds", type=float, default=10)
+parser.add_argument("--ttl", type=int, default=2, help="CART_TTL_SECONDS para la fase 2")
+parser.add_argument("--sweep", type=float, default=0.5)
+parser.add_argument("--app", default="app:app", help="módulo:atributo de la app Flask")
+args = parser.parse_args()
+
+# El TTL se lee al importar el blueprint; el barrido lo hace este script
+os.environ["CART_TTL_SECONDS"] = str(args.ttl)
+os.environ["CART_SWEEP_SECONDS"] = str(10 ** 6)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+module_name, _, attr = args.app.partition(":")
+app = getattr(importlib.import_module(module_name), attr or "app")
+from api.routes import cart  # noqa: E402
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def state():
+    return {"carts": len(cart.carts_db), "lines": len(cart.cart_items_db),
+            "scheduled": len(cart.expiry_wheel), "rss_mb": round(rss_mb(), 1)}
+
+
+def main():
+    client = app.test_client()
+
+    # Calentar (imports perezosos, caches de werkzeug) antes de medir
+    for user_id in range(1000):
+        client.get(f"/api/cart/?user_id={10 ** 9 + user_id}")
+    print(f"inicio: {state()}")
+
+    started = time.perf_counter()
+    checkpoint = max(args.reads // 10, 1)
+    for i in range(1, args.reads + 1):
+        client.get(f"/api/cart/?user_id={i}")
+        if i % checkpoint == 0:
+            print(f"  {i:>11,} lecturas: {state()}")
+    elapsed = time.perf_counter() - started
+    print(f"Fase 1: {args.reads:,} lecturas anónimas en {elapsed:.1f}s "
+          f"({args.reads / elapsed:,.0f}/s): {state()}")
+
+    ended = time.time() + args.churn_seconds
+    next_sweep = time.time() + args.sweep
+    next_report = time.time() + 1
+    user_id = 10 ** 10
+    added = expired = peak = 0
+    while time.time() < ended:
+        user_id += 1
+        client.post("/api/cart/add", json={"user_id": user_id, "product_id": 1 + user_id % 3})
+        added += 1
+        if time.time() >= next_sweep:
+            expired += cart.expire_carts()
+            next_sweep += args.sweep
+        peak = max(peak, len(cart.carts_db))
+        if time.time() >= next_report:
+            print(f"  agregados {added:,} vencidos {expired:,}: {state()}")
+            next_report += 1
+    rate = added / args.churn_seconds
+    print(f"Fase 2: {added:,} carritos ({rate:,.0f}/s, TTL {args.ttl}s), {expired:,} vencidos, "
+          f"pico {peak:,} (esperado ~{rate * (args.ttl + args.sweep):,.0f}): {state()}")
+
+    time.sleep(args.ttl + 1)
+    expired += cart.expire_carts()
+    print(f"Tras el TTL: {state()}")
+    return 0 if not cart.carts_db and not cart.cart_items_db else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark de checkout de punta a punta: flujo con items del cliente vs
+POST /api/orders/checkout desde el carrito del servidor.
+
+Uso:
+    $ gunicorn wsgi --chdir ./src/ -w 1 --threads 8 -b 127.0.0.1:3001 &
+    $ python benchmarks/checkout_bench.py --url http://127.0.0.1:3001 --checkouts 2000 --lines 5
+
+Cada checkout llena un carrito con --lines productos (/api/cart/add/batch,
+igual en los dos modos) y luego:
+- cliente:  GET /api/cart/ + POST /api/orders/ reenviando items con precio y
+            stock + POST /api/cart/clear
+- servidor: POST /api/orders/checkout
+
+Reporta checkouts/s, requests y bytes enviados por checkout (sin contar el
+llenado del carrito). Antes de medir repone stock para que el descuento del
+checkout no se quede sin unidades.
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+import urllib.parse
+
+PRODUCT_IDS = [1, 2, 3]
+
+
+class Client:
+    def __init__(self, url):
+        parsed = urllib.parse.urlparse(url)
+        self._conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        self.requests = 0
+        self.bytes_sent = 0
+
+    def call(self, method, path, body=None, count=True):
+        payload = json.dumps(body) if body is not None else None
+        self._conn.request(method, path, body=payload,
+                           headers={"Content-Type": "application/json"} if payload else {})
+        response = self._conn.getresponse()
+        data = response.read()
+        if response.status >= 300:
+            raise RuntimeError(f"{method} {path}: HTTP {response.status} {data[:200]!r}")
+        if count:
+            self.requests += 1
+            self.bytes_sent += len(path) + len(payload or "")
+        return json.loads(data)
+
+
+def fill_cart(client, user_id, lines):
+    items = [{"product_id": PRODUCT_IDS[i % len(PRODUCT_IDS)], "quantity": 1} for i in range(lines)]
+    client.call("POST", "/api/cart/add/batch", {"user_id": user_id, "items": items}, count=False)
+
+
+def checkout_client(client, user_id):
+    cart = client.call("GET", f"/api/cart/?user_id={user_id}")
+    items = [{"product_id": i["product_id"], "quantity": i["quantity"], "name": i["product_name"],
+              "price": i["product_price"], "available_stock": i["available_stock"]}
+             for i in cart["items"]]
+    client.call("POST", "/api/orders/", {"user_id": user_id, "items": items,
+                                         "payment_method": "credit_card"})
+    client.call("POST", "/api/cart/clear", {"user_id": user_id})
+
+
+def checkout_server(client, user_id):
+    client.call("POST", "/api/orders/checkout", {"user_id": user_id,
+                                                 "payment_method": "credit_card"})
+
+
+def run(url, mode, checkouts, lines, threads, first_user):
+    flow = checkout_client if mode == "cliente" else checkout_server
+    per_thread = checkouts // threads
+    clients = [Client(url) for _ in range(threads)]
+    elapsed = [0.0] * threads
+
+    def worker(index):
+        client = clients[index]
+        for i in range(per_thread):
+            user_id = first_user + index * per_thread + i
+            fill_cart(client, user_id, lines)
+            started = time.perf_counter()
+            flow(client, user_id)
+            elapsed[index] += time.perf_counter() - started
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    total = per_thread * threads
+    return {
+        "checkouts_per_s": round(total / (max(elapsed)), 1),
+        "requests": sum(c.requests for c in clients) / total,
+        "bytes": sum(c.bytes_sent for c in clients) / total,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checkout con items del cliente vs desde el carrito")
+    parser.add_argument("--url", default="http://127.0.0.1:3001")
+    parser.add_argument("--checkouts", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    admin = Client(args.url)
+    admin.call("POST", "/api/inventory/update-stock/batch", {"movements": [
+        {"product_id": p, "quantity": 10 ** 9, "type": "restock"} for p in PRODUCT_IDS]})
+
+    first_user = 10 ** 9 + int(time.time()) % 10 ** 6 * 10 ** 4
+    print(f"{'modo':<10}{'checkouts/s':>13}{'requests':>10}{'bytes':>9}")
+    for mode in ("cliente", "servidor"):
+        result = run(args.url, mode, args.checkouts, args.lines, args.threads, first_user)
+        first_user += args.checkouts
+        print(f"{mode:<10}{result['checkouts_per_s']:>13}{result['requests']:>10.1f}{result['bytes']:>9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+CPU contra bytes de la compresión de respuestas (api/compression.py).
+
+Uso:
+    $ python benchmarks/compression_bench.py
+    $ python benchmarks/compression_bench.py --levels 1 6 9 --repeat 50
+
+Para payloads JSON parecidos a los de la API (listado de productos,
+historial de órdenes y dashboard de analytics con la serie de 31 días) mide,
+por codificación y nivel, el tamaño comprimido y el tiempo de CPU por
+respuesta. La última columna es el costo por request de una respuesta
+cacheada con @cached_response: la variante comprimida se guarda y las
+siguientes solo la copian.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.compression import _supported_encodings, compress_bytes  # noqa: E402
+
+
+def payloads(seed=1):
+    rng = random.Random(seed)
+    products = [{"id": i, "name": f"Producto {i}", "category": rng.choice(["hogar", "oficina", "eco"]),
+                 "price": round(rng.uniform(5, 500), 2), "stock": rng.randint(0, 1000),
+                 "description": "Descripción del producto " * rng.randint(1, 4)}
+                for i in range(500)]
+    orders = [{"id": i, "order_number": f"ORD-20260101-{i}", "status": rng.choice(["processing", "delivered"]),
+               "items": [{"product_id": rng.randint(1, 500), "quantity": rng.randint(1, 5),
+                          "price": round(rng.uniform(5, 500), 2)} for _ in range(rng.randint(1, 4))],
+               "total": round(rng.uniform(10, 2000), 2)}
+              for i in range(300)]
+    dashboard = {"visits_last_30_days": [{"date": f"2026-01-{d:02d}", "visits": rng.randint(100, 5000)}
+                                         for d in range(1, 32)],
+                 "top_products": products[:10], "revenue": 123456.78}
+    return {"products": json.dumps(products).encode(), "orders": json.dumps(orders).encode(),
+            "dashboard": json.dumps(dashboard).encode()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'payload':<10} {'codificación':<12} {'nivel':>5} {'bytes':>9} {'ratio':>6} "
+          f"{'ms/resp':>8} {'MB/s':>7} {'cache ms':>9}")
+    for name, body in payloads().items():
+        print(f"{name:<10} {'identity':<12} {'-':>5} {len(body):>9,}")
+        for encoding in _supported_encodings():
+            for level in args.levels:
+                start = time.process_time()
+                for _ in range(args.repeat):
+                    compressed = compress_bytes(body, encoding, level)
+                elapsed = (time.process_time() - start) / args.repeat
+                # Respuesta cacheada: la variante ya está guardada, solo se copia
+                start = time.process_time()
+                for _ in range(args.repeat):
+                    bytes(compressed)
+                cached = (time.process_time() - start) / args.repeat
+                print(f"{'':<10} {encoding:<12} {level:>5} {len(compressed):>9,} "
+                      f"{len(body) / len(compressed):>6.1f} {elapsed * 1000:>8.2f} "
+                      f"{len(body) / elapsed / 1e6 if elapsed else 0:>7.1f} {cached * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
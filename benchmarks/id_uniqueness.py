@@ -0,0 +1,96 @@
+"""
+Unicidad de los ids de api/ids.py entre procesos y throughput del generador.
+
+Uso:
+    $ python benchmarks/id_uniqueness.py --procs 8 --seconds 5
+    $ python benchmarks/id_uniqueness.py --procs 4 --threads 4 --start spawn
+
+Lanza --procs procesos (fork, como gunicorn --preload, o spawn, como workers
+que importan la app cada uno) con --threads hilos que piden ids durante
+--seconds. Después verifica que:
+- no haya ningún id repetido entre todos los procesos,
+- cada hilo haya recibido ids estrictamente crecientes,
+- cada proceso haya usado un número de worker distinto,
+- el milisegundo de cada id caiga dentro de la corrida (k-ordenables).
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api import ids  # noqa: E402
+
+
+def generate(args):
+    """Proceso hijo: devuelve (worker_id, [ids por hilo])"""
+    seconds, threads, start_at = args
+    generator = ids.ids
+    results = [array("q") for _ in range(threads)]
+
+    def run(out):
+        append = out.append
+        next_id = generator.next_id
+        while time.time() < start_at:
+            time.sleep(0.001)
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            for _ in range(1000):
+                append(next_id())
+
+    workers = [threading.Thread(target=run, args=(out,)) for out in results]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return generator.worker_id, [out.tobytes() for out in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--procs", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--start", choices=["fork", "spawn"], default="fork")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context(args.start)
+    # Todos arrancan a la vez, después de importar y reclamar su worker
+    start_at = time.time() + (3.0 if args.start == "spawn" else 1.0)
+    with context.Pool(args.procs) as pool:
+        results = pool.map(generate, [(args.seconds, args.threads, start_at)] * args.procs)
+    finished_at = time.time()
+
+    workers = [worker_id for worker_id, _ in results]
+    all_ids = array("q")
+    non_monotonic = 0
+    for _, chunks in results:
+        for chunk in chunks:
+            values = array("q")
+            values.frombytes(chunk)
+            non_monotonic += sum(1 for a, b in zip(values, values[1:]) if b <= a)
+            all_ids.extend(values)
+
+    total = len(all_ids)
+    unique = len(set(all_ids))
+    first_ms = ids.parse_id(min(all_ids))[0]
+    last_ms = ids.parse_id(max(all_ids))[0]
+    in_window = int(start_at * 1000) - 1 <= first_ms and last_ms <= int(finished_at * 1000) + 1
+
+    print(f"procesos: {args.procs} ({args.start}), hilos por proceso: {args.threads}")
+    print(f"workers: {sorted(workers)}")
+    print(f"ids: {total:,} en {args.seconds:.1f}s = {total / args.seconds:,.0f} ids/s")
+    print(f"repetidos: {total - unique}, no crecientes por hilo: {non_monotonic}, "
+          f"workers distintos: {len(set(workers)) == len(workers)}, "
+          f"milisegundos dentro de la corrida: {in_window}")
+    ok = total == unique and not non_monotonic and len(set(workers)) == len(workers) and in_window
+    print("OK" if ok else "FALLÓ")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
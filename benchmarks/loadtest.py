@@ -0,0 +1,327 @@
+"""
+Suite de carga / benchmark para todos los blueprints de la API.
+
+Uso:
+    # En proceso, con el test client de Flask
+    $ python benchmarks/loadtest.py run --duration 30 --concurrency 8 --output base.json
+
+    # Contra un servidor real (gunicorn ya levantado, o lanzado por el script)
+    $ python benchmarks/loadtest.py run --url http://localhost:3001 --output new.json
+    $ python benchmarks/loadtest.py run --gunicorn "wsgi --chdir ./src/ -w 4 -b 127.0.0.1:3001" \
+          --url http://127.0.0.1:3001 --output new.json
+
+    # Comparar dos corridas (sale con código 1 si hay regresiones)
+    $ python benchmarks/loadtest.py compare base.json new.json --threshold 10
+
+Reporta por endpoint: requests, errores, throughput y latencias p50/p95/p99.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+CUSTOMER = {"email": "cliente@ejemplo.com", "password": "123456"}
+PRODUCT_IDS = [1, 2, 3]
+
+
+# Escenarios: (nombre, peso, función que arma (método, ruta, json))
+def _login():
+    return "POST", "/api/auth/login", CUSTOMER
+
+
+def _products():
+    return "GET", random.choice(["/api/products/", "/api/products/?category=Hogar",
+                                 "/api/products/?search=sostenible"]), None
+
+
+def _product_detail():
+    return "GET", f"/api/products/{random.choice(PRODUCT_IDS)}", None
+
+
+def _categories():
+    return "GET", "/api/products/categories", None
+
+
+def _cart_add():
+    return "POST", "/api/cart/add", {"user_id": random.randint(1, 500),
+                                     "product_id": random.choice(PRODUCT_IDS), "quantity": 1}
+
+
+def _cart_get():
+    return "GET", f"/api/cart/?user_id={random.randint(1, 500)}", None
+
+
+def _order_create():
+    return "POST", "/api/orders/", {"user_id": random.randint(1, 500),
+                                    "items": [{"product_id": random.choice(PRODUCT_IDS), "quantity": 1}]}
+
+
+def _orders_list():
+    return "GET", f"/api/orders/?user_id={random.randint(1, 500)}", None
+
+
+def _restock():
+    return "POST", "/api/inventory/update-stock", {"product_id": random.choice(PRODUCT_IDS),
+                                                   "quantity": 5, "type": "restock"}
+
+
+def _low_stock():
+    return "GET", "/api/inventory/low-stock?threshold=20", None
+
+
+def _quote_create():
+    return "POST", "/api/quotes/", {"customer_id": random.randint(1, 500), "business_id": 1,
+                                    "items": [{"product_id": random.choice(PRODUCT_IDS),
+                                               "quantity": random.randint(1, 20)}]}
+
+
+def _quotes_list():
+    return "GET", f"/api/quotes/?user_id={random.randint(1, 500)}", None
+
+
+def _payment():
+    return "POST", "/api/payments/create-payment", {"order_id": random.randint(1000, 2000),
+                                                    "amount": 100.0}
+
+
+def _dashboard():
+    return "GET", "/api/analytics/dashboard", None
+
+
+def _realtime():
+    return "GET", "/api/analytics/realtime", None
+
+
+SCENARIOS = [
+    ("auth.login", 2, _login),
+    ("products.list", 20, _products),
+    ("products.detail", 15, _product_detail),
+    ("products.categories", 5, _categories),
+    ("cart.add", 8, _cart_add),
+    ("cart.get", 10, _cart_get),
+    ("orders.create", 4, _order_create),
+    ("orders.list", 6, _orders_list),
+    ("inventory.update_stock", 4, _restock),
+    ("inventory.low_stock", 3, _low_stock),
+    ("quotes.create", 3, _quote_create),
+    ("quotes.list", 4, _quotes_list),
+    ("payments.create", 3, _payment),
+    ("analytics.dashboard", 8, _dashboard),
+    ("analytics.realtime", 5, _realtime),
+]
+
+
+# Clientes: test client de Flask o HTTP real
+class FlaskClient:
+    def __init__(self, app_path):
+        sys.path.insert(0, os.path.abspath(SRC_DIR))
+        module_name, _, attr = app_path.partition(":")
+        app = getattr(importlib.import_module(module_name), attr or "app")
+        self._local = threading.local()
+        self._app = app
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_load(client, duration, concurrency, max_requests=None, seed=None):
+    """Lanzar `concurrency` hilos con la mezcla de escenarios; devuelve el reporte"""
+    random.seed(seed)
+    names = [s[0] for s in SCENARIOS]
+    weights = [s[1] for s in SCENARIOS]
+    builders = {s[0]: s[2] for s in SCENARIOS}
+
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    counter = {"sent": 0}
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local_samples = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        while time.perf_counter() < deadline:
+            if max_requests is not None:
+                with lock:
+                    if counter["sent"] >= max_requests:
+                        break
+                    counter["sent"] += 1
+            name = random.choices(names, weights)[0]
+            method, path, body = builders[name]()
+            started = time.perf_counter()
+            try:
+                status = client.request(method, path, body)
+            except Exception:
+                status = 599
+            local_samples[name].append(time.perf_counter() - started)
+            if status >= 500:
+                local_errors[name] += 1
+        with lock:
+            for name in names:
+                samples[name].extend(local_samples[name])
+                errors[name] += local_errors[name]
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in names:
+        latencies = sorted(samples[name])
+        if not latencies:
+            continue
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": errors[name],
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "concurrency": concurrency,
+        "total_requests": total,
+        "total_errors": sum(e["errors"] for e in endpoints.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report):
+    print(f"{'endpoint':<26}{'req':>8}{'err':>6}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, e in report["endpoints"].items():
+        print(f"{name:<26}{e['requests']:>8}{e['errors']:>6}{e['throughput_rps']:>10.1f}"
+              f"{e['p50_ms']:>10.2f}{e['p95_ms']:>10.2f}{e['p99_ms']:>10.2f}")
+    print(f"\nTotal: {report['total_requests']} requests, {report['total_errors']} errores, "
+          f"{report['throughput_rps']} req/s en {report['elapsed_s']}s")
+
+
+def compare(base, new, threshold):
+    """Listar endpoints con p95 más lento o throughput menor que el umbral (%)"""
+    regressions = []
+    for name, b in base["endpoints"].items():
+        n = new["endpoints"].get(name)
+        if not n:
+            continue
+        p95_change = (n["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 if b["p95_ms"] else 0
+        rps_change = (n["throughput_rps"] - b["throughput_rps"]) / b["throughput_rps"] * 100 \
+            if b["throughput_rps"] else 0
+        flag = p95_change > threshold or rps_change < -threshold or n["errors"] > b["errors"]
+        print(f"{'⚠️ ' if flag else '  '}{name:<26} p95 {b['p95_ms']:>8.2f} -> {n['p95_ms']:>8.2f} "
+              f"({p95_change:+.1f}%)  rps {b['throughput_rps']:>8.1f} -> {n['throughput_rps']:>8.1f} "
+              f"({rps_change:+.1f}%)")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def _wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=2):
+                return True
+        except Exception:
+            time.sleep(0.25)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la API")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run")
+    run.add_argument("--url", help="Servidor HTTP (si no, se usa el test client de Flask)")
+    run.add_argument("--app", default="app:app", help="módulo:atributo de la app Flask")
+    run.add_argument("--gunicorn", help="Argumentos para lanzar gunicorn antes de medir")
+    run.add_argument("--duration", type=float, default=10)
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--requests", type=int, help="Cortar después de N requests")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--output", help="Guardar el reporte en JSON")
+
+    cmp_ = sub.add_parser("compare")
+    cmp_.add_argument("base")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--threshold", type=float, default=10, help="% de tolerancia")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        regressions = compare(base, new, args.threshold)
+        print(f"\n{len(regressions)} regresiones")
+        return 1 if regressions else 0
+
+    server = None
+    try:
+        if args.gunicorn:
+            server = subprocess.Popen(["gunicorn"] + shlex.split(args.gunicorn))
+            if not args.url or not _wait_for(args.url):
+                print("⚠️  gunicorn no respondió en /health")
+                return 1
+
+        client = HttpClient(args.url) if args.url else FlaskClient(args.app)
+        report = run_load(client, args.duration, args.concurrency, args.requests, args.seed)
+        report["target"] = args.url or f"flask-test-client:{args.app}"
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
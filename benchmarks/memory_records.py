@@ -0,0 +1,126 @@
+"""
+Memoria por registro: diccionarios (formato anterior) vs registros con __slots__.
+
+Uso:
+    $ python benchmarks/memory_records.py --orders 100000
+
+Construye N órdenes (con 1-3 líneas), líneas de carrito y movimientos de
+inventario de las dos formas y mide con tracemalloc los bytes por registro.
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.records import CartItem, Movement, Order, OrderItem  # noqa: E402
+
+PRODUCTS = [(1, "Producto Premium", 150.00), (2, "Producto Básico", 89.99),
+            (3, "Producto Eco", 120.50), (4, "Accesorio", 29.99)]
+STATUSES = ["pending_payment", "processing", "shipped", "delivered", "cancelled"]
+METHODS = ["credit_card", "debit_card", "paypal", "bank_transfer"]
+
+
+def _lines(rng):
+    lines = []
+    for _ in range(rng.randint(1, 3)):
+        product_id, name, price = rng.choice(PRODUCTS)
+        quantity = rng.randint(1, 3)
+        lines.append((product_id, name, quantity, price))
+    return lines
+
+
+def dict_order(order_id, rng):
+    lines = _lines(rng)
+    items = [{"product_id": p, "name": n, "quantity": q, "unit_price": u,
+              "discount_pct": 0, "line_total": round(u * q, 2)} for p, n, q, u in lines]
+    subtotal = sum(i["line_total"] for i in items)
+    created = datetime.utcnow() - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+    return {
+        "id": order_id,
+        "order_number": f"ORD-{created.strftime('%Y%m%d')}-{order_id:04d}",
+        "user_id": rng.randint(1, 10000),
+        "items": items,
+        "subtotal": subtotal,
+        "shipping": 10.00,
+        "tax": round(subtotal * 0.08, 2),
+        "total": round(subtotal * 1.08 + 10, 2),
+        "status": rng.choice(STATUSES),
+        "payment_method": rng.choice(METHODS),
+        "payment_status": "pending",
+        "payment_id": None,
+        "shipping_address": {},
+        "billing_address": {},
+        "customer_notes": "",
+        "created_at": created.isoformat(),
+        "updated_at": datetime.utcnow().isoformat(),
+        "estimated_delivery": (created + timedelta(days=5)).isoformat()
+    }
+
+
+def record_order(order_id, rng):
+    items = [OrderItem(p, n, q, u) for p, n, q, u in _lines(rng)]
+    subtotal = sum(i.line_total for i in items)
+    created = int((datetime.utcnow() - timedelta(minutes=rng.randint(0, 60 * 24 * 60))).timestamp())
+    return Order(order_id, rng.randint(1, 10000), items, subtotal, 10.00,
+                 round(subtotal * 0.08, 2), round(subtotal * 1.08 + 10, 2),
+                 rng.choice(STATUSES), rng.choice(METHODS),
+                 created_at=created, estimated_delivery=created + 5 * 86400)
+
+
+def dict_cart_item(item_id, rng):
+    now = datetime.utcnow().isoformat()
+    return {"id": item_id, "cart_id": rng.randint(1, 10000), "product_id": rng.randint(1, 4),
+            "quantity": rng.randint(1, 5), "created_at": now, "updated_at": now}
+
+
+def record_cart_item(item_id, rng):
+    return CartItem(item_id, rng.randint(1, 10000), rng.randint(1, 4), rng.randint(1, 5))
+
+
+def dict_movement(movement_id, rng):
+    return {"id": movement_id, "date": datetime.utcnow().isoformat(), "type": "sale",
+            "quantity": -rng.randint(1, 5), "new_stock": rng.randint(0, 500),
+            "reason": "", "user_id": None}
+
+
+def record_movement(movement_id, rng):
+    return Movement(datetime.utcnow(), "sale", -rng.randint(1, 5), rng.randint(0, 500),
+                    id=movement_id)
+
+
+def measure(builder, count, seed=42):
+    rng = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    records = [builder(i, rng) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del records
+    return size / count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes por registro: dict vs __slots__")
+    parser.add_argument("--orders", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("orden (con líneas)", dict_order, record_order),
+        ("línea de carrito", dict_cart_item, record_cart_item),
+        ("movimiento", dict_movement, record_movement),
+    ]
+    print(f"{'registro':<22}{'dict B':>10}{'slots B':>10}{'ahorro':>9}")
+    for name, as_dict, as_record in cases:
+        before = measure(as_dict, args.orders)
+        after = measure(as_record, args.orders)
+        print(f"{name:<22}{before:>10.0f}{after:>10.0f}{(1 - after / before) * 100:>8.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
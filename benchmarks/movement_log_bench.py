@@ -0,0 +1,75 @@
+"""
+Log de movimientos de inventario con 1M de movimientos en un SKU.
+
+Uso:
+    $ python benchmarks/movement_log_bench.py
+    $ python benchmarks/movement_log_bench.py --movements 1000000 --segment-size 1000 --max-segments 10
+
+Agrega --movements movimientos a un solo SKU y reporta:
+- throughput de append (incluye escribir a disco los segmentos compactados)
+- memoria retenida (movimientos en memoria y RSS) contra el historial total
+- latencia de page() en la cabeza (memoria) y en el fondo (segmentos en disco)
+- que snapshot + movimientos en memoria reproduzcan el stock final
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.movement_log import MovementLog  # noqa: E402
+from api.records import Movement  # noqa: E402
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed_pages(log, product_id, cursors, limit):
+    start = time.perf_counter()
+    for cursor in cursors:
+        log.page(product_id, before=cursor, limit=limit)
+    return (time.perf_counter() - start) / len(cursors) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--movements", type=int, default=1000000)
+    parser.add_argument("--segment-size", type=int, default=1000)
+    parser.add_argument("--max-segments", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = MovementLog(args.segment_size, args.max_segments, directory)
+        rss_before = rss_mb()
+        stock = 0
+        start = time.perf_counter()
+        for i in range(args.movements):
+            quantity = 3 if i % 4 else -1
+            stock += quantity
+            log.append(1, Movement(1700000000 + i, "restock" if quantity > 0 else "sale", quantity, stock))
+        elapsed = time.perf_counter() - start
+
+        on_disk = sum(os.path.getsize(os.path.join(log.directory, name))
+                      for name in os.listdir(log.directory))
+        print(f"append: {args.movements:,} movimientos en {elapsed:.2f}s "
+              f"({args.movements / elapsed:,.0f}/s)")
+        print(f"en memoria: {log.retained(1):,} de {log.count(1):,}; RSS +{rss_mb() - rss_before:.1f} MB; "
+              f"archivo: {on_disk / 1e6:.1f} MB")
+
+        head = [None] * 200
+        deep = [1 + (i * 7919) % (args.movements - args.limit) for i in range(200)]
+        print(f"page(limit={args.limit}): cabeza {timed_pages(log, 1, head, args.limit):.3f} ms, "
+              f"fondo {timed_pages(log, 1, deep, args.limit):.3f} ms")
+
+        ok = log.replay(1) == stock
+        print(f"replay == stock final: {ok}")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Listado de cotizaciones por cliente/negocio/estado con 1M de cotizaciones.
+
+Uso:
+    $ python benchmarks/quote_store_bench.py
+    $ python benchmarks/quote_store_bench.py --quotes 1000000 --customers 10000 --businesses 500
+
+Crea --quotes cotizaciones en MemoryQuoteStore (sin journal) y reporta:
+- throughput de create()
+- latencia de list() en la primera página y en cursores profundos, por
+  cliente, por negocio + estado y por estado, contra un escaneo completo
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.quote_store import MemoryQuoteStore  # noqa: E402
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--quotes", type=int, default=1000000)
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--businesses", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    statuses = ["pending", "accepted", "rejected", "expired"]
+    store = MemoryQuoteStore()
+
+    start = time.perf_counter()
+    for _ in range(args.quotes):
+        store.create({"customer_id": rng.randint(1, args.customers),
+                      "business_id": rng.randint(1, args.businesses),
+                      "items": [], "status": rng.choice(statuses)})
+    elapsed = time.perf_counter() - start
+    print(f"create: {args.quotes:,} cotizaciones en {elapsed:.1f}s ({args.quotes / elapsed:,.0f}/s)")
+
+    ids = sorted(store._quotes)
+    deep = ids[len(ids) // 10]
+    cases = [
+        ("cliente", {"customer_id": 42}),
+        ("negocio+estado", {"business_id": 7, "status": "accepted"}),
+        ("estado", {"status": "pending"}),
+    ]
+    print(f"{'filtro':>16}{'página 1 ms':>14}{'cursor profundo ms':>20}{'escaneo ms':>12}")
+    for name, filters in cases:
+        head, _ = timed(lambda: store.list(limit=args.limit, **filters), 200)
+        tail, _ = timed(lambda: store.list(before=deep, limit=args.limit, **filters), 200)
+        scan, _ = timed(lambda: sorted(
+            (q for q in store._quotes.values()
+             if all(q[k] == v for k, v in filters.items())),
+            key=lambda q: q["id"], reverse=True)[:args.limit], 1)
+        print(f"{name:>16}{head:>14.3f}{tail:>20.3f}{scan:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Benchmark sync (gunicorn) vs async (uvicorn) con un upstream lento.
+
+Lanza cada servidor con PAYMENT_GATEWAY_LATENCY_MS (200 por defecto) y dispara
+`--concurrency` pagos simultáneos con wait=true: cada request queda abierta
+mientras la pasarela simulada responde. Con workers sync cada request ocupa un
+worker; con uvicorn todas esperan en el mismo event loop.
+
+Uso:
+    $ python benchmarks/slow_upstream.py --concurrency 500 --requests 2000
+    $ python benchmarks/slow_upstream.py --only async --latency-ms 500
+    # Contra servidores ya levantados
+    $ python benchmarks/slow_upstream.py --sync-url http://127.0.0.1:3101 \
+          --async-url http://127.0.0.1:3102
+
+Cada pago corresponde a una orden creada justo antes (POST /api/orders/): el
+monto se toma del total de la orden. Las órdenes viven en la memoria de cada
+proceso, así que con --workers > 1 el pago puede llegar a otro proceso y
+responder 404; esas respuestas se cuentan como errores.
+
+Reporta throughput, latencias p50/p95/p99 y errores por modo.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SYNC_SERVER = "gunicorn wsgi --chdir {src} -w {workers} -b 127.0.0.1:{port}"
+ASYNC_SERVER = "uvicorn asgi:application --app-dir {src} --workers {workers} --port {port} --log-level warning"
+ORDER_PATH = "/api/orders/"
+PAYMENT_PATH = "/api/payments/create-payment"
+ORDER = {"user_id": 1, "items": [{"product_id": 1, "quantity": 1}]}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _post(host, port, path, body, timeout):
+    """POST HTTP/1.1 mínimo (una conexión por request); devuelve (status, body)"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        payload = json.dumps(body).encode("utf-8")
+        writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                      f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                      f"Connection: close\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        head, _, content = response.partition(b"\r\n\r\n")
+        return int(head.split(b" ", 2)[1]), content
+    finally:
+        writer.close()
+
+
+async def run_load(url, concurrency, total, timeout):
+    parsed = urllib.parse.urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    latencies = []
+    errors = 0
+    sent = 0
+
+    async def worker():
+        nonlocal errors, sent
+        while sent < total:
+            sent += 1
+            try:
+                status, content = await _post(host, port, ORDER_PATH, ORDER, timeout)
+                order_id = json.loads(content)["order"]["id"]
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError, KeyError):
+                errors += 1
+                continue
+
+            body = {"order_id": order_id, "wait": True}
+            started = time.perf_counter()
+            try:
+                status, _ = await _post(host, port, PAYMENT_PATH, body, timeout)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def _wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=2):
+                return True
+        except Exception:
+            time.sleep(0.25)
+    return False
+
+
+def bench(mode, command, url, args):
+    server = None
+    try:
+        if command:
+            env = dict(os.environ, PAYMENT_GATEWAY_LATENCY_MS=str(args.latency_ms))
+            server = subprocess.Popen(shlex.split(command), env=env)
+            if not _wait_for(url):
+                print(f"⚠️  {mode}: el servidor no respondió en /health")
+                return None
+        return asyncio.run(run_load(url, args.concurrency, args.requests, args.timeout))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async con upstream lento")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latencia de la pasarela")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4, help="Procesos por servidor")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--only", choices=["sync", "async"])
+    parser.add_argument("--sync-url", help="Usar un servidor sync ya levantado")
+    parser.add_argument("--async-url", help="Usar un servidor async ya levantado")
+    parser.add_argument("--output", help="Guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    src = os.path.abspath(SRC_DIR)
+    modes = {
+        "sync": (SYNC_SERVER, args.sync_url, 3101),
+        "async": (ASYNC_SERVER, args.async_url, 3102),
+    }
+
+    report = {"latency_ms": args.latency_ms, "concurrency": args.concurrency, "modes": {}}
+    for mode, (template, url, port) in modes.items():
+        if args.only and mode != args.only:
+            continue
+        command = None
+        if not url:
+            url = f"http://127.0.0.1:{port}"
+            command = template.format(src=src, workers=args.workers, port=port)
+        result = bench(mode, command, url, args)
+        if result:
+            report["modes"][mode] = result
+
+    print(f"{'modo':<8}{'req':>8}{'err':>6}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for mode, r in report["modes"].items():
+        print(f"{mode:<8}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>10.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
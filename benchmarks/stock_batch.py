@@ -0,0 +1,74 @@
+"""
+Benchmark: N llamadas a /api/inventory/update-stock vs una llamada a
+/api/inventory/update-stock/batch.
+
+Uso:
+    $ gunicorn wsgi --chdir ./src/ -w 4 -b 127.0.0.1:3001 &
+    $ python benchmarks/stock_batch.py --url http://127.0.0.1:3001 --sizes 10 100 1000 10000
+
+Para cada tamaño N envía N movimientos de restock (productos distintos, en
+un rango alto para no tocar el inventario de ejemplo) uno por request y
+después en un solo lote, en los modos atomic y per_item, y reporta
+movimientos por segundo de cada forma.
+"""
+import argparse
+import http.client
+import json
+import sys
+import time
+import urllib.parse
+
+
+class Client:
+    def __init__(self, url):
+        parsed = urllib.parse.urlparse(url)
+        self._conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=120)
+
+    def post(self, path, body):
+        self._conn.request("POST", path, body=json.dumps(body),
+                           headers={"Content-Type": "application/json"})
+        response = self._conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status}")
+
+
+def movements(first_product, n):
+    return [{"product_id": first_product + i % 1000, "quantity": 1 + i % 5, "type": "restock",
+             "reason": "benchmark"} for i in range(n)]
+
+
+def run(client, n, first_product):
+    batch = movements(first_product, n)
+
+    started = time.perf_counter()
+    for movement in batch:
+        client.post("/api/inventory/update-stock", movement)
+    single = n / (time.perf_counter() - started)
+
+    rates = []
+    for mode in ("atomic", "per_item"):
+        started = time.perf_counter()
+        client.post("/api/inventory/update-stock/batch", {"mode": mode, "movements": batch})
+        rates.append(n / (time.perf_counter() - started))
+    return single, rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="update-stock individual vs en lote")
+    parser.add_argument("--url", default="http://127.0.0.1:3001")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args(argv)
+
+    client = Client(args.url)
+    first_product = 10 ** 8 + int(time.time()) % 10 ** 6 * 100
+
+    print(f"{'movimientos':>12}{'individual/s':>15}{'atomic/s':>12}{'per_item/s':>13}{'speedup':>10}")
+    for n in args.sizes:
+        single, (atomic, per_item) = run(client, n, first_product)
+        print(f"{n:>12}{single:>15,.0f}{atomic:>12,.0f}{per_item:>13,.0f}{atomic / single:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
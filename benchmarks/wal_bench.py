@@ -0,0 +1,110 @@
+"""
+Benchmark del WAL: throughput de escritura y tiempo de recuperación.
+
+Uso:
+    $ python benchmarks/wal_bench.py --mutations 10000000 --dir /tmp/wal-bench
+    $ python benchmarks/wal_bench.py --mutations 1000000 --threads 64 --sync batch
+
+Escribe N mutaciones (upserts de órdenes sobre un conjunto de claves) desde
+varios hilos, con un snapshot cada --snapshot-every registros, y después mide
+cuánto tarda un Journal nuevo en cargar el último snapshot y reaplicar la cola.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.journal import Journal  # noqa: E402
+from api.records import Order, OrderItem  # noqa: E402
+
+STATUSES = ["pending_payment", "processing", "shipped", "delivered", "cancelled"]
+
+
+def make_order(order_id, rng):
+    items = [OrderItem(rng.randint(1, 50), "Producto Sostenible", rng.randint(1, 3), 100.5)]
+    subtotal = sum(item.line_total for item in items)
+    return Order(order_id, rng.randint(1, 10000), items, subtotal, 10.0,
+                 round(subtotal * 0.08, 2), round(subtotal * 1.08 + 10, 2),
+                 rng.choice(STATUSES), "credit_card")
+
+
+def write_phase(directory, mutations, keys, threads, sync, snapshot_every):
+    orders = {}
+    journal = Journal(directory, sync=sync, snapshot_every=snapshot_every)
+    journal.register("orders", lambda: dict(orders), orders.update)
+    journal.recover()
+
+    per_thread = mutations // threads
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for _ in range(per_thread):
+            order = make_order(rng.randint(1, keys), rng)
+            orders[order.id] = order
+            journal.record("orders", order.id, order)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    journal.flush()
+    elapsed = time.perf_counter() - started
+    journal.close()
+
+    total = per_thread * threads
+    return {
+        "mutations": total,
+        "seconds": round(elapsed, 2),
+        "mutations_per_s": round(total / elapsed),
+        "batches": journal.stats["batches"],
+        "avg_batch": round(journal.stats["records"] / max(journal.stats["batches"], 1), 1),
+        "snapshots": journal.stats["snapshots"],
+    }, len(orders)
+
+
+def recovery_phase(directory):
+    recovered = {}
+
+    def load(entries):
+        recovered.update(entries)
+
+    journal = Journal(directory)
+    journal.register("orders", lambda: dict(recovered), load)
+    result = journal.recover()
+    return result, len(recovered)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput del WAL y tiempo de recuperación")
+    parser.add_argument("--mutations", type=int, default=1000000)
+    parser.add_argument("--keys", type=int, default=1000000, help="Órdenes distintas")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--sync", choices=["batch", "none"], default="batch")
+    parser.add_argument("--snapshot-every", type=int, default=2000000)
+    parser.add_argument("--dir", default="/tmp/wal-bench")
+    args = parser.parse_args(argv)
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+
+    write, live = write_phase(args.dir, args.mutations, args.keys, args.threads,
+                              args.sync, args.snapshot_every)
+    print(f"Escritura ({args.sync}, {args.threads} hilos): {write}")
+
+    size = sum(os.path.getsize(os.path.join(args.dir, f)) for f in os.listdir(args.dir))
+    print(f"En disco: {size / 1e6:,.1f} MB")
+
+    recovery, count = recovery_phase(args.dir)
+    print(f"Recuperación: {recovery}")
+    print(f"Órdenes recuperadas: {count} (en memoria al cerrar: {live})")
+    return 0 if count == live else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+Fábrica de la app: create_app() arma la API completa (blueprints, base de
+datos, compresión, admin y comandos de flask). src/app.py la usa y agrega lo
+que corre una sola vez por proceso (WAL, schedulers, CORS, JWT).
+"""
+from flask import Flask
+
+
+def create_app():
+    """Crear la app de Flask con todos los blueprints y extensiones"""
+    from .admin import setup_admin
+    from .commands import setup_commands
+    from .compression import init_compression
+    from .database import init_database
+    from .routes import register_blueprints
+
+    app = Flask(__name__)
+    register_blueprints(app)
+
+    # Base de datos y pool de conexiones (ver api/database.py)
+    init_database(app)
+
+    # Compresión de respuestas (gzip/deflate, brotli si está instalado)
+    init_compression(app)
+
+    setup_admin(app)
+    setup_commands(app)
+    return app
@@ -1,18 +1,274 @@
-import os
+"""
+Vistas de administración para tablas grandes.
+
+El ModelView por defecto hace COUNT(*) en cada listado, pagina con OFFSET,
+deja ordenar y buscar (ILIKE '%...%') por cualquier columna y arma los
+selects de relaciones con todas las filas de la tabla relacionada: con
+millones de órdenes cada página recorre la tabla entera.
+
+LargeTableView:
+- Paginación keyset: los enlaces a la página anterior y siguiente llevan un
+  cursor (valor de orden + id de la última/primera fila) y la consulta es
+  WHERE (col, id) < cursor LIMIT n. Saltar a una página lejana sigue usando
+  OFFSET.
+- Conteo estimado: arriba de ADMIN_EXACT_COUNT_MAX filas se usan las
+  estadísticas del motor (pg_class.reltuples en Postgres) o el rango de ids;
+  con búsqueda o filtros no se cuenta y se muestra el paginador simple.
+- Solo se ordena, busca y filtra por columnas con índice (ver models.py):
+  búsqueda exacta en enteros y por prefijo en textos.
+- Relaciones: en los formularios se cargan por ajax (form_ajax_refs) y las
+  colecciones uno-a-muchos no se muestran.
+"""
+
+import base64
 import inspect
+import json
+import os
+from datetime import datetime
+
+from flask import g
 from flask_admin import Admin
-from . import models
-from .models import db
 from flask_admin.contrib.sqla import ModelView
+from flask_admin.contrib.sqla.filters import FilterEqual
 from flask_admin.theme import Bootstrap4Theme
+from sqlalchemy import Integer, and_, false, func, or_, select, text
+
+from . import models
+from .models import db, User, Product, Cart, CartItem, Order, OrderItem, Business, Quote
+from .order_states import ORDER_STATUSES, ORDER_STATUS_ALIASES
+from .quote_store import QUOTE_STATUSES
+
+EXACT_COUNT_MAX = int(os.environ.get("ADMIN_EXACT_COUNT_MAX", 100000))
+
+
+def estimated_count(session, model):
+    """Filas de la tabla sin recorrerla: estadísticas del motor o rango de ids"""
+    table = model.__table__
+    bind = session.get_bind(mapper=model.__mapper__)
+    if bind.dialect.name == "postgresql":
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": table.fullname}).scalar()
+        if estimate is not None and estimate >= 0:  # -1: tabla sin ANALYZE
+            return estimate
+    # Mínimo y máximo de la clave primaria salen del índice, sin recorrer la tabla
+    # (en consultas separadas: SQLite solo optimiza un min/max por consulta)
+    low = session.execute(select(func.min(model.id))).scalar()
+    high = session.execute(select(func.max(model.id))).scalar()
+    return 0 if high is None else high - low + 1
+
+
+def _encode_cursor(state):
+    raw = json.dumps(state, default=lambda value: value.isoformat()).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+class LargeTableView(ModelView):
+    page_size = 50
+    column_display_pk = True
+    column_default_sort = ("id", True)
+    column_sortable_list = ("id",)
+    column_auto_select_related = False
+
+    # Listado
+    def _get_list_extra_args(self):
+        view_args = super()._get_list_extra_args()
+        # El cursor vale solo para la página que lo pidió: no se arrastra a otros enlaces
+        g.admin_cursor = view_args.extra_args.pop("cursor", None)
+        return view_args
+
+    def _get_list_url(self, view_args):
+        url = super()._get_list_url(view_args)
+        cursor = g.get("admin_next_cursors", {}).get(view_args.page or 0)
+        if cursor is None:
+            return url
+        return f"{url}{'&' if '?' in url else '?'}cursor={cursor}"
+
+    def _sort_field(self, sort_column, sort_desc):
+        if sort_column is not None and sort_column in self._sortable_columns:
+            return sort_column, self._sortable_columns[sort_column], bool(sort_desc)
+        name, descending = self.column_default_sort
+        return name, getattr(self.model, name), descending
+
+    def _count(self, search, filters):
+        if search or filters:
+            return None  # Paginador simple: contar con filtros recorre las filas filtradas
+        estimate = estimated_count(self.session, self.model)
+        if estimate <= EXACT_COUNT_MAX:
+            return self.session.execute(select(func.count()).select_from(self.model)).scalar()
+        return estimate
+
+    def get_list(self, page, sort_column, sort_desc, search, filters,
+                 execute=True, page_size=None):
+        page = page or 0
+        page_size = page_size or self.page_size
+        query = self.get_query()
+        if self._search_supported and search:
+            query, _, _, _ = self._apply_search(query, None, {}, {}, search)
+        if filters and self._filters:
+            query, _, _, _ = self._apply_filters(query, None, {}, {}, filters)
+        count = self._count(search, filters)
+
+        name, column, descending = self._sort_field(sort_column, sort_desc)
+        pk = self.model.id
+        keys = [column] if column is pk else [column, pk]
+        scope = [name, descending, search or "", [list(f) for f in filters or []]]
+
+        # Cursor de la página anterior/siguiente, si fue emitido para esta misma vista
+        state = _decode_cursor(g.get("admin_cursor") or "")
+        backwards = False
+        if state and state[:2] == [page, scope]:
+            backwards, values = state[2], state[3]
+            if column.type.python_type is datetime and values[0] is not None:
+                values[0] = datetime.fromisoformat(values[0])
+            if None not in values:
+                query = query.filter(self._seek(keys, values, descending != backwards))
+            else:
+                state = None
+        else:
+            state = None
+
+        order = [key.desc() if descending != backwards else key.asc() for key in keys]
+        query = query.order_by(*order).limit(page_size)
+        if state is None and page:
+            query = query.offset(page * page_size)
+        if not execute:
+            return count, query
+
+        rows = query.all()
+        if backwards:
+            rows.reverse()
+
+        # Cursores para los enlaces del paginador (la página 0 no lo necesita)
+        cursors = {}
+        if rows:
+            first = [getattr(rows[0], key.key) for key in keys]
+            last = [getattr(rows[-1], key.key) for key in keys]
+            cursors[page + 1] = _encode_cursor([page + 1, scope, False, last])
+            if page > 1:
+                cursors[page - 1] = _encode_cursor([page - 1, scope, True, first])
+        g.admin_next_cursors = cursors
+        return count, rows
+
+    @staticmethod
+    def _seek(keys, values, descending):
+        """Filas después de values en el orden (keys, descending)"""
+        if len(keys) == 1:
+            return keys[0] < values[0] if descending else keys[0] > values[0]
+        (column, pk), (value, last_id) = keys, values
+        if descending:
+            return or_(column < value, and_(column == value, pk < last_id))
+        return or_(column > value, and_(column == value, pk > last_id))
+
+    # Búsqueda
+    def _apply_search(self, query, count_query, joins, count_joins, search):
+        """Enteros por igualdad y textos por prefijo: condiciones que usan el índice"""
+        for term in search.split():
+            conditions = []
+            for field, _ in self._search_fields:
+                if isinstance(field.type, Integer):
+                    if term.isdigit():
+                        conditions.append(field == int(term))
+                else:
+                    conditions.append(field.startswith(term, autoescape=True))
+            condition = or_(*conditions) if conditions else false()
+            query = query.filter(condition)
+            if count_query is not None:
+                count_query = count_query.filter(condition)
+        return query, count_query, joins, count_joins
+
+
+class OrderStatusFilter(FilterEqual):
+    """Igualdad por estado que también encuentra las filas con su nombre anterior"""
+
+    def apply(self, query, value, alias=None):
+        names = [value] + [old for old, new in ORDER_STATUS_ALIASES.items() if new == value]
+        return query.filter(self.get_column(alias).in_(names))
+
+
+class UserAdmin(LargeTableView):
+    column_list = ("id", "email", "name", "role", "created_at")
+    column_searchable_list = ("id", "email")
+    form_excluded_columns = ("orders", "quotes", "cart", "business")
+
+
+class ProductAdmin(LargeTableView):
+    column_list = ("id", "name", "category", "price", "stock", "is_active", "created_at")
+    column_searchable_list = ("id", "name")
+    column_filters = (FilterEqual(Product.category, "Categoría"),)
+    form_ajax_refs = {"business": {"fields": ("company_name",), "page_size": 10}}
+
+
+class OrderAdmin(LargeTableView):
+    column_list = ("id", "user_id", "total_amount", "status", "created_at")
+    column_sortable_list = ("id", "created_at")
+    column_searchable_list = ("id", "user_id")
+    column_filters = (OrderStatusFilter(Order.status, "Estado",
+                                        options=[(s, s) for s in ORDER_STATUSES]),)
+    form_ajax_refs = {"customer": {"fields": ("email",), "page_size": 10}}
+
+
+class OrderItemAdmin(LargeTableView):
+    column_searchable_list = ("order_id",)
+
+
+class QuoteAdmin(LargeTableView):
+    column_list = ("id", "customer_id", "business_id", "status", "total_price",
+                   "order_id", "created_at")
+    column_searchable_list = ("id", "customer_id", "business_id")
+    column_filters = (FilterEqual(Quote.status, "Estado",
+                                  options=[(s, s) for s in QUOTE_STATUSES]),)
+    form_ajax_refs = {
+        "customer": {"fields": ("email",), "page_size": 10},
+        "business": {"fields": ("company_name",), "page_size": 10},
+    }
+
+
+class CartAdmin(LargeTableView):
+    column_searchable_list = ("user_id",)
+    form_ajax_refs = {"customer": {"fields": ("email",), "page_size": 10}}
+
+
+class BusinessAdmin(LargeTableView):
+    form_excluded_columns = ("products", "quotes")
+    form_ajax_refs = {"owner": {"fields": ("email",), "page_size": 10}}
+
+
+ADMIN_VIEWS = [
+    (User, UserAdmin),
+    (Product, ProductAdmin),
+    (Order, OrderAdmin),
+    (OrderItem, OrderItemAdmin),
+    (Quote, QuoteAdmin),
+    (Cart, CartAdmin),
+    (CartItem, LargeTableView),
+    (Business, BusinessAdmin),
+]
+
+
+def _view(view, model):
+    # Endpoint con prefijo: "cart" u "orders" ya son nombres de blueprints de la API
+    name = model.__name__.lower()
+    return view(model, db.session, endpoint=f"admin_{name}", url=name)
 
 
 def setup_admin(app):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     admin = Admin(app, name='4Geeks Admin', theme=Bootstrap4Theme(swatch='cerulean'))
 
-    # Dynamically add all models to the admin interface
+    for model, view in ADMIN_VIEWS:
+        admin.add_view(_view(view, model))
+
+    # Modelos sin vista propia: la vista base (conteo estimado, keyset, solo por id)
+    registered = {model for model, _ in ADMIN_VIEWS}
     for name, obj in inspect.getmembers(models):
-        # Verify that the object is a SQLAlchemy model before adding it to the admin. 
-        if inspect.isclass(obj) and issubclass(obj, db.Model):
-            admin.add_view(ModelView(obj, db.session))
\ No newline at end of file
+        if inspect.isclass(obj) and issubclass(obj, db.Model) and obj not in registered:
+            admin.add_view(_view(LargeTableView, obj))
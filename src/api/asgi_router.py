@@ -0,0 +1,145 @@
+"""
+Router ASGI mínimo para servir endpoints async junto a la app Flask.
+
+Las rutas registradas con `@router.route(...)` se atienden en el event loop:
+mientras esperan I/O (pasarela de pago, disco) no ocupan un hilo, así un solo
+worker mantiene miles de requests lentas abiertas. Todo lo demás se delega a
+la app Flask envuelta con WsgiToAsgi (que la ejecuta en un pool de hilos).
+
+Un handler recibe un AsgiRequest y devuelve (payload, status) o un
+EventStream para respuestas server-sent events.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+class AsgiRequest:
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1")
+                        for k, v in scope.get("headers", [])}
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.args = {k: v[-1] for k, v in query.items()}
+        self.body = body
+
+    def get_json(self):
+        """JSON del body, o None si falta o es inválido"""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+
+class EventStream:
+    """Respuesta text/event-stream a partir de un generador async de dicts"""
+
+    def __init__(self, events):
+        self.events = events
+
+
+class AsyncRouter:
+    def __init__(self, wsgi_app, cors_origin="*"):
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self.cors_origin = cors_origin
+        self.routes = {}
+
+    def route(self, path, methods=("GET",)):
+        def decorator(handler):
+            for method in methods:
+                self.routes[(method, path.rstrip("/") or "/")] = handler
+            return handler
+        return decorator
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        handler = None
+        if scope["type"] == "http":
+            key = (scope["method"], scope["path"].rstrip("/") or "/")
+            handler = self.routes.get(key)
+
+        if handler is None:
+            return await self.fallback(scope, receive, send)
+
+        request = AsgiRequest(scope, await self._read_body(receive))
+        try:
+            result = await handler(request)
+        except Exception:
+            result = ({"error": "Internal server error"}, 500)
+
+        if isinstance(result, EventStream):
+            return await self._send_stream(scope, result, receive, send)
+
+        payload, status = result
+        await self._send_json(scope, payload, status, send)
+
+    @staticmethod
+    async def _lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    def _headers(self, scope, headers):
+        # Mismo CORS que aplica flask_cors a /api/*
+        if self.cors_origin and scope["path"].startswith("/api/"):
+            headers = headers + [(b"access-control-allow-origin",
+                                  self.cors_origin.encode("latin-1"))]
+        return headers
+
+    async def _send_json(self, scope, payload, status, send):
+        body = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": self._headers(scope, JSON_HEADERS + [
+                (b"content-length", str(len(body)).encode("latin-1"))])
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_stream(self, scope, stream, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": self._headers(scope, [(b"content-type", b"text/event-stream"),
+                                             (b"cache-control", b"no-cache")])
+        })
+
+        # Cortar el stream cuando el cliente se desconecta
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        disconnected = asyncio.ensure_future(wait_disconnect())
+        try:
+            async for event in stream.events:
+                if disconnected.done():
+                    break
+                chunk = f"data: {json.dumps(event)}\n\n".encode("utf-8")
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            pass
+        finally:
+            disconnected.cancel()
@@ -0,0 +1,210 @@
+"""
+Carga masiva de datos sintéticos para staging y pruebas de carga.
+
+Las filas se generan en memoria por lotes y se insertan con executemany
+(una sentencia por lote, un commit por lote). En Postgres se usa COPY, que
+evita el parseo SQL por fila, y al terminar se ajusta la secuencia del id
+(las filas llevan ids explícitos). Cada tabla informa el avance en filas/s.
+"""
+
+import csv
+import io
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+
+from .models import db, User, Product, Order, OrderItem
+from .sample_data import STATUSES, generate_order_columns
+
+CATEGORIES = ["Electrónicos", "Hogar", "Ropa", "Jardín", "Oficina"]
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _table_name(table):
+    # "order" es palabra reservada: citar siempre el nombre
+    return db.engine.dialect.identifier_preparer.format_table(table)
+
+
+def _copy_rows(table, columns, rows):
+    """COPY ... FROM STDIN (Postgres) para un lote de filas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {_table_name(table)} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer)
+
+
+def reset_id_sequence(model):
+    """
+    Postgres: llevar la secuencia del id al máximo cargado, para que los
+    INSERT normales posteriores no choquen con los ids explícitos. En otros
+    motores no hace nada (sqlite usa MAX(id) + 1).
+    """
+    if db.engine.dialect.name != "postgresql":
+        return
+    name = _table_name(model.__table__)
+    db.session.execute(text(
+        f"SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {name}), 1), "
+        f"(SELECT MAX(id) IS NOT NULL FROM {name}))"), {"table": name})
+    db.session.commit()
+
+
+def bulk_insert(model, rows, batch_size=5000, label=None):
+    """Insertar un iterable de dicts por lotes; devuelve el total insertado"""
+    table = model.__table__
+    label = label or table.name
+    use_copy = db.engine.dialect.name == "postgresql"
+
+    started = time.perf_counter()
+    total = 0
+    batch = []
+
+    def flush(batch):
+        if use_copy:
+            _copy_rows(table, list(batch[0].keys()), batch)
+        else:
+            db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush(batch)
+            total += len(batch)
+            batch = []
+            elapsed = time.perf_counter() - started
+            print(f"  {label}: {total} filas ({total / elapsed:,.0f} filas/s)")
+
+    if batch:
+        flush(batch)
+        total += len(batch)
+
+    if total:
+        reset_id_sequence(model)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {label}: {total} filas en {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} filas/s)")
+    return total
+
+
+def generate_users(count, start_id):
+    # Un solo hash para todos: el hash por fila domina el tiempo de carga
+    password = generate_password_hash("123456")
+    now = datetime.utcnow()
+    for i in range(count):
+        user_id = start_id + i
+        yield {
+            "id": user_id,
+            "email": f"test_user{user_id}@test.com",
+            "password": password,
+            "name": f"Usuario {user_id}",
+            "role": "business" if user_id % 20 == 0 else "customer",
+            "created_at": now
+        }
+
+
+def generate_products(count, start_id):
+    now = datetime.utcnow()
+    for i in range(count):
+        product_id = start_id + i
+        yield {
+            "id": product_id,
+            "name": f"Producto Sostenible {product_id}",
+            "description": f"Descripción del producto sostenible {product_id}",
+            "price": round(random.lognormvariate(4, 0.6), 2),
+            "category": random.choice(CATEGORIES),
+            "stock": random.randint(0, 500),
+            "image_url": "https://via.placeholder.com/300",
+            "is_active": True,
+            "created_at": now
+        }
+
+
+def generate_orders(count, start_id, start_item_id, user_ids, product_prices, items_out):
+    """
+    Genera órdenes y agrega sus líneas a items_out (para insertarlas después).
+    Los sorteos son vectorizados (ver api/sample_data.py).
+    """
+    product_ids = np.array(list(product_prices))
+    prices = np.array(list(product_prices.values()), dtype=np.float64)
+    columns = generate_order_columns(
+        count, [{"id": pid, "name": "", "price": price} for pid, price in product_prices.items()],
+        users=user_ids, days=365)
+
+    order_ids = start_id + np.arange(count)
+    lines = np.diff(columns["item_offsets"])
+    items_out.extend(
+        {"id": item_id, "order_id": order_id, "product_id": product_id,
+         "quantity": quantity, "price": price}
+        for item_id, order_id, product_id, quantity, price in zip(
+            range(start_item_id, start_item_id + len(columns["item_product"])),
+            np.repeat(order_ids, lines).tolist(),
+            product_ids[columns["item_product"]].tolist(),
+            columns["item_quantity"].tolist(),
+            prices[columns["item_product"]].tolist()))
+
+    created_at = columns["created_at"].astype("datetime64[s]").astype(datetime).tolist()
+    for order_id, user_id, total, status, created in zip(
+            order_ids.tolist(), columns["user_id"].tolist(),
+            (columns["subtotal_cents"] / 100).tolist(), columns["status"].tolist(), created_at):
+        yield {
+            "id": order_id,
+            "user_id": user_id,
+            "total_amount": total,
+            "status": STATUSES[status],
+            "stripe_payment_id": None,
+            "created_at": created
+        }
+
+
+def load_dataset(users=0, products=0, orders=0, batch_size=5000):
+    """Cargar usuarios, productos y órdenes (con líneas) por lotes"""
+    results = {}
+
+    if users:
+        results['users'] = bulk_insert(
+            User, generate_users(users, _next_id(User)), batch_size)
+
+    if products:
+        results['products'] = bulk_insert(
+            Product, generate_products(products, _next_id(Product)), batch_size)
+
+    if orders:
+        # Los ids pueden tener huecos (usuarios borrados, secuencias): sortear de los existentes
+        user_ids = np.fromiter(db.session.execute(select(User.id)).scalars(), dtype=np.int64)
+        prices = dict(db.session.execute(select(Product.id, Product.price)).all())
+        if not len(user_ids) or not prices:
+            raise ValueError("Se necesitan usuarios y productos para generar órdenes")
+
+        next_item_id = _next_id(OrderItem)
+        total_orders = 0
+        total_items = 0
+        # Las líneas se insertan por tramos de órdenes para acotar la memoria
+        for chunk_start in range(0, orders, batch_size * 10):
+            chunk = min(batch_size * 10, orders - chunk_start)
+            items = []
+            total_orders += bulk_insert(
+                Order, generate_orders(chunk, _next_id(Order), next_item_id,
+                                       user_ids, prices, items),
+                batch_size)
+            total_items += bulk_insert(OrderItem, items, batch_size, label="order_item")
+            next_item_id += len(items)
+
+        results['orders'] = total_orders
+        results['order_items'] = total_items
+
+    return results
@@ -0,0 +1,122 @@
+"""
+Totales de carrito mantenidos en cada mutación, en centavos enteros.
+
+Cada carrito guarda subtotal, unidades y cantidad de líneas; agregar, cambiar o
+quitar una línea suma solo la diferencia entre el total nuevo y el anterior de
+esa línea, así leer el resumen es O(1) y los montos no arrastran errores de
+float. Las líneas se valoran con la misma función que el checkout (lista del
+negocio y tramos por volumen) y el envío y el impuesto siguen las mismas
+reglas que la orden. Cuando cambian los precios, invalidate() sube la versión
+de precios y cada carrito se recalcula una sola vez, en su próxima lectura.
+"""
+
+import threading
+
+TAX_PCT = 8
+SHIPPING_CENTS = 1000
+FREE_SHIPPING_CENTS = 10000   # envío gratis desde este subtotal
+
+
+def to_cents(price):
+    return round(price * 100)
+
+
+def tax_cents(subtotal_cents):
+    """8% en centavos, redondeando la mitad hacia arriba"""
+    return (subtotal_cents * TAX_PCT + 50) // 100
+
+
+def shipping_cents(subtotal_cents):
+    """Envío en centavos: nada para un carrito vacío ni desde FREE_SHIPPING_CENTS"""
+    if subtotal_cents == 0 or subtotal_cents >= FREE_SHIPPING_CENTS:
+        return 0
+    return SHIPPING_CENTS
+
+
+class CartTotals:
+    __slots__ = ("subtotal_cents", "total_items", "items_count", "price_version")
+
+    def __init__(self, price_version):
+        self.subtotal_cents = 0
+        self.total_items = 0
+        self.items_count = 0
+        self.price_version = price_version
+
+    def summary(self):
+        shipping = shipping_cents(self.subtotal_cents)
+        tax = tax_cents(self.subtotal_cents)
+        return {
+            "items_count": self.items_count,
+            "total_items": self.total_items,
+            "subtotal": self.subtotal_cents / 100,
+            "shipping": shipping / 100,
+            "tax": tax / 100,
+            "total": (self.subtotal_cents + shipping + tax) / 100
+        }
+
+
+class CartTotalsIndex:
+    def __init__(self, line_cents_of):
+        # line_cents_of(cart_id, product_id, cantidad) -> total de la línea en
+        # centavos, o None si el producto no existe
+        self._line_cents_of = line_cents_of
+        self._totals = {}
+        self._price_version = 0
+        self._lock = threading.Lock()
+
+    def apply(self, cart_id, product_id, old_quantity, new_quantity):
+        """Sumar al carrito la diferencia de una línea que pasó de old a new unidades"""
+        new_cents = self._line_cents_of(cart_id, product_id, new_quantity) if new_quantity else 0
+        old_cents = self._line_cents_of(cart_id, product_id, old_quantity) if old_quantity else 0
+        if new_cents is None or old_cents is None:
+            return
+        with self._lock:
+            totals = self._totals.get(cart_id)
+            if totals is None:
+                totals = self._totals[cart_id] = CartTotals(self._price_version)
+            totals.subtotal_cents += new_cents - old_cents
+            totals.total_items += new_quantity - old_quantity
+            totals.items_count += bool(new_quantity) - bool(old_quantity)
+
+    def summary(self, cart_id, lines):
+        """
+        Resumen del carrito. lines() devuelve sus líneas y solo se llama si
+        los totales no existen o quedaron de una versión de precios anterior.
+        """
+        with self._lock:
+            totals = self._totals.get(cart_id)
+            if totals is None or totals.price_version != self._price_version:
+                totals = self._recompute(cart_id, lines())
+            return totals.summary()
+
+    def recompute(self, cart_id, lines):
+        """Resumen calculado desde cero (lo que apply() mantiene incrementalmente)"""
+        return self._build(cart_id, lines).summary()
+
+    def _recompute(self, cart_id, lines):
+        totals = self._totals[cart_id] = self._build(cart_id, lines)
+        return totals
+
+    def _build(self, cart_id, lines):
+        totals = CartTotals(self._price_version)
+        for line in lines:
+            cents = self._line_cents_of(cart_id, line.product_id, line.quantity)
+            if cents is None:
+                continue
+            totals.subtotal_cents += cents
+            totals.total_items += line.quantity
+            totals.items_count += 1
+        return totals
+
+    def discard(self, cart_id):
+        with self._lock:
+            self._totals.pop(cart_id, None)
+
+    def invalidate(self):
+        """Llamar cuando cambian los precios: los carritos se recalculan al leerse"""
+        with self._lock:
+            self._price_version += 1
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
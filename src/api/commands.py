@@ -1,34 +1,97 @@
-
 import click
+import os
+import time
 from api.models import db, User
+from api.bulk_loader import bulk_insert, generate_users, load_dataset, reset_id_sequence, _next_id
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
-Flask commands are usefull to run cronjobs or tasks outside of the API but sill in integration 
+Flask commands are usefull to run cronjobs or tasks outside of the API but sill in integration
 with youy database, for example: Import the price of bitcoin every night as 12am
 """
 def setup_commands(app):
-    
-    """ 
+
+    """
     This is an example command "insert-test-users" that you can run from the command line
     by typing: $ flask insert-test-users 5
     Note: 5 is the number of users to add
+    Users are inserted in batches (--batch-size). Use --per-row to run the old
+    one-commit-per-user loop and compare rows/s.
     """
     @app.cli.command("insert-test-users") # name of our command
     @click.argument("count") # argument of out command
-    def insert_test_users(count):
+    @click.option("--batch-size", default=5000, show_default=True)
+    @click.option("--per-row", is_flag=True, help="One commit per user (slow, for comparison)")
+    def insert_test_users(count, batch_size, per_row):
         print("Creating test users")
-        for x in range(1, int(count) + 1):
-            user = User()
-            user.email = "test_user" + str(x) + "@test.com"
-            user.password = "123456"
-            user.is_active = True
-            db.session.add(user)
-            db.session.commit()
-            print("User: ", user.email, " created.")
+        count = int(count)
 
-        print("All test users created")
+        if not per_row:
+            bulk_insert(User, generate_users(count, _next_id(User)), batch_size)
+            print("All test users created")
+            return
 
+        started = time.perf_counter()
+        for row in generate_users(count, _next_id(User)):
+            db.session.add(User(**row))
+            db.session.commit()
+        reset_id_sequence(User)
+        elapsed = time.perf_counter() - started
+        print(f"All test users created ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    """
+    Load a synthetic dataset for staging / load tests, e.g.:
+    $ flask insert-test-data --users 100000 --products 50000 --orders 1000000
+    """
     @app.cli.command("insert-test-data")
-    def insert_test_data():
-        pass
\ No newline at end of file
+    @click.option("--users", default=1000, show_default=True)
+    @click.option("--products", default=1000, show_default=True)
+    @click.option("--orders", default=10000, show_default=True)
+    @click.option("--batch-size", default=5000, show_default=True)
+    def insert_test_data(users, products, orders, batch_size):
+        started = time.perf_counter()
+        results = load_dataset(users=users, products=products,
+                               orders=orders, batch_size=batch_size)
+        print(f"Test data loaded in {time.perf_counter() - started:.2f}s: {results}")
+
+    """
+    Generate synthetic orders for the in-memory API (vectorized, see api/sample_data.py)
+    and write a WAL snapshot, so the server starts with them, e.g. for load tests:
+    $ DURABILITY_DIR=/var/lib/ecommerce/wal flask generate-sample-orders 5000000 --users 100000
+    The server must be stopped: the WAL directory is locked by the process that
+    owns it. The command loads the existing state, adds the orders on top and
+    the server picks them up on its next start.
+    """
+    @app.cli.command("generate-sample-orders")
+    @click.argument("count", type=int)
+    @click.option("--users", default=1000, show_default=True)
+    @click.option("--days", default=60, show_default=True)
+    @click.option("--seed", type=int, default=None)
+    def generate_sample_orders(count, users, days, seed):
+        from api.journal import journal
+        from api.routes.orders import add_orders
+        from api.sample_data import build_orders, generate_order_columns
+
+        if not os.environ.get("DURABILITY_DIR"):
+            raise click.ClickException(
+                "DURABILITY_DIR is required: the orders live in the server process, "
+                "this command hands them over through a WAL snapshot")
+        if not journal.enabled:
+            raise click.ClickException(
+                f"{os.environ['DURABILITY_DIR']} is locked by a running server: "
+                "stop it, run this command and start it again")
+
+        started = time.perf_counter()
+        # app.py recovers on import; with another app (api:create_app) recover
+        # here, or the snapshot would replace the existing orders
+        if not journal.recovered:
+            print(f"  existing state: {journal.recover()}")
+        columns = generate_order_columns(count, users=users, days=days, seed=seed)
+        print(f"  columns: {time.perf_counter() - started:.2f}s")
+        orders = build_orders(columns)
+        print(f"  records: {time.perf_counter() - started:.2f}s")
+        add_orders(orders, record=False)
+        journal.snapshot()
+        elapsed = time.perf_counter() - started
+        print(f"{count} sample orders written to {journal.directory} in {elapsed:.2f}s "
+              f"({count / max(elapsed, 1e-9):,.0f} orders/s)")
@@ -0,0 +1,224 @@
+"""
+Compresión de respuestas HTTP (br / gzip / deflate).
+
+- Solo se comprimen respuestas con tipo de contenido comprimible y cuyo
+  cuerpo supere COMPRESS_MIN_SIZE bytes (por debajo el overhead no compensa).
+- Las respuestas en streaming (generadores) se comprimen por bloques.
+- Las respuestas cacheadas con @cached_response guardan el cuerpo ya
+  comprimido por codificación, así un payload caliente se comprime una sola vez.
+  Con CACHE_BACKEND=shared la cache vive en memoria compartida (ver
+  shared_cache.py) y la comparten todos los workers del host.
+"""
+
+import gzip
+import os
+import threading
+import time
+import zlib
+from functools import wraps
+
+from flask import Response, make_response, request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+}
+
+DEFAULT_MIN_SIZE = 500
+DEFAULT_LEVEL = 6
+
+
+def _supported_encodings():
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.insert(0, "br")
+    return encodings
+
+
+def compress_bytes(data, encoding, level=DEFAULT_LEVEL):
+    """Comprimir un cuerpo completo con la codificación indicada"""
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(data, level)
+    raise ValueError(f"Codificación no soportada: {encoding}")
+
+
+def compress_stream(chunks, encoding, level=DEFAULT_LEVEL):
+    """Comprimir un iterable de bloques sin cargarlo entero en memoria"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+
+    # wbits 31 = contenedor gzip, 15 = contenedor zlib (HTTP "deflate")
+    wbits = 31 if encoding == "gzip" else 15
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+# Cache de respuestas con variantes precomprimidas
+class _CachedBody:
+    __slots__ = ("body", "mimetype", "status", "expires_at", "encoded")
+
+    def __init__(self, body, mimetype, status, expires_at):
+        self.body = body
+        self.mimetype = mimetype
+        self.status = status
+        self.expires_at = expires_at
+        self.encoded = {}
+
+
+class LocalCache:
+    """Cache en memoria del proceso (una copia por worker), con la misma interfaz"""
+
+    def __init__(self):
+        self._entries = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def versioned_key(self, namespace, key):
+        return (namespace, self._versions.get(namespace, 0), key)
+
+    def get(self, full_key):
+        entry = self._entries.get(full_key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def set(self, full_key, value, expires_at):
+        with self._lock:
+            if full_key[1] == self._versions.get(full_key[0], 0):
+                self._entries[full_key] = (expires_at, value)
+        return True
+
+    def invalidate(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                namespaces = set(self._versions) | {k[0] for k in self._entries}
+            else:
+                namespaces = {namespace}
+            for name in namespaces:
+                self._versions[name] = self._versions.get(name, 0) + 1
+            for key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[key]
+
+
+def create_cache_backend():
+    """CACHE_BACKEND=shared: un segmento compartido por todos los workers del host"""
+    if os.environ.get("CACHE_BACKEND") == "shared":
+        from .shared_cache import SharedMemoryCache
+        return SharedMemoryCache()
+    return LocalCache()
+
+
+response_cache = create_cache_backend()
+
+
+def cached_response(ttl=30, namespace=None):
+    """Cachear la respuesta de un GET (clave: namespace + ruta con query string)"""
+    def decorator(view):
+        prefix = namespace or view.__name__
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            key = response_cache.versioned_key(prefix, request.full_path)
+            entry = response_cache.get(key)
+
+            if entry is None:
+                response = view(*args, **kwargs)
+                if not isinstance(response, Response):
+                    response = make_response(response)
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                entry = _CachedBody(response.get_data(), response.mimetype,
+                                    response.status_code, time.time() + ttl)
+                response_cache.set(key, entry, entry.expires_at)
+
+            response = Response(entry.body, status=entry.status,
+                                mimetype=entry.mimetype)
+            response.cache_entry = (key, entry)
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_cache(namespace=None):
+    """Invalidar entradas cacheadas (todas o las de un namespace)"""
+    response_cache.invalidate(namespace)
+
+
+def init_compression(app):
+    """Registrar la compresión de respuestas en la app"""
+    min_size = int(os.environ.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE))
+    level = int(os.environ.get("COMPRESS_LEVEL", DEFAULT_LEVEL))
+    encodings = _supported_encodings()
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        if "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(encodings)
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(
+                response.response, encoding, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            if response.content_length is not None and response.content_length < min_size:
+                return response
+
+            cache_entry = getattr(response, "cache_entry", None)
+            if cache_entry is not None:
+                key, entry = cache_entry
+                compressed = entry.encoded.get(encoding)
+                if compressed is None:
+                    compressed = compress_bytes(entry.body, encoding, level)
+                    entry.encoded[encoding] = compressed
+                    # Guardar la variante para el resto de los workers
+                    response_cache.set(key, entry, entry.expires_at)
+            else:
+                data = response.get_data()
+                if len(data) < min_size:
+                    return response
+                compressed = compress_bytes(data, encoding, level)
+
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    return app
@@ -0,0 +1,138 @@
+"""
+Configuración del motor SQLAlchemy y del pool de conexiones.
+
+Variables de entorno (todas opcionales):
+    DATABASE_URL            URL de la base (por defecto sqlite en /tmp)
+    DATABASE_REPLICA_URL    réplica de solo lectura para los GET (opcional)
+    DB_POOL_SIZE            conexiones persistentes por proceso (5)
+    DB_MAX_OVERFLOW         conexiones extra en picos (10)
+    DB_POOL_TIMEOUT         segundos esperando una conexión libre (30)
+    DB_POOL_RECYCLE         reciclar conexiones más viejas que N segundos (1800)
+    DB_POOL_PRE_PING        verificar la conexión antes de usarla (true)
+    DB_STATEMENT_TIMEOUT_MS timeout por sentencia en Postgres (0 = sin límite)
+
+Con gunicorn --preload el pool creado en el master se descarta en cada worker
+después del fork, para que los procesos nunca compartan sockets.
+"""
+
+import os
+import threading
+
+from flask_migrate import Migrate
+from sqlalchemy import event
+
+from .models import db
+from .db_routing import REPLICA_BIND, init_read_routing
+
+_pool_stats = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidated": 0}
+_stats_lock = threading.Lock()
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def database_url(name="DATABASE_URL", default="sqlite:////tmp/test.db"):
+    db_url = os.environ.get(name)
+    if db_url is None:
+        return default
+    return db_url.replace("postgres://", "postgresql://")
+
+
+def engine_options(db_url):
+    """Opciones de create_engine según el motor de base de datos"""
+    options = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+    }
+
+    if db_url.startswith("sqlite"):
+        # sqlite en memoria usa un pool de un solo hilo sin tamaño configurable
+        if ":memory:" in db_url or db_url == "sqlite://":
+            return options
+        options["connect_args"] = {"check_same_thread": False}
+
+    options.update({
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    })
+
+    statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+    if statement_timeout and db_url.startswith("postgresql"):
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={statement_timeout}"
+        }
+
+    return options
+
+
+def _count(name):
+    def listener(*args):
+        with _stats_lock:
+            _pool_stats[name] += 1
+    return listener
+
+
+def _instrument(engine):
+    event.listen(engine, "connect", _count("connects"))
+    event.listen(engine.pool, "checkout", _count("checkouts"))
+    event.listen(engine.pool, "checkin", _count("checkins"))
+    event.listen(engine.pool, "invalidate", _count("invalidated"))
+
+
+def init_database(app):
+    """Configurar SQLAlchemy, el pool de conexiones y las migraciones"""
+    db_url = database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = db_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update(
+        engine_options(db_url))
+
+    replica_url = database_url("DATABASE_REPLICA_URL", default=None)
+    if replica_url:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = {
+            "url": replica_url, **engine_options(replica_url)}
+        init_read_routing(app)
+
+    db.init_app(app)
+    Migrate(app, db, compare_type=True)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        _instrument(engine)
+
+    # Descartar las conexiones heredadas del proceso padre (gunicorn --preload)
+    def reset_pools_after_fork():
+        for engine in engines:
+            engine.dispose(close=False)
+        with _stats_lock:
+            for key in _pool_stats:
+                _pool_stats[key] = 0
+
+    os.register_at_fork(after_in_child=reset_pools_after_fork)
+    app.extensions['db_engines'] = engines
+    return app
+
+
+def pool_metrics(app):
+    """Estado del pool de conexiones de este proceso"""
+    pools = []
+    for engine in app.extensions.get('db_engines', []):
+        pool = engine.pool
+        pools.append({
+            "url": engine.url.render_as_string(hide_password=True),
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "status": pool.status()
+        })
+
+    with _stats_lock:
+        counters = dict(_pool_stats)
+
+    return {"pid": os.getpid(), "pools": pools, "counters": counters}
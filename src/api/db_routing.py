@@ -0,0 +1,71 @@
+"""
+Enrutamiento de lecturas a la réplica.
+
+Los GET de los blueprints de solo lectura usan el bind 'replica' (configurado con
+DATABASE_REPLICA_URL); todo lo demás, y cualquier flush, va al primario.
+
+Read-your-writes: después de una escritura exitosa se responde con el instante
+hasta el que ese cliente debe leer del primario (DB_STICKY_SECONDS), así quien
+acaba de escribir no ve datos atrasados por el lag de replicación. Va en el
+header X-DB-Primary-Until, que el cliente reenvía en sus requests (funciona con
+CORS origins="*", donde las cookies no viajan), y en una cookie para clientes
+del mismo origen.
+"""
+
+import os
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = "replica"
+READ_BLUEPRINTS = {"products", "orders", "analytics", "inventory"}
+READ_METHODS = {"GET", "HEAD"}
+STICKY_COOKIE = "db_primary_until"
+STICKY_HEADER = "X-DB-Primary-Until"
+STICKY_SECONDS = int(os.environ.get("DB_STICKY_SECONDS", 5))
+
+
+def use_replica():
+    """¿La request actual puede leer de la réplica?"""
+    if not has_request_context():
+        return False
+    if g.get("db_use_primary"):
+        return False
+    if request.method not in READ_METHODS or request.blueprint not in READ_BLUEPRINTS:
+        return False
+
+    now = time.time()
+    for value in (request.headers.get(STICKY_HEADER), request.cookies.get(STICKY_COOKIE)):
+        try:
+            primary_until = float(value or 0)
+        except ValueError:
+            continue
+        # Un valor más lejano que STICKY_SECONDS no lo emitió el servidor
+        if now < primary_until <= now + STICKY_SECONDS:
+            return False
+    return True
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and use_replica():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_read_routing(app):
+    """Marcar al cliente para leer del primario después de escribir"""
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            primary_until = str(time.time() + STICKY_SECONDS)
+            response.headers[STICKY_HEADER] = primary_until
+            response.set_cookie(
+                STICKY_COOKIE, primary_until,
+                max_age=STICKY_SECONDS, httponly=True, samesite="Lax")
+        return response
+
+    return app
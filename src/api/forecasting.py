@@ -0,0 +1,140 @@
+"""
+Pronóstico de demanda y cantidades de reposición para todo el inventario.
+
+Se arma una matriz (SKUs x días) con las unidades vendidas por día a partir de
+los movimientos de tipo 'sale' y se calcula, vectorizado para todos los SKUs:
+
+- demanda diaria por suavizado exponencial simple (un único producto matriz-vector)
+- desviación estándar de la demanda diaria
+- punto de reorden = demanda * lead_time + stock de seguridad, con
+  z * desviación * sqrt(lead_time + lead_time² * a / (2 - a)): el segundo
+  término es el error del propio pronóstico (varianza del suavizado), sin él
+  el nivel de servicio real queda ~10 puntos debajo del pedido
+- cantidad a pedir = hasta cubrir punto de reorden + período de revisión,
+  limitado por maximum_stock
+
+El pronóstico fija el nivel objetivo (order_up_to) y el punto de reorden; la
+cantidad a pedir depende del stock, así que al consultarla se recalcula con
+el stock del momento (reorder_status) en lugar de usar la del último lote.
+"""
+
+import math
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_ALPHA = 0.3
+DEFAULT_HISTORY_DAYS = 365
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_REVIEW_DAYS = 7
+DEFAULT_SERVICE_Z = 1.65  # ~95% de nivel de servicio
+
+
+def smoothing_weights(days, alpha=DEFAULT_ALPHA):
+    """
+    Pesos del suavizado exponencial con nivel inicial = primer día:
+    level = (1-a)^(T-1) * x0 + sum_{t>=1} a * (1-a)^(T-1-t) * x_t
+    """
+    exponents = np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights = alpha * (1 - alpha) ** exponents
+    weights[0] = (1 - alpha) ** (days - 1)
+    return weights
+
+
+def daily_sales_matrix(sales, n_rows, days, end_date):
+    """
+    sales: (filas, fechas datetime64[D], unidades) como arrays paralelos.
+    Devuelve una matriz float (n_rows, days) cuyo último día es end_date.
+    """
+    rows, dates, units = sales
+    matrix = np.zeros((n_rows, days), dtype=np.float64)
+    if not len(rows):
+        return matrix
+
+    start = np.datetime64(end_date) - np.timedelta64(days - 1, 'D')
+    day_idx = (dates.astype('datetime64[D]') - start).astype(np.int64)
+    in_range = (day_idx >= 0) & (day_idx < days)
+    np.add.at(matrix, (rows[in_range], day_idx[in_range]), units[in_range])
+    return matrix
+
+
+def forecast_demand(matrix, current_stock, maximum_stock, lead_time_days,
+                    alpha=DEFAULT_ALPHA, review_days=DEFAULT_REVIEW_DAYS,
+                    service_z=DEFAULT_SERVICE_Z):
+    """Calcular demanda, punto de reorden y cantidad a pedir para todos los SKUs"""
+    days = matrix.shape[1]
+    demand_rate = matrix @ smoothing_weights(days, alpha)
+    demand_std = matrix.std(axis=1)
+
+    lead_time = np.asarray(lead_time_days, dtype=np.float64)
+    forecast_variance = alpha / (2 - alpha)
+    safety_stock = service_z * demand_std * np.sqrt(lead_time + lead_time ** 2 * forecast_variance)
+    reorder_point = demand_rate * lead_time + safety_stock
+
+    order_up_to = np.minimum(reorder_point + demand_rate * review_days,
+                             maximum_stock)
+    reorder_quantity = np.maximum(np.ceil(order_up_to - current_stock), 0)
+
+    return {
+        "demand_rate": demand_rate,
+        "demand_std": demand_std,
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "order_up_to": order_up_to,
+        "reorder_quantity": reorder_quantity.astype(np.int64),
+        "needs_reorder": current_stock <= reorder_point
+    }
+
+
+def run_inventory_forecast(inventory_records, movement_log,
+                           history_days=DEFAULT_HISTORY_DAYS,
+                           alpha=DEFAULT_ALPHA, end_date=None):
+    """Ejecutar el pronóstico en lote sobre todo el inventario"""
+    end_date = end_date or datetime.utcnow().strftime("%Y-%m-%d")
+    records = list(inventory_records)
+    row_of = {inv['product_id']: i for i, inv in enumerate(records)}
+
+    rows, dates, units = [], [], []
+    for product_id, row in row_of.items():
+        for movement in movement_log.iter_movements(product_id):
+            if movement.type == 'sale':
+                rows.append(row)
+                dates.append(movement.date // 86400)  # días desde epoch
+                units.append(-movement.quantity)
+
+    matrix = daily_sales_matrix(
+        (np.array(rows, dtype=np.int64), np.array(dates, dtype='datetime64[D]'),
+         np.array(units, dtype=np.float64)),
+        len(records), history_days, end_date)
+
+    result = forecast_demand(
+        matrix,
+        np.array([inv['current_stock'] for inv in records], dtype=np.float64),
+        np.array([inv['maximum_stock'] for inv in records], dtype=np.float64),
+        np.array([inv.get('lead_time_days', DEFAULT_LEAD_TIME_DAYS)
+                  for inv in records], dtype=np.float64),
+        alpha=alpha)
+
+    generated_at = datetime.utcnow().isoformat()
+    forecasts = {}
+    for product_id, row in row_of.items():
+        forecasts[product_id] = {
+            "product_id": product_id,
+            "demand_rate": round(float(result['demand_rate'][row]), 3),
+            "demand_std": round(float(result['demand_std'][row]), 3),
+            "safety_stock": round(float(result['safety_stock'][row]), 2),
+            "reorder_point": round(float(result['reorder_point'][row]), 2),
+            "order_up_to": round(float(result['order_up_to'][row]), 2),
+            "reorder_quantity": int(result['reorder_quantity'][row]),
+            "needs_reorder": bool(result['needs_reorder'][row]),
+            "generated_at": generated_at
+        }
+    return forecasts
+
+
+def reorder_status(forecast, current_stock):
+    """Cantidad a pedir y si hace falta reponer, con el stock actual"""
+    return {
+        "reorder_quantity": max(math.ceil(forecast['order_up_to'] - current_stock), 0),
+        "needs_reorder": current_stock <= forecast['reorder_point']
+    }
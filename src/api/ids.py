@@ -0,0 +1,176 @@
+"""
+Ids k-ordenables estilo Snowflake, únicos entre workers sin coordinación.
+
+Un id es un entero de 53 bits (cabe exacto en un Number de JavaScript):
+
+    40 bits  milisegundos desde EPOCH_MS (alcanza hasta 2058)
+     5 bits  worker (0-31)
+     8 bits  secuencia dentro del milisegundo (256 ids/ms por worker)
+
+- Únicos entre procesos: cada proceso reclama un número de worker con un flock
+  sobre un archivo en /dev/shm (se libera solo cuando el proceso termina) o lo
+  recibe en ID_WORKER_ID. Con varios hosts, ID_WORKER_IDS=16-31 reparte rangos
+  disjuntos. Los hijos de un fork (gunicorn --preload) reclaman otro número.
+- Monótonos por worker: el reloj es time.monotonic anclado a la hora de
+  pared al arrancar, así un ajuste de NTP no hace retroceder los ids. Si la
+  secuencia se agota en un milisegundo se espera al siguiente.
+- Sin lock en el camino caliente: la ventana (milisegundo, prefijo, secuencia, fin)
+  es una tupla que se lee y reemplaza entera, y next() sobre itertools.count es
+  atómico. Solo el cambio de milisegundo (cada 256 ids como mucho) toma el lock.
+
+Los ids ordenan por momento de creación: ordenar por id es ordenar por fecha.
+"""
+
+import fcntl
+import itertools
+import os
+import tempfile
+import threading
+import time
+from time import monotonic_ns
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+TIME_BITS = 40
+WORKER_BITS = 5
+SEQUENCE_BITS = 8
+
+MAX_WORKERS = 1 << WORKER_BITS
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+WORKER_SHIFT = SEQUENCE_BITS
+TIME_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+LOCK_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _worker_range():
+    value = os.environ.get("ID_WORKER_IDS")
+    if not value:
+        return range(MAX_WORKERS)
+    first, _, last = value.partition("-")
+    return range(int(first), int(last or first) + 1)
+
+
+def claim_worker_id():
+    """
+    Reservar un número de worker libre en este host.
+    Devuelve (worker_id, fd); el flock dura lo que viva el fd.
+    """
+    lock_dir = os.environ.get("ID_WORKER_DIR", LOCK_DIR)
+    for worker_id in _worker_range():
+        path = os.path.join(lock_dir, f"ecommerce-id-worker-{os.getuid()}-{worker_id}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return worker_id, fd
+    raise RuntimeError(f"No hay números de worker libres para generar ids ({_worker_range()})")
+
+
+def parse_id(value):
+    """Descomponer un id en (epoch en ms, worker, secuencia)"""
+    return ((value >> TIME_SHIFT) + EPOCH_MS,
+            (value >> WORKER_SHIFT) & (MAX_WORKERS - 1),
+            value & SEQUENCE_MASK)
+
+
+class IdGenerator:
+    def __init__(self, worker_id=None):
+        """worker_id fijo (0-31); por defecto ID_WORKER_ID o uno reclamado con flock"""
+        self._fixed_worker = worker_id
+        self._fd = None
+        self._floor_ms = -1
+        self._reset()
+
+        # El hijo de un fork hereda el worker del padre: reclamar otro
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+        if self._fixed_worker is not None:
+            self.worker_id = self._fixed_worker
+        elif os.environ.get("ID_WORKER_ID"):
+            self.worker_id = int(os.environ["ID_WORKER_ID"])
+        else:
+            self.worker_id, self._fd = claim_worker_id()
+        if not 0 <= self.worker_id < MAX_WORKERS:
+            raise ValueError(f"worker_id debe estar entre 0 y {MAX_WORKERS - 1}")
+
+        self._offset_ns = time.time_ns() - time.monotonic_ns()
+        self._lock = threading.Lock()
+        self._window = (-1, 0, itertools.count(SEQUENCE_MASK + 1), 0)
+
+    def _now_ms(self):
+        return (monotonic_ns() + self._offset_ns) // 1_000_000 - EPOCH_MS
+
+    def next_id(self):
+        while True:
+            # ends_ns: reloj monotónico en que termina el milisegundo de la ventana
+            ms, prefix, sequence, ends_ns = self._window
+            seq = next(sequence)
+            if seq <= SEQUENCE_MASK and monotonic_ns() < ends_ns:
+                return prefix | seq
+            self._advance(ms)
+
+    __call__ = next_id
+
+    def _advance(self, stale_ms):
+        """Abrir la ventana del milisegundo siguiente (secuencia agotada o reloj avanzado)"""
+        with self._lock:
+            if self._window[0] != stale_ms:
+                return  # Otro hilo ya la abrió
+
+            now = self._now_ms()
+            while now == stale_ms:
+                # 256 ids en este milisegundo: dormir hasta el siguiente, sin
+                # girar en vacío (otros workers del host necesitan la CPU)
+                elapsed_ns = (monotonic_ns() + self._offset_ns) % 1_000_000
+                time.sleep((1_000_000 - elapsed_ns) / 1e9)
+                now = self._now_ms()
+            ms = max(now, stale_ms + 1, self._floor_ms + 1)
+            if ms >> TIME_BITS:
+                raise OverflowError("El reloj superó el rango de los ids")
+            prefix = (ms << TIME_SHIFT) | (self.worker_id << WORKER_SHIFT)
+            ends_ns = (ms + 1 + EPOCH_MS) * 1_000_000 - self._offset_ns
+            self._window = (ms, prefix, itertools.count(), ends_ns)
+
+    def reserve(self, count):
+        """
+        count ids crecientes de una vez, para cargas masivas. Ocupa
+        count / 256 milisegundos a partir de ahora: los ids siguientes quedan
+        adelantados al reloj hasta que este los alcance (~4 s por millón).
+        """
+        windows = -(-count // (SEQUENCE_MASK + 1))
+        with self._lock:
+            first = max(self._now_ms(), self._window[0] + 1, self._floor_ms + 1)
+            if (first + windows) >> TIME_BITS:
+                raise OverflowError("El reloj superó el rango de los ids")
+            self._floor_ms = first + windows - 1
+            self._window = (-1, 0, itertools.count(SEQUENCE_MASK + 1), 0)
+        worker = self.worker_id << WORKER_SHIFT
+        sequences = range(SEQUENCE_MASK + 1)
+        reserved = [((ms << TIME_SHIFT) | worker | seq)
+                    for ms in range(first, first + windows) for seq in sequences]
+        del reserved[count:]
+        return reserved
+
+    def advance_past(self, value):
+        """
+        No volver a emitir ids del milisegundo de value ni anteriores.
+        Para los ids recuperados del WAL, por si el reloj del host retrocedió.
+        """
+        with self._lock:
+            if value >> TIME_SHIFT > self._floor_ms:
+                self._floor_ms = value >> TIME_SHIFT
+                self._window = (-1, 0, itertools.count(SEQUENCE_MASK + 1), 0)
+
+
+# Generador del proceso, compartido por órdenes, cotizaciones, carritos e inventario
+ids = IdGenerator()
+next_id = ids.next_id
+reserve_ids = ids.reserve
+advance_past = ids.advance_past
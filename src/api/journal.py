@@ -0,0 +1,429 @@
+"""
+Durabilidad opcional para los almacenes en memoria: WAL + snapshots.
+
+Cada mutación se registra como un upsert físico (almacén, clave, valor) —
+valor None borra la clave—, así reaplicar un registro dos veces no cambia el
+resultado y los snapshots no necesitan frenar las escrituras.
+
+- WAL: segmentos append-only `wal-<lsn>.log` con registros enmarcados
+  (largo, crc32, pickle). Un hilo escritor agrupa los registros pendientes y
+  hace un solo fsync por lote (group commit). Con WAL_SYNC=batch quien
+  registra espera a que su lote esté en disco; con WAL_SYNC=none no espera.
+- Snapshots: cada SNAPSHOT_EVERY registros se abre un segmento nuevo en el
+  lsn L y se vuelca el estado completo a `snapshot-<L>.bin` (tmp + fsync +
+  rename). Después se borran los segmentos y snapshots anteriores a L. El
+  volcado corre en un hilo sobre una copia de cada almacén, serializada por
+  tramos para no retener el GIL todo el volcado; lo que cambie mientras tanto
+  queda también en el segmento desde L, que se reaplica encima.
+- Recuperación: se carga el último snapshot válido y se reaplican los
+  segmentos desde su lsn; un registro final cortado o corrupto se descarta.
+- Errores: si una escritura o fsync del WAL falla, quienes esperaban ese lote
+  reciben JournalWriteError (no se dan por durables) y el lote se descarta
+  del segmento.
+
+Se activa con DURABILITY_DIR. El estado es por proceso: un lock sobre el
+directorio impide que dos workers escriban el mismo WAL (usar -w 1).
+"""
+
+import fcntl
+import gc
+import glob
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+FRAME = struct.Struct("<II")  # largo del payload, crc32
+WAL_SYNC_MODES = ["batch", "none"]
+SNAPSHOT_CHUNK = 10000        # entradas por pickle en el snapshot
+MAX_FAILED_BATCHES = 100
+
+
+class JournalWriteError(Exception):
+    """El lote que contenía el registro no llegó a disco"""
+
+
+def _lsn_of(path):
+    return int(os.path.basename(path).split("-")[1].split(".")[0])
+
+
+class Journal:
+    def __init__(self, directory=None, sync=None, snapshot_every=None, fsync_window=None):
+        self.directory = directory
+        self.sync = sync or os.environ.get("WAL_SYNC", "batch")
+        if self.sync not in WAL_SYNC_MODES:
+            raise ValueError(f"WAL_SYNC inválido. Opciones: {WAL_SYNC_MODES}")
+        self.snapshot_every = snapshot_every or int(os.environ.get("SNAPSHOT_EVERY", 1000000))
+        # Espera máxima para juntar más registros en el mismo fsync
+        self.fsync_window = fsync_window if fsync_window is not None else \
+            float(os.environ.get("WAL_FSYNC_MS", 2)) / 1000
+        self.recovered = False
+        self.stats = {"records": 0, "batches": 0, "failed_batches": 0, "snapshots": 0,
+                      "recovered_records": 0, "recovery_seconds": 0.0}
+
+        self._stores = {}
+        self._pending = []
+        self._appended = 0   # registros encolados
+        self._durable = 0    # registros ya procesados por el escritor
+        self._failed = []    # lotes que no llegaron a disco: (desde, hasta, error)
+        self._cond = threading.Condition()
+        self._durable_cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._file = None
+        self._lock_file = None
+        self._lsn = 0
+        self._since_snapshot = 0
+        self._snapshot_thread = None
+        self._deferred = threading.local()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._lock_file = open(os.path.join(directory, "LOCK"), "w")
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                print(f"⚠️  {directory} ya está en uso por otro proceso: WAL desactivado")
+                self._lock_file.close()
+                self._lock_file = None
+                self.directory = None
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def register(self, name, dump, load):
+        """
+        dump() -> {clave: valor} con el estado completo del almacén;
+        load({clave: valor}) lo reconstruye al arrancar.
+        """
+        self._stores[name] = (dump, load)
+
+    # Escritura
+    def record(self, store, key, value):
+        """Registrar el estado nuevo de una clave (None = borrada)"""
+        self.record_many(store, [(key, value)])
+
+    def record_many(self, store, entries):
+        """Registrar varias claves (clave, valor) con una sola espera al disco"""
+        if not self.enabled:
+            return
+
+        with self._cond:
+            # Serializar dentro del lock: el orden del WAL es el orden en que se
+            # leyó cada valor, así el último registro de una clave es el más nuevo
+            count = 0
+            for key, value in entries:
+                payload = pickle.dumps((store, key, value), protocol=pickle.HIGHEST_PROTOCOL)
+                self._pending.append(FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+                count += 1
+            if not count:
+                return
+            if self._file is None:
+                self._open_segment(self._lsn)
+            self._appended += count
+            target = self._appended
+            self._cond.notify()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop,
+                                                name="journal-writer", daemon=True)
+                self._writer.start()
+
+        if self.sync == "batch":
+            if getattr(self._deferred, "target", None) is not None:
+                self._deferred.target = target
+            else:
+                self._wait_durable(target)
+
+    @contextmanager
+    def deferred_sync(self):
+        """
+        Dentro del bloque record() no espera al disco: se espera una sola vez
+        al salir, por todo lo registrado en el bloque. Sirve para no retener
+        un lock durante el fsync (tomar el lock dentro del bloque).
+        """
+        if getattr(self._deferred, "target", None) is not None:
+            yield  # ya dentro de otro bloque: espera el de afuera
+            return
+        self._deferred.target = 0
+        try:
+            yield
+        finally:
+            target, self._deferred.target = self._deferred.target, None
+        if target:
+            self._wait_durable(target)
+
+    def _wait_durable(self, target):
+        with self._durable_cond:
+            while self._durable < target:
+                self._durable_cond.wait()
+            for first, last, error in self._failed:
+                if first < target <= last:
+                    raise JournalWriteError(f"No se pudo escribir el WAL: {error}") from error
+
+    def _open_segment(self, lsn):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"wal-{lsn:020d}.log")
+        self._file = open(path, "ab")
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Ventana corta para que más registros entren en el mismo fsync
+            if self.fsync_window:
+                time.sleep(self.fsync_window)
+
+            with self._write_lock:
+                with self._cond:
+                    frames, self._pending = self._pending, []
+                    wal = self._file
+
+                position = wal.tell()
+                error = None
+                try:
+                    wal.write(b"".join(frames))
+                    wal.flush()
+                    os.fsync(wal.fileno())
+                except OSError as e:
+                    error = e
+                    print(f"⚠️  Error escribiendo el WAL: {e}")
+                    self._discard_failed_write(wal, position)
+
+                with self._durable_cond:
+                    if error is not None:
+                        self._failed.append((self._durable, self._durable + len(frames), error))
+                        del self._failed[:-MAX_FAILED_BATCHES]
+                    self._durable += len(frames)
+                    self._durable_cond.notify_all()
+
+                if error is None:
+                    self._lsn += len(frames)
+                    self._since_snapshot += len(frames)
+                    self.stats["records"] += len(frames)
+                    self.stats["batches"] += 1
+                else:
+                    self.stats["failed_batches"] += 1
+
+            if self._since_snapshot >= self.snapshot_every and not self._snapshot_running():
+                self._start_snapshot()
+
+    def _discard_failed_write(self, wal, position):
+        """
+        Sacar del segmento lo que haya quedado del lote fallido y seguir
+        escribiendo detrás del último lote bueno (sin un registro cortado en
+        el medio, que cortaría la recuperación ahí).
+        """
+        try:
+            wal.close()
+        except OSError:
+            pass  # el buffer con el lote fallido no se pudo vaciar
+        try:
+            os.truncate(wal.name, position)
+        except OSError as e:
+            print(f"⚠️  No se pudo recortar el segmento {wal.name}: {e}")
+        with self._cond:
+            self._file = open(wal.name, "ab")
+
+    def flush(self):
+        """Esperar a que todo lo registrado hasta ahora esté en disco"""
+        with self._cond:
+            target = self._appended
+        self._wait_durable(target)
+
+    def close(self):
+        """Bajar a disco lo pendiente y liberar el directorio"""
+        if not self.enabled:
+            return
+        try:
+            self.flush()
+        except JournalWriteError as e:
+            print(f"⚠️  Cerrando el WAL con registros sin escribir: {e}")
+        if self._snapshot_running():
+            self._snapshot_thread.join()
+        with self._write_lock, self._cond:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self._lock_file.close()
+        self._lock_file = None
+        self.directory = None
+
+    # Snapshots
+    def _snapshot_running(self):
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def _start_snapshot(self):
+        # Entre lotes: lo ya escrito queda antes de L y lo pendiente va al
+        # segmento nuevo, que se reaplica sobre el snapshot
+        with self._write_lock, self._cond:
+            lsn = self._lsn
+            self._open_segment(lsn)
+            self._since_snapshot = 0
+        self._snapshot_thread = threading.Thread(
+            target=self._write_snapshot, args=(lsn,), name="journal-snapshot", daemon=True)
+        self._snapshot_thread.start()
+
+    def snapshot(self):
+        """Forzar un snapshot ahora (bloquea hasta terminarlo)"""
+        if not self.enabled:
+            return None
+        self.flush()
+        if self._snapshot_running():
+            self._snapshot_thread.join()
+        self._start_snapshot()
+        self._snapshot_thread.join()
+        return self._lsn
+
+    def _write_snapshot(self, lsn):
+        path = os.path.join(self.directory, f"snapshot-{lsn:020d}.bin")
+        try:
+            self._dump_snapshot(path, lsn)
+        except Exception as e:
+            print(f"⚠️  Falló el snapshot en lsn {lsn}: se conserva el anterior ({e})")
+            return
+        self._fsync_directory()
+        self.stats["snapshots"] += 1
+
+        for old in glob.glob(os.path.join(self.directory, "snapshot-*.bin")):
+            if _lsn_of(old) < lsn:
+                os.remove(old)
+        for old in glob.glob(os.path.join(self.directory, "wal-*.log")):
+            if _lsn_of(old) < lsn:
+                os.remove(old)
+
+    @staticmethod
+    def _pickle_chunk(name, items):
+        # Un valor mutable que otro hilo cambia mientras se serializa puede
+        # fallar con RuntimeError: se reintenta (la versión nueva también está
+        # en el WAL desde L)
+        for attempt in range(3):
+            try:
+                return pickle.dumps((name, dict(items)), protocol=pickle.HIGHEST_PROTOCOL)
+            except RuntimeError:
+                if attempt == 2:
+                    raise
+
+    def _dump_snapshot(self, path, lsn):
+        """
+        Archivo: una cabecera {"lsn"} y después pickles (almacén, {clave: valor})
+        de hasta SNAPSHOT_CHUNK entradas, terminado en None. dump() devuelve una
+        copia del almacén; cada tramo se serializa por separado, así los hilos
+        de los requests corren entre tramo y tramo.
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(pickle.dumps({"lsn": lsn, "chunked": True}))
+            for name, (dump, _) in self._stores.items():
+                items = list(dump().items())
+                for start in range(0, len(items), SNAPSHOT_CHUNK):
+                    f.write(self._pickle_chunk(name, items[start:start + SNAPSHOT_CHUNK]))
+            f.write(pickle.dumps(None))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _load_snapshot(path):
+        """(lsn, {almacén: {clave: valor}}); lanza si el archivo está incompleto"""
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if "stores" in header:
+                return header["lsn"], header["stores"]  # formato anterior: un solo pickle
+            stores = {}
+            while True:
+                chunk = pickle.load(f)
+                if chunk is None:
+                    return header["lsn"], stores
+                name, entries = chunk
+                stores.setdefault(name, {}).update(entries)
+
+    def _fsync_directory(self):
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # Recuperación
+    def recover(self):
+        """Cargar el último snapshot, reaplicar el WAL y entregar el estado a cada almacén"""
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        # Millones de objetos nuevos disparan el GC cíclico una y otra vez
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._recover(started)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _recover(self, started):
+
+        state = {name: {} for name in self._stores}
+        snapshot_lsn = 0
+        for path in sorted(glob.glob(os.path.join(self.directory, "snapshot-*.bin")), reverse=True):
+            try:
+                snapshot_lsn, stores = self._load_snapshot(path)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue  # snapshot incompleto: probar el anterior
+            for name, entries in stores.items():
+                state.setdefault(name, {}).update(entries)
+            break
+
+        replayed = 0
+        segments = sorted(p for p in glob.glob(os.path.join(self.directory, "wal-*.log"))
+                          if _lsn_of(p) >= snapshot_lsn)
+        for path in segments:
+            replayed += self._replay_segment(path, state)
+
+        for name, (_, load) in self._stores.items():
+            load(state.get(name, {}))
+
+        self._lsn = snapshot_lsn + replayed
+        self.recovered = True
+        # Escribir siempre en un segmento nuevo, nunca detrás de una cola dañada
+        with self._cond:
+            self._open_segment(self._lsn)
+
+        self.stats["recovered_records"] = replayed
+        self.stats["recovery_seconds"] = round(time.perf_counter() - started, 3)
+        return {"snapshot_lsn": snapshot_lsn, "replayed": replayed,
+                "seconds": self.stats["recovery_seconds"]}
+
+    @staticmethod
+    def _replay_segment(path, state):
+        count = 0
+        with open(path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        while offset + FRAME.size <= len(data):
+            length, crc = FRAME.unpack_from(data, offset)
+            start = offset + FRAME.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break  # registro final cortado (caída a mitad de escritura)
+            store, key, value = pickle.loads(payload)
+            entries = state.setdefault(store, {})
+            if value is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = value
+            offset = start + length
+            count += 1
+
+        if offset < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return count
+
+
+journal = Journal(os.environ.get("DURABILITY_DIR"))
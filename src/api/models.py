@@ -1,9 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Boolean, Float, Integer, Text, DateTime
+from sqlalchemy import String, Boolean, Float, Integer, Text, DateTime, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
+from .db_routing import RoutingSession
 
-db = SQLAlchemy()
+# Las lecturas de solo lectura pueden ir a la réplica (ver db_routing.py)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
@@ -22,6 +24,11 @@ class User(db.Model):
     quotes = db.relationship('Quote', backref='customer', lazy=True)
     orders = db.relationship('Order', backref='customer', lazy=True)
 
+    # Búsqueda por prefijo de email en el admin (LIKE 'x%' en Postgres)
+    __table_args__ = (
+        db.Index('ix_users_email_pattern', 'email', postgresql_ops={'email': 'text_pattern_ops'}),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -42,10 +49,18 @@ class Product(db.Model):
     category: Mapped[str] = mapped_column(String(50), nullable=False)
     stock: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     image_url: Mapped[str] = mapped_column(String(200), nullable=True)
+    business_id: Mapped[int] = mapped_column(
+        ForeignKey('businesses.id'), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean(), default=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow)
 
+    # Búsqueda por prefijo de nombre y filtro por categoría en el admin
+    __table_args__ = (
+        db.Index('ix_product_name_pattern', 'name', postgresql_ops={'name': 'text_pattern_ops'}),
+        db.Index('ix_product_category_id', 'category', 'id'),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -61,7 +76,8 @@ class Product(db.Model):
 
 class Cart(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id'), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -77,13 +93,21 @@ class CartItem(db.Model):
 
 class Order(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id'), nullable=False)
     total_amount: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String(50), default='pending')
     stripe_payment_id: Mapped[str] = mapped_column(String(100), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow)
 
+    # Listados paginados por id (keyset) filtrando por estado o cliente, u ordenados por fecha
+    __table_args__ = (
+        db.Index('ix_order_status_id', 'status', 'id'),
+        db.Index('ix_order_user_id_id', 'user_id', 'id'),
+        db.Index('ix_order_created_at_id', 'created_at', 'id'),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -96,7 +120,7 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
-    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     product_id: Mapped[int] = mapped_column(Integer, nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     price: Mapped[float] = mapped_column(Float, nullable=False)
@@ -116,4 +140,37 @@ class Business(db.Model):
     # Relaciones (nuevas)
     products = db.relationship('Product', backref='business', lazy=True)
     quotes = db.relationship('Quote', backref='business', lazy=True)
-    analytics = db.relationship('Analytics', backref='business', lazy=True)
+
+
+class Quote(db.Model):
+    __tablename__ = 'quotes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    business_id = db.Column(db.Integer, db.ForeignKey('businesses.id'), nullable=False)
+    items = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    total_price = db.Column(db.Float, nullable=False, default=0)
+    order_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Índices para listar por cliente/negocio (+ estado) paginando por id
+    __table_args__ = (
+        db.Index('ix_quotes_customer_status_id', 'customer_id', 'status', 'id'),
+        db.Index('ix_quotes_business_status_id', 'business_id', 'status', 'id'),
+        db.Index('ix_quotes_status_id', 'status', 'id'),
+    )
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "customer_id": self.customer_id,
+            "business_id": self.business_id,
+            "items": self.items,
+            "status": self.status,
+            "total_price": self.total_price,
+            "order_id": self.order_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
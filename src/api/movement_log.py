@@ -0,0 +1,180 @@
+"""
+Log de movimientos de inventario, append-only y acotado en memoria por SKU.
+
+Los movimientos se guardan en segmentos de tamaño fijo, separados del registro
+de inventario. Cuando un SKU supera MAX_SEGMENTS en memoria se compacta: los
+segmentos más antiguos se escriben a disco (un archivo por segmento) y se
+guarda un snapshot con el stock al final de lo archivado, de modo que
+snapshot + movimientos en memoria reproducen current_stock. El historial
+completo sigue disponible: page() lee los segmentos archivados cuando el
+cursor llega a ellos.
+
+Los archivos van a un directorio propio del proceso, dentro de
+INVENTORY_LOG_DIR (o del directorio temporal del sistema).
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+from collections import deque
+
+from .records import to_iso
+
+SEGMENT_SIZE = int(os.environ.get("INVENTORY_SEGMENT_SIZE", 1000))
+MAX_SEGMENTS = int(os.environ.get("INVENTORY_MAX_SEGMENTS", 10))
+
+
+class _SkuLog:
+    __slots__ = ("segments", "base_seq", "next_seq", "snapshot")
+
+    def __init__(self):
+        self.segments = deque()
+        self.base_seq = 1      # seq del primer movimiento en memoria
+        self.next_seq = 1
+        self.snapshot = {"seq": 0, "stock": 0, "date": None}
+
+
+class MovementLog:
+    def __init__(self, segment_size=SEGMENT_SIZE, max_segments=MAX_SEGMENTS, directory=None):
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self._parent_dir = directory or os.environ.get("INVENTORY_LOG_DIR") or None
+        self._directory = None
+        self._skus = {}
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        """Directorio de segmentos archivados (se crea con la primera compactación)"""
+        if self._directory is None:
+            if self._parent_dir:
+                os.makedirs(self._parent_dir, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix="movements-", dir=self._parent_dir)
+        return self._directory
+
+    def append(self, product_id, movement):
+        """Agregar un Movement y devolverlo con su id (seq por SKU)"""
+        with self._lock:
+            log = self._skus.get(product_id)
+            if log is None:
+                log = self._skus[product_id] = _SkuLog()
+
+            movement.id = log.next_seq
+            log.next_seq += 1
+
+            if not log.segments or len(log.segments[-1]) >= self.segment_size:
+                log.segments.append([])
+            log.segments[-1].append(movement)
+
+            if len(log.segments) > self.max_segments:
+                self._compact(product_id, log)
+
+            return movement
+
+    def _segment_path(self, product_id, number):
+        return os.path.join(self.directory, f"{product_id}-{number:08d}.seg")
+
+    def _compact(self, product_id, log):
+        while len(log.segments) > self.max_segments:
+            # Los segmentos que salen de memoria están completos: el número
+            # de segmento sale del seq de su primer movimiento
+            segment = log.segments[0]
+            path = self._segment_path(product_id, (log.base_seq - 1) // self.segment_size)
+            with open(path + ".tmp", "wb") as f:
+                pickle.dump(segment, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + ".tmp", path)
+
+            log.segments.popleft()
+            last = segment[-1]
+            log.snapshot = {
+                "seq": last.id,
+                "stock": last.new_stock,
+                "date": last.date
+            }
+            log.base_seq += len(segment)
+
+    def _read_segment(self, product_id, number):
+        with open(self._segment_path(product_id, number), "rb") as f:
+            return pickle.load(f)
+
+    def compact(self, product_id=None):
+        """Forzar compactación (de un SKU o de todos)"""
+        with self._lock:
+            if product_id is None:
+                logs = list(self._skus.items())
+            else:
+                logs = [(product_id, self._skus[product_id])] if product_id in self._skus else []
+            for sku, log in logs:
+                self._compact(sku, log)
+
+    def count(self, product_id):
+        """Movimientos registrados de un SKU (en memoria y archivados)"""
+        log = self._skus.get(product_id)
+        return log.next_seq - 1 if log else 0
+
+    def retained(self, product_id):
+        """Movimientos de un SKU que siguen en memoria"""
+        log = self._skus.get(product_id)
+        return log.next_seq - log.base_seq if log else 0
+
+    def snapshot(self, product_id):
+        log = self._skus.get(product_id)
+        if log is None:
+            return None
+        return {**log.snapshot, "date": to_iso(log.snapshot["date"])}
+
+    def page(self, product_id, before=None, limit=50):
+        """
+        Movimientos más recientes primero. `before` es un cursor (id de
+        movimiento); devuelve (movimientos, siguiente_cursor).
+        """
+        with self._lock:
+            log = self._skus.get(product_id)
+            if log is None or limit <= 0:
+                return [], None
+
+            end = log.next_seq if before is None else min(before, log.next_seq)
+            start = max(1, end - limit)
+            if start >= end:
+                return [], None
+
+            items = []
+            archived = {}
+            seq = end - 1
+            while seq >= start:
+                if seq >= log.base_seq:
+                    offset = seq - log.base_seq
+                    segment = log.segments[offset // self.segment_size]
+                    items.append(segment[offset % self.segment_size])
+                else:
+                    number, offset = divmod(seq - 1, self.segment_size)
+                    if number not in archived:
+                        archived[number] = self._read_segment(product_id, number)
+                    items.append(archived[number][offset])
+                seq -= 1
+
+            next_cursor = start if start > 1 else None
+            return items, next_cursor
+
+    def product_ids(self):
+        return list(self._skus)
+
+    def iter_movements(self, product_id):
+        """Movimientos en memoria de un SKU, del más antiguo al más reciente"""
+        log = self._skus.get(product_id)
+        if log is None:
+            return
+        for segment in list(log.segments):
+            yield from segment
+
+    def replay(self, product_id):
+        """Recalcular el stock desde el snapshot y los movimientos en memoria"""
+        log = self._skus.get(product_id)
+        if log is None:
+            return None
+        stock = log.snapshot["stock"]
+        for segment in log.segments:
+            for movement in segment:
+                stock += movement.quantity
+        return stock
@@ -0,0 +1,182 @@
+"""
+Máquina de estados de las órdenes.
+
+- Transiciones permitidas: cambiar a un estado fuera de la tabla lanza
+  InvalidTransition, así "entregado -> procesando" o cancelar una orden ya
+  enviada no pasan.
+- Índices por estado: estado -> {order_id: orden}, mantenidos en la misma
+  operación que la transición. Listar las órdenes de un estado es O(k) y
+  buscar una orden por id es O(cantidad de estados), sin recorrer orders_db.
+- Stream de eventos: cada transición agrega un evento con seq creciente a un
+  buffer acotado. Los consumidores (analytics, notificaciones) leen desde su
+  último seq con events_after() o se suscriben con subscribe(); nunca
+  recorren todas las órdenes. El stream vive en memoria: stream_id cambia al
+  reiniciar el proceso para que un consumidor sepa que debe reconstruir su
+  estado desde counts().
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from .records import now_epoch, to_iso
+
+MAX_EVENTS = int(os.environ.get("ORDER_EVENTS_MAX", 100000))
+
+# Estados posibles de órdenes y a cuáles puede pasar cada uno; la API en
+# memoria, los datos de ejemplo y el admin usan esta misma lista
+ORDER_TRANSITIONS = {
+    "pending_payment": ["processing", "cancelled"],  # Pendiente de pago
+    "processing": ["shipped", "cancelled"],          # Procesando
+    "shipped": ["delivered"],                        # Enviado
+    "delivered": [],                                 # Entregado
+    "cancelled": []                                  # Cancelado
+}
+ORDER_STATUSES = list(ORDER_TRANSITIONS)
+# Nombres anteriores de un estado (órdenes guardadas antes del cambio)
+ORDER_STATUS_ALIASES = {"pending": "pending_payment"}
+
+
+class InvalidTransition(Exception):
+    def __init__(self, current, target, allowed):
+        Exception.__init__(self, f"Transición inválida: {current} -> {target}")
+        self.current = current
+        self.target = target
+        self.allowed = allowed
+
+
+class TransitionEvent:
+    __slots__ = ("seq", "order_id", "from_status", "to_status", "at")
+
+    def __init__(self, seq, order_id, from_status, to_status, at):
+        self.seq = seq
+        self.order_id = order_id
+        self.from_status = from_status
+        self.to_status = to_status
+        self.at = at
+
+    def serialize(self):
+        return {
+            "seq": self.seq,
+            "order_id": self.order_id,
+            "from": self.from_status,
+            "to": self.to_status,
+            "at": to_iso(self.at)
+        }
+
+
+class OrderStateMachine:
+    def __init__(self, transitions, aliases=None, max_events=MAX_EVENTS):
+        """
+        transitions: {estado: [estados a los que puede pasar]}
+        aliases: {estado viejo: estado actual} para órdenes guardadas antes
+        """
+        self.transitions = {status: tuple(targets) for status, targets in transitions.items()}
+        self.aliases = aliases or {}
+        self.stream_id = f"{os.getpid()}-{int(time.time() * 1000)}"
+        self._by_status = {status: {} for status in self.transitions}
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @property
+    def statuses(self):
+        return list(self.transitions)
+
+    def allowed(self, status):
+        return list(self.transitions.get(status, ()))
+
+    # Índices
+    def _normalize(self, order):
+        status = self.aliases.get(order.status)
+        if status is not None:
+            order.set_status(status, order.updated_at)
+        if order.status not in self._by_status:
+            raise InvalidTransition(None, order.status, self.statuses)
+
+    def load(self, orders):
+        """Indexar órdenes existentes (WAL, datos de ejemplo) sin emitir eventos"""
+        with self._lock:
+            for order in orders:
+                self._normalize(order)
+                self._by_status[order.status][order.id] = order
+
+    def clear(self):
+        with self._lock:
+            for index in self._by_status.values():
+                index.clear()
+
+    def get(self, order_id):
+        for index in self._by_status.values():
+            order = index.get(order_id)
+            if order is not None:
+                return order
+        return None
+
+    def orders(self, status):
+        """Órdenes en un estado, en el orden en que llegaron a él"""
+        return list(self._by_status.get(status, {}).values())
+
+    def counts(self):
+        return {status: len(index) for status, index in self._by_status.items()}
+
+    # Transiciones
+    def add(self, order):
+        """Registrar una orden nueva (evento con from = None)"""
+        with self._lock:
+            self._normalize(order)
+            self._by_status[order.status][order.id] = order
+            event = self._emit(order.id, None, order.status, order.created_at)
+        self._notify(event)
+        return event
+
+    def transition(self, order, status, now=None):
+        """Pasar la orden a status si la tabla lo permite; devuelve el evento"""
+        with self._lock:
+            current = order.status
+            if status not in self.transitions.get(current, ()):
+                raise InvalidTransition(current, status, self.allowed(current))
+
+            order.set_status(status, now or now_epoch())
+            del self._by_status[current][order.id]
+            self._by_status[status][order.id] = order
+            event = self._emit(order.id, current, status, order.updated_at)
+        self._notify(event)
+        return event
+
+    def _emit(self, order_id, from_status, to_status, at):
+        self._seq += 1
+        event = TransitionEvent(self._seq, order_id, from_status, to_status, at)
+        self._events.append(event)
+        return event
+
+    # Stream
+    def subscribe(self, callback):
+        """Registrar una función que recibe cada TransitionEvent (el orden global lo da seq)"""
+        self._subscribers.append(callback)
+
+    def _notify(self, event):
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️  Error en suscriptor de estados de órdenes: {e}")
+
+    def events_after(self, seq=0, limit=100):
+        """
+        Eventos con seq > seq (hasta limit). truncated indica que el buffer ya
+        descartó eventos posteriores a seq y el consumidor perdió algunos.
+        """
+        with self._lock:
+            # Los seq del buffer son consecutivos: la posición sale del primero
+            first = self._events[0].seq if self._events else self._seq + 1
+            start = max(seq + 1 - first, 0)
+            page = list(islice(self._events, start, start + limit))
+        return {
+            "events": page,
+            "next_cursor": page[-1].seq if page else seq,
+            "truncated": seq + 1 < first
+        }
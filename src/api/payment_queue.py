@@ -0,0 +1,311 @@
+"""
+Cola de pagos asíncrona.
+
+`create-payment` encola un trabajo y responde 202 de inmediato; hilos de
+trabajo llaman a la pasarela, reintentan los fallos transitorios con backoff
+exponencial y entregan el resultado como evento de webhook. Una cache de
+claves de idempotencia evita cobrar dos veces la misma solicitud, y una orden
+con un pago en curso o aprobado no admite otro (con o sin clave).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+PAYMENT_WORKERS = int(os.environ.get("PAYMENT_WORKERS", 8))
+MAX_ATTEMPTS = int(os.environ.get("PAYMENT_MAX_ATTEMPTS", 5))
+BACKOFF_BASE_SECONDS = float(os.environ.get("PAYMENT_BACKOFF_BASE", 0.5))
+BACKOFF_MAX_SECONDS = 30.0
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+IDEMPOTENCY_MAX_KEYS = 100000
+MAX_JOBS = 100000
+
+
+class GatewayError(Exception):
+    """Fallo transitorio de la pasarela (timeout, 5xx): se puede reintentar"""
+
+
+class PaymentInProgress(ValueError):
+    """La orden ya tiene un pago en curso o aprobado"""
+
+    def __init__(self, job):
+        super().__init__("La orden ya tiene un pago en curso o completado")
+        self.job = job
+
+
+class SimulatedGateway:
+    """Pasarela local que simula latencia, rechazos y fallos transitorios"""
+
+    def __init__(self, latency_ms=None, decline_rate=0.1, error_rate=0.1):
+        self.latency_ms = latency_ms if latency_ms is not None else \
+            float(os.environ.get("PAYMENT_GATEWAY_LATENCY_MS", 200))
+        self.decline_rate = decline_rate
+        self.error_rate = error_rate
+
+    def _latency(self):
+        return random.uniform(0.5, 1.5) * self.latency_ms / 1000
+
+    def charge(self, payment):
+        if self.latency_ms:
+            time.sleep(self._latency())
+        return self._outcome()
+
+    async def charge_async(self, payment):
+        """Misma pasarela, esperando la latencia sin bloquear el event loop"""
+        if self.latency_ms:
+            await asyncio.sleep(self._latency())
+        return self._outcome()
+
+    def _outcome(self):
+        roll = random.random()
+        if roll < self.error_rate:
+            raise GatewayError("Timeout de la pasarela")
+        if roll < self.error_rate + self.decline_rate:
+            return {"status": "failed", "transaction_id": None,
+                    "decline_reason": "Fondos insuficientes"}
+        return {"status": "completed",
+                "transaction_id": f"TXN{random.randint(1000000000, 9999999999)}"}
+
+
+class IdempotencyCache:
+    """
+    Cache LRU acotada de clave de idempotencia -> (huella del payload, job).
+    Guarda el trabajo mismo y no solo su id: una clave repetida devuelve el
+    resultado aunque el trabajo ya se haya descartado de PaymentQueue.jobs.
+    """
+
+    def __init__(self, max_keys=IDEMPOTENCY_MAX_KEYS, ttl=IDEMPOTENCY_TTL_SECONDS):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(payload):
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Trabajo registrado con la clave (o None si no existe o expiró)"""
+        entry = self.entry(key)
+        return entry[1] if entry is not None else None
+
+    def entry(self, key):
+        """(huella, job) registrados con la clave (o None si no existe o expiró)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                return None
+            return entry[0], entry[1]
+
+    def get_or_set(self, key, fingerprint, job):
+        """Devuelve la entrada existente (fingerprint, job) o registra la nueva y devuelve None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+
+            self._entries[key] = (fingerprint, job, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            return None
+
+
+class PaymentQueue:
+    def __init__(self, gateway=None, deliver=None, workers=PAYMENT_WORKERS):
+        self.gateway = gateway or SimulatedGateway()
+        self.deliver = deliver
+        self.workers = workers
+        self.jobs = OrderedDict()
+        self.idempotency = IdempotencyCache()
+        # Último trabajo no fallido de cada orden (en curso o completado)
+        self.order_jobs = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._done = {}
+        self._pid = None
+
+    def _ensure_workers(self):
+        # Los hilos no sobreviven a un fork (gunicorn --preload): se arrancan
+        # de forma perezosa en cada proceso
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"payment-worker-{i}",
+                                 daemon=True).start()
+
+    def submit(self, payment, idempotency_key=None):
+        """Encolar un pago. Devuelve (job, es_nuevo)"""
+        job, created = self._create_job(payment, idempotency_key)
+        if created:
+            self._ensure_workers()
+            self._queue.put(job['job_id'])
+        return job, created
+
+    async def submit_async(self, payment, idempotency_key=None):
+        """
+        Procesar un pago dentro del event loop (ASGI): la espera a la pasarela
+        no ocupa un hilo. Devuelve (job, es_nuevo) con el resultado final.
+        """
+        job, created = self._create_job(payment, idempotency_key)
+        if not created:
+            return job, created
+
+        while True:
+            job['status'] = "processing"
+            job['attempts'] += 1
+            try:
+                result = await self.gateway.charge_async(job['payment'])
+            except GatewayError as e:
+                job['last_error'] = str(e)
+                if job['attempts'] < MAX_ATTEMPTS:
+                    job['status'] = "retrying"
+                    await asyncio.sleep(self._backoff_delay(job['attempts']))
+                    continue
+                result = {"status": "failed", "transaction_id": None,
+                          "decline_reason": str(e)}
+            break
+
+        # La entrega del webhook puede ser HTTP bloqueante: fuera del loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._finish, job, result)
+        return job, created
+
+    def wait(self, job, timeout=None):
+        """Esperar a que un trabajo termine; devuelve el job"""
+        done = self._done.get(job['job_id'])
+        if done is not None:
+            done.wait(timeout)
+        return job
+
+    def _create_job(self, payment, idempotency_key=None):
+        job_id = f"JOB-{uuid.uuid4().hex[:16]}"
+        now = datetime.utcnow().isoformat()
+
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "attempts": 0,
+            "payment": {
+                "payment_id": f"PAY-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}",
+                "order_id": payment['order_id'],
+                "amount": payment['amount'],
+                "currency": payment.get('currency', 'USD'),
+                "payment_method": payment.get('payment_method', 'credit_card'),
+                "status": "pending",
+                "transaction_id": None,
+                "created_at": now
+            },
+            "idempotency_key": idempotency_key,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        with self._lock:
+            if idempotency_key:
+                fingerprint = IdempotencyCache.fingerprint(payment)
+                existing = self.idempotency.entry(idempotency_key)
+                if existing is not None:
+                    if existing[0] != fingerprint:
+                        raise ValueError("La clave de idempotencia ya se usó con otro payload")
+                    return existing[1], False
+
+            # Dos cobros concurrentes de la misma orden: solo el primero se encola
+            active = self.order_jobs.get(payment['order_id'])
+            if active is not None and active['status'] != "failed":
+                raise PaymentInProgress(active)
+
+            if idempotency_key:
+                self.idempotency.get_or_set(idempotency_key, fingerprint, job)
+            self.order_jobs[payment['order_id']] = job
+            self.jobs[job_id] = job
+            self._done[job_id] = threading.Event()
+
+            # Descartar los trabajos terminados más antiguos
+            while len(self.jobs) > MAX_JOBS:
+                oldest = next(iter(self.jobs.values()))
+                if oldest['status'] not in ("completed", "failed"):
+                    break
+                self.jobs.popitem(last=False)
+
+        return job, True
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    @staticmethod
+    def _backoff_delay(attempts):
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+        # Jitter para no sincronizar reintentos contra la pasarela
+        return delay * random.uniform(0.8, 1.2)
+
+    def _retry_later(self, job):
+        delay = self._backoff_delay(job['attempts'])
+        job['status'] = "retrying"
+        job['next_attempt_in'] = round(delay, 3)
+        timer = threading.Timer(delay, self._queue.put, args=(job['job_id'],))
+        timer.daemon = True
+        timer.start()
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+
+            job['status'] = "processing"
+            job['attempts'] += 1
+            try:
+                result = self.gateway.charge(job['payment'])
+            except GatewayError as e:
+                job['last_error'] = str(e)
+                if job['attempts'] < MAX_ATTEMPTS:
+                    self._retry_later(job)
+                    continue
+                result = {"status": "failed", "transaction_id": None,
+                          "decline_reason": str(e)}
+
+            self._finish(job, result)
+
+    def _finish(self, job, result):
+        job_id = job['job_id']
+        job['payment'].update(result)
+        job['updated_at'] = datetime.utcnow().isoformat()
+        job.pop('next_attempt_in', None)
+        with self._lock:
+            job['status'] = "completed" if result['status'] == "completed" else "failed"
+            # Rechazado: la orden vuelve a admitir un pago
+            if job['status'] == "failed" and self.order_jobs.get(job['payment']['order_id']) is job:
+                del self.order_jobs[job['payment']['order_id']]
+
+        done = self._done.pop(job_id, None)
+        if done is not None:
+            done.set()
+
+        if self.deliver:
+            try:
+                self.deliver({
+                    "event_id": f"EVT-{job_id}",
+                    "type": "payment.completed" if job['status'] == "completed" else "payment.failed",
+                    "job_id": job_id,
+                    "payment": dict(job['payment']),
+                    "created_at": job['updated_at']
+                })
+            except Exception as e:
+                print(f"⚠️  Error entregando webhook de pago {job_id}: {e}")
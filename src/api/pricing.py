@@ -0,0 +1,239 @@
+"""
+Motor de precios del lado del servidor.
+
+Los precios nunca se toman del cliente: cada línea se resuelve contra el
+catálogo en una sola pasada usando tablas precalculadas:
+
+- tabla de precios unitarios por negocio (catálogo + lista de precios del negocio)
+- tramos de descuento por volumen (umbrales ordenados + bisect)
+
+Las tablas se construyen una vez y se invalidan cuando cambia una lista de precios
+o el catálogo (set_price_list, set_catalog_price). El carrito valora sus líneas
+con line_price, así su resumen coincide con lo que cobra el checkout.
+"""
+
+import math
+import threading
+from bisect import bisect_right
+
+# Tramos por volumen: (cantidad mínima, % de descuento)
+DEFAULT_VOLUME_TIERS = [(1, 0), (10, 5), (50, 10), (100, 15)]
+
+# Listas de precios por negocio: business_id -> {product_id: precio unitario}
+business_price_lists = {}
+
+# Tramos por volumen específicos de un negocio
+business_volume_tiers = {}
+
+_price_tables = {}
+_tier_tables = {}
+_price_listeners = []
+_lock = threading.Lock()
+
+
+class PricingError(Exception):
+    def __init__(self, errors):
+        Exception.__init__(self, "Error de precios")
+        self.errors = errors
+
+
+def _catalog():
+    from .routes.products import products_index
+    return products_index
+
+
+def _price_table(business_id):
+    table = _price_tables.get(business_id)
+    if table is None:
+        with _lock:
+            table = {pid: p['price'] for pid, p in _catalog().items()}
+            table.update(business_price_lists.get(business_id, {}))
+            _price_tables[business_id] = table
+    return table
+
+
+def _tier_table(business_id):
+    table = _tier_tables.get(business_id)
+    if table is None:
+        tiers = sorted(business_volume_tiers.get(business_id, DEFAULT_VOLUME_TIERS))
+        table = ([t[0] for t in tiers], [t[1] for t in tiers])
+        _tier_tables[business_id] = table
+    return table
+
+
+def volume_discount(quantity, business_id=None):
+    """% de descuento que corresponde a una cantidad"""
+    thresholds, discounts = _tier_table(business_id)
+    i = bisect_right(thresholds, quantity) - 1
+    return discounts[i] if i >= 0 else 0
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_tier(tier):
+    """[cantidad mínima >= 1, % de descuento entre 0 y 100], ambos enteros"""
+    if not isinstance(tier, (list, tuple)) or len(tier) != 2:
+        return False
+    minimum, discount = tier
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in tier):
+        return False
+    return minimum >= 1 and 0 <= discount <= 100
+
+
+def _price_list_errors(prices, tiers):
+    errors = []
+    for product_id, price in prices.items():
+        try:
+            int(product_id)
+        except (TypeError, ValueError):
+            errors.append({"product_id": product_id, "error": "product_id debe ser un entero"})
+            continue
+        if not _is_number(price) or not math.isfinite(price) or price < 0:
+            errors.append({"product_id": product_id, "error": "Precio inválido"})
+
+    if tiers is not None:
+        if not isinstance(tiers, list):
+            return errors + [{"volume_tiers": tiers, "error": "volume_tiers debe ser una lista"}]
+        for tier in tiers:
+            if not _is_tier(tier):
+                errors.append({"tier": tier, "error": "Tramo inválido: [cantidad mínima, % descuento]"})
+    return errors
+
+
+def set_price_list(business_id, prices, tiers=None):
+    """
+    Reemplazar la lista de precios (y opcionalmente los tramos) de un negocio.
+    Lanza PricingError si algún precio o tramo es inválido.
+    """
+    errors = _price_list_errors(prices, tiers)
+    if errors:
+        raise PricingError(errors)
+
+    with _lock:
+        business_price_lists[business_id] = {int(k): float(v) for k, v in prices.items()}
+        if tiers is not None:
+            business_volume_tiers[business_id] = [tuple(t) for t in tiers]
+        _price_tables.pop(business_id, None)
+        _tier_tables.pop(business_id, None)
+    _notify_price_change()
+
+
+def on_price_change(callback):
+    """Registrar una función que se llama cada vez que cambian los precios (catálogo o listas)"""
+    _price_listeners.append(callback)
+
+
+def set_catalog_price(product_id, price):
+    """Cambiar el precio de catálogo de un producto; lanza PricingError si no es válido"""
+    product = _catalog().get(product_id)
+    if product is None:
+        raise PricingError([{"product_id": product_id, "error": "Producto no encontrado"}])
+    if not _is_number(price) or not math.isfinite(price) or price < 0:
+        raise PricingError([{"product_id": product_id, "error": "Precio inválido"}])
+
+    with _lock:
+        product['price'] = float(price)
+    invalidate_price_tables()
+
+
+def invalidate_price_tables():
+    """Llamar cuando cambian los precios del catálogo"""
+    with _lock:
+        _price_tables.clear()
+        _tier_tables.clear()
+    _notify_price_change()
+
+
+def _notify_price_change():
+    for callback in list(_price_listeners):
+        callback()
+
+
+def _line_cents(unit_cents, quantity, thresholds, discounts):
+    """(centavos de la línea, % de descuento) con el tramo que corresponde a quantity"""
+    i = bisect_right(thresholds, quantity) - 1
+    discount = discounts[i] if i >= 0 else 0
+    return round(unit_cents * quantity * (100 - discount) / 100), discount
+
+
+def line_price(product_id, quantity, business_id=None):
+    """
+    Valorar una línea como price_items: (precio unitario en centavos, % de
+    descuento, total en centavos), o None si el producto no existe
+    """
+    product = _catalog().get(product_id)
+    if product is None:
+        return None
+    prices = _price_table(business_id)
+    thresholds, discounts = _tier_table(business_id)
+    unit_cents = round(prices.get(product_id, product['price']) * 100)
+    line_cents, discount = _line_cents(unit_cents, quantity, thresholds, discounts)
+    return unit_cents, discount, line_cents
+
+
+def price_items(items, business_id=None, check_stock=False):
+    """
+    Resolver precio de todas las líneas contra el catálogo en una pasada.
+    Devuelve {"lines", "subtotal"}; lanza PricingError con los errores por línea
+    (también si items no es una lista de objetos {product_id, quantity}).
+    """
+    if not isinstance(items, list):
+        raise PricingError([{"error": "items debe ser una lista"}])
+
+    catalog = _catalog()
+    prices = _price_table(business_id)
+    thresholds, discounts = _tier_table(business_id)
+
+    errors = []
+    lines = []
+    subtotal_cents = 0
+
+    # Agrupar cantidades por producto (el tramo se aplica al total del producto)
+    quantities = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Cada línea debe ser un objeto {product_id, quantity}"})
+            continue
+        product_id = item.get('product_id')
+        quantity = item.get('quantity', 1)
+        if not _is_int(product_id):
+            errors.append({"index": index, "product_id": product_id, "error": "product_id inválido"})
+            continue
+        if not _is_int(quantity) or quantity <= 0:
+            errors.append({"product_id": product_id, "error": "Cantidad inválida"})
+            continue
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    for product_id, quantity in quantities.items():
+        product = catalog.get(product_id)
+        if product is None:
+            errors.append({"product_id": product_id, "error": "Producto no encontrado"})
+            continue
+        if check_stock and quantity > product.get('stock', 0):
+            errors.append({"product_id": product_id, "error": "Stock insuficiente",
+                           "available_stock": product.get('stock', 0)})
+            continue
+
+        unit_cents = round(prices.get(product_id, product['price']) * 100)
+        line_cents, discount = _line_cents(unit_cents, quantity, thresholds, discounts)
+        subtotal_cents += line_cents
+
+        lines.append({
+            "product_id": product_id,
+            "name": product['name'],
+            "quantity": quantity,
+            "unit_price": unit_cents / 100,
+            "discount_pct": discount,
+            "line_total": line_cents / 100
+        })
+
+    if errors:
+        raise PricingError(errors)
+
+    return {"lines": lines, "subtotal": subtotal_cents / 100}
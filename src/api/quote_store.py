@@ -0,0 +1,194 @@
+"""
+Almacén de cotizaciones con índices por cliente, negocio y estado.
+
+- MemoryQuoteStore: índices en memoria (listas de ids ordenadas, ids k-ordenables
+  de api/ids.py).
+- SqlQuoteStore: respaldado por el modelo Quote (índices compuestos en la tabla).
+
+Ambos exponen la misma interfaz y paginan por cursor (id): cada página devuelve
+los ids menores que `before`, de más reciente a más antiguo.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from datetime import datetime
+
+from .journal import journal
+from .ids import next_id, advance_past
+
+QUOTE_STATUSES = ["pending", "accepted", "rejected", "expired", "converted"]
+
+
+class MemoryQuoteStore:
+    def __init__(self, journal=None):
+        self._quotes = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.journal = journal
+        if journal is not None:
+            journal.register("quotes", lambda: dict(self._quotes), self.load)
+
+    def load(self, quotes):
+        """Reconstruir cotizaciones e índices (recuperación desde el WAL)"""
+        with self._lock:
+            self._quotes = {}
+            self._indexes = {}
+            for quote_id in sorted(quotes):
+                self._quotes[quote_id] = quotes[quote_id]
+                self._index_add(quotes[quote_id])
+            if quotes:
+                advance_past(max(quotes))
+
+    def _record(self, quote):
+        # Fuera del lock del almacén: la espera al fsync no frena a otros escritores
+        if self.journal is not None:
+            self.journal.record("quotes", quote['id'], quote)
+
+    @staticmethod
+    def _index_keys(quote):
+        customer_id = quote['customer_id']
+        business_id = quote['business_id']
+        status = quote['status']
+        return [
+            ("all",),
+            ("customer", customer_id),
+            ("business", business_id),
+            ("status", status),
+            ("customer", customer_id, status),
+            ("business", business_id, status),
+        ]
+
+    def _index_add(self, quote):
+        # Los ids son monótonos: agregar al final mantiene la lista ordenada,
+        # salvo al reindexar por cambio de estado
+        for key in self._index_keys(quote):
+            ids = self._indexes.setdefault(key, [])
+            if not ids or ids[-1] < quote['id']:
+                ids.append(quote['id'])
+            else:
+                ids.insert(bisect_left(ids, quote['id']), quote['id'])
+
+    def _index_remove(self, quote):
+        for key in self._index_keys(quote):
+            ids = self._indexes.get(key, [])
+            i = bisect_left(ids, quote['id'])
+            if i < len(ids) and ids[i] == quote['id']:
+                del ids[i]
+
+    def create(self, data):
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            quote = {
+                "id": next_id(),
+                "customer_id": data['customer_id'],
+                "business_id": data.get('business_id', 1),
+                "items": data['items'],
+                "status": data.get('status', 'pending'),
+                "total_price": data.get('total_price', 0),
+                "created_at": now,
+                "updated_at": now
+            }
+            self._quotes[quote['id']] = quote
+            self._index_add(quote)
+        self._record(quote)
+        return quote
+
+    def get(self, quote_id):
+        return self._quotes.get(quote_id)
+
+    def update(self, quote_id, **fields):
+        with self._lock:
+            quote = self._quotes.get(quote_id)
+            if quote is None:
+                return None
+            self._index_remove(quote)
+            quote.update(fields)
+            quote['updated_at'] = datetime.utcnow().isoformat()
+            self._index_add(quote)
+        self._record(quote)
+        return quote
+
+    def list(self, customer_id=None, business_id=None, status=None,
+             before=None, limit=20):
+        limit = max(1, limit)
+        if customer_id is not None:
+            key = ("customer", customer_id) + ((status,) if status else ())
+        elif business_id is not None:
+            key = ("business", business_id) + ((status,) if status else ())
+        elif status:
+            key = ("status", status)
+        else:
+            key = ("all",)
+
+        with self._lock:
+            ids = self._indexes.get(key, [])
+            end = len(ids) if before is None else bisect_left(ids, before)
+            page_ids = ids[max(0, end - limit):end][::-1]
+            quotes = [self._quotes[quote_id] for quote_id in page_ids]
+
+        next_cursor = page_ids[-1] if end > limit and page_ids else None
+        return quotes, next_cursor
+
+    def count(self):
+        return len(self._quotes)
+
+
+class SqlQuoteStore:
+    def __init__(self):
+        from .models import db, Quote
+        self.db = db
+        self.Quote = Quote
+
+    def create(self, data):
+        quote = self.Quote(
+            customer_id=data['customer_id'],
+            business_id=data.get('business_id', 1),
+            items=data['items'],
+            status=data.get('status', 'pending'),
+            total_price=data.get('total_price', 0)
+        )
+        self.db.session.add(quote)
+        self.db.session.commit()
+        return quote.serialize()
+
+    def get(self, quote_id):
+        quote = self.db.session.get(self.Quote, quote_id)
+        return quote.serialize() if quote else None
+
+    def update(self, quote_id, **fields):
+        quote = self.db.session.get(self.Quote, quote_id)
+        if quote is None:
+            return None
+        for name, value in fields.items():
+            setattr(quote, name, value)
+        self.db.session.commit()
+        return quote.serialize()
+
+    def list(self, customer_id=None, business_id=None, status=None,
+             before=None, limit=20):
+        limit = max(1, limit)
+        Quote = self.Quote
+        query = Quote.query
+        if customer_id is not None:
+            query = query.filter(Quote.customer_id == customer_id)
+        elif business_id is not None:
+            query = query.filter(Quote.business_id == business_id)
+        if status:
+            query = query.filter(Quote.status == status)
+        if before is not None:
+            query = query.filter(Quote.id < before)
+
+        rows = query.order_by(Quote.id.desc()).limit(limit + 1).all()
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        return [q.serialize() for q in rows[:limit]], next_cursor
+
+    def count(self):
+        return self.Quote.query.count()
+
+
+def create_quote_store():
+    """QUOTE_STORE=sql usa la base de datos; por defecto, memoria"""
+    if os.environ.get("QUOTE_STORE", "memory") == "sql":
+        return SqlQuoteStore()
+    return MemoryQuoteStore(journal)
@@ -0,0 +1,214 @@
+"""
+Registros compactos para los datos en memoria (órdenes, líneas, carrito,
+movimientos de inventario).
+
+Cada registro es una clase con __slots__ (sin __dict__ por instancia), los
+instantes se guardan como enteros epoch en segundos y los valores de
+vocabulario cerrado (estado, método de pago, tipo de movimiento) se internan,
+así millones de órdenes comparten un solo objeto por valor. serialize()
+devuelve el mismo JSON que los diccionarios que reemplazan (fechas ISO 8601).
+"""
+
+import sys
+import time
+from datetime import datetime, timezone
+
+_EMPTY = {}
+
+
+def now_epoch():
+    return int(time.time())
+
+
+def to_epoch(value):
+    """epoch int desde datetime, string ISO (con o sin 'Z') o epoch; None queda None"""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def to_iso(epoch):
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Record:
+    """Pickle como tupla de valores (sin los nombres de campo): WAL y snapshots más chicos"""
+    __slots__ = ()
+    INTERNED = ()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, _intern(value) if name in self.INTERNED else value)
+
+
+class OrderItem(_Record):
+    __slots__ = ("product_id", "name", "quantity", "unit_price", "discount_pct", "line_total")
+    INTERNED = ("name",)
+
+    def __init__(self, product_id, name, quantity, unit_price, discount_pct=0, line_total=None):
+        self.product_id = product_id
+        self.name = _intern(name)
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.discount_pct = discount_pct
+        self.line_total = line_total if line_total is not None \
+            else round(unit_price * quantity, 2)
+
+    @classmethod
+    def from_line(cls, line):
+        """Desde una línea valorada (price_items) o una línea de cotización"""
+        return cls(line["product_id"], line["name"], line["quantity"], line["unit_price"],
+                   line.get("discount_pct", 0), line.get("line_total"))
+
+    def serialize(self):
+        return {
+            "product_id": self.product_id,
+            "name": self.name,
+            "quantity": self.quantity,
+            "unit_price": self.unit_price,
+            "discount_pct": self.discount_pct,
+            "line_total": self.line_total
+        }
+
+
+class Order(_Record):
+    __slots__ = ("id", "user_id", "items", "subtotal", "shipping", "tax", "total",
+                 "status", "payment_method", "payment_status", "payment_id",
+                 "shipping_address", "billing_address", "customer_notes",
+                 "created_at", "updated_at", "estimated_delivery",
+                 "tracking_number", "shipped_at", "delivered_at",
+                 "cancelled_at", "cancellation_reason")
+    INTERNED = ("status", "payment_method", "payment_status")
+
+    # Se omiten del JSON mientras valen None (como las claves que antes no existían)
+    OPTIONAL_FIELDS = ("tracking_number", "shipped_at", "delivered_at",
+                       "cancelled_at", "cancellation_reason")
+
+    def __init__(self, id, user_id, items, subtotal, shipping, tax, total, status,
+                 payment_method, payment_status="pending", payment_id=None,
+                 shipping_address=None, billing_address=None, customer_notes="",
+                 created_at=None, updated_at=None, estimated_delivery=None):
+        self.id = id
+        self.user_id = user_id
+        self.items = tuple(items)
+        self.subtotal = subtotal
+        self.shipping = shipping
+        self.tax = tax
+        self.total = total
+        self.status = _intern(status)
+        self.payment_method = _intern(payment_method)
+        self.payment_status = _intern(payment_status)
+        self.payment_id = payment_id
+        # Las direcciones vacías no ocupan un dict por orden
+        self.shipping_address = shipping_address or None
+        self.billing_address = billing_address or None
+        self.customer_notes = customer_notes or ""
+        self.created_at = created_at if created_at is not None else now_epoch()
+        self.updated_at = updated_at if updated_at is not None else self.created_at
+        self.estimated_delivery = estimated_delivery
+        self.tracking_number = None
+        self.shipped_at = None
+        self.delivered_at = None
+        self.cancelled_at = None
+        self.cancellation_reason = None
+
+    @property
+    def order_number(self):
+        day = datetime.fromtimestamp(self.created_at, timezone.utc).strftime("%Y%m%d")
+        return f"ORD-{day}-{self.id:04d}"
+
+    def set_status(self, status, now=None):
+        self.status = _intern(status)
+        self.updated_at = now or now_epoch()
+
+    def set_payment(self, payment_id, payment_status, now=None):
+        self.payment_id = payment_id
+        self.payment_status = _intern(payment_status)
+        self.updated_at = now or now_epoch()
+
+    def serialize(self):
+        data = {
+            "id": self.id,
+            "order_number": self.order_number,
+            "user_id": self.user_id,
+            "items": [item.serialize() for item in self.items],
+            "subtotal": self.subtotal,
+            "shipping": self.shipping,
+            "tax": self.tax,
+            "total": self.total,
+            "status": self.status,
+            "payment_method": self.payment_method,
+            "payment_status": self.payment_status,
+            "payment_id": self.payment_id,
+            "shipping_address": self.shipping_address or _EMPTY,
+            "billing_address": self.billing_address or _EMPTY,
+            "customer_notes": self.customer_notes,
+            "created_at": to_iso(self.created_at),
+            "updated_at": to_iso(self.updated_at),
+            "estimated_delivery": to_iso(self.estimated_delivery)
+        }
+        for field in self.OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = to_iso(value) if field.endswith("_at") else value
+        return data
+
+
+class CartItem(_Record):
+    __slots__ = ("id", "cart_id", "product_id", "quantity", "created_at", "updated_at")
+
+    def __init__(self, id, cart_id, product_id, quantity, created_at=None, updated_at=None):
+        self.id = id
+        self.cart_id = cart_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.created_at = created_at if created_at is not None else now_epoch()
+        self.updated_at = updated_at if updated_at is not None else self.created_at
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "cart_id": self.cart_id,
+            "product_id": self.product_id,
+            "quantity": self.quantity,
+            "created_at": to_iso(self.created_at),
+            "updated_at": to_iso(self.updated_at)
+        }
+
+
+class Movement(_Record):
+    __slots__ = ("id", "date", "type", "quantity", "new_stock", "reason", "user_id")
+    INTERNED = ("type", "reason")
+
+    def __init__(self, date, type, quantity, new_stock, reason="", user_id=None, id=None):
+        self.id = id
+        self.date = to_epoch(date)
+        self.type = _intern(type)
+        self.quantity = quantity
+        self.new_stock = new_stock
+        self.reason = _intern(reason or "")
+        self.user_id = user_id
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "date": to_iso(self.date),
+            "type": self.type,
+            "quantity": self.quantity,
+            "new_stock": self.new_stock,
+            "reason": self.reason,
+            "user_id": self.user_id
+        }
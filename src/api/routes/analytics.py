@@ -1,11 +1,13 @@
 from flask import Blueprint, jsonify
 from datetime import datetime, timedelta
 import random
+from ..compression import cached_response
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
 @analytics_bp.route('/dashboard', methods=['GET'])
+@cached_response(ttl=60, namespace='analytics')
 def get_analytics_dashboard():
     """Obtener dashboard de analytics para negocio"""
 
@@ -88,24 +90,31 @@ def get_analytics_dashboard():
     })
 
 
-@analytics_bp.route('/realtime', methods=['GET'])
-def get_realtime_metrics():
-    """Obtener métricas en tiempo real"""
+def realtime_metrics():
+    """Métricas en tiempo real (compartido por la vista WSGI y la ASGI)"""
+    from .orders import order_states
 
     current_time = datetime.now()
 
-    return jsonify({
+    return {
         "success": True,
         "data": {
             "active_users": random.randint(5, 25),
             "quotes_today": random.randint(3, 15),
             "orders_today": random.randint(1, 8),
             "revenue_today": round(random.uniform(200, 1500), 2),
+            "orders_by_status": order_states.counts(),
             "avg_response_time": random.uniform(1.5, 5.5),
             "system_status": "operational",
             "last_updated": current_time.strftime("%H:%M:%S")
         }
-    })
+    }
+
+
+@analytics_bp.route('/realtime', methods=['GET'])
+def get_realtime_metrics():
+    """Obtener métricas en tiempo real"""
+    return jsonify(realtime_metrics())
 
 
 @analytics_bp.route('/customer-insights', methods=['GET'])
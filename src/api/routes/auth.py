@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 import datetime
+from ..ids import next_id
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -24,6 +25,15 @@ users_db = [
 ]
 
 
+def account_business_id(user_id):
+    """
+    Negocio cuya lista de precios aplica a la cuenta del usuario (None: precios
+    del catálogo). Se toma de la cuenta, nunca del cuerpo del request.
+    """
+    user = next((u for u in users_db if u["id"] == user_id), None)
+    return user.get('business_id') if user else None
+
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.json
@@ -69,7 +79,7 @@ def register():
 
     # Crear nuevo usuario
     new_user = {
-        "id": len(users_db) + 1,
+        "id": next_id(),
         "email": data['email'],
         "password": generate_password_hash(data['password']),
         "name": data['name'],
@@ -1,4 +1,5 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+from ..pricing import set_price_list, business_price_lists, PricingError
 
 business_bp = Blueprint('business', __name__)
 
@@ -19,3 +20,32 @@ def get_dashboard():
             }
         }
     })
+
+
+@business_bp.route('/<int:business_id>/price-list', methods=['GET'])
+def get_price_list(business_id):
+    """Obtener la lista de precios de un negocio"""
+    return jsonify({
+        "business_id": business_id,
+        "prices": business_price_lists.get(business_id, {})
+    })
+
+
+@business_bp.route('/<int:business_id>/price-list', methods=['PUT'])
+def update_price_list(business_id):
+    """Reemplazar la lista de precios (y tramos por volumen) de un negocio"""
+    data = request.json
+
+    if not data or not isinstance(data.get('prices'), dict):
+        return jsonify({"error": "prices es requerido"}), 400
+
+    try:
+        set_price_list(business_id, data['prices'], data.get('volume_tiers'))
+    except PricingError as e:
+        return jsonify({"error": "Lista de precios inválida", "details": e.errors}), 400
+
+    return jsonify({
+        "success": True,
+        "message": "Lista de precios actualizada",
+        "business_id": business_id
+    })
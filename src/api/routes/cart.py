@@ -1,37 +1,230 @@
+import os
+import threading
+import time
 from flask import Blueprint, jsonify, request
 from datetime import datetime
+from ..records import CartItem, now_epoch, to_epoch
+from ..journal import journal
+from ..cart_totals import CartTotalsIndex
+from ..pricing import line_price, on_price_change
+from ..timer_wheel import TimerWheel
+from ..ids import next_id, advance_past
+from .auth import account_business_id
+from .products import products_index
 
 cart_bp = Blueprint('cart', __name__)
 
 # Base de datos de carritos en memoria
 carts_db = {}
-cart_items_db = []
-item_counter = 1
-
-# Productos disponibles (simulados)
-available_products = [
-    {
-        "id": 1,
-        "name": "Producto Sostenible 1",
-        "price": 100.50,
-        "stock": 10,
-        "image_url": "https://via.placeholder.com/150"
-    },
-    {
-        "id": 2,
-        "name": "Producto Sostenible 2",
-        "price": 200.00,
-        "stock": 5,
-        "image_url": "https://via.placeholder.com/150"
-    },
-    {
-        "id": 3,
-        "name": "Producto Sostenible 3",
-        "price": 150.75,
-        "stock": 15,
-        "image_url": "https://via.placeholder.com/150"
-    }
-]
+cart_items_db = {}   # item_id -> CartItem
+cart_lines = {}      # cart_id -> {product_id: CartItem}
+
+# Un lock para leer-modificar líneas y totales sin que otra petición se cuele
+_lock = threading.Lock()
+
+# Máximo de líneas por /add/batch
+MAX_BATCH_ITEMS = 500
+
+# Carritos abandonados: vencen CART_TTL_SECONDS después de su último cambio (0 = nunca)
+CART_TTL_SECONDS = int(os.environ.get("CART_TTL_SECONDS", 24 * 3600))
+expiry_wheel = TimerWheel()
+_expiry_listeners = []
+
+
+def _load_cart_items(items):
+    """Reconstruir líneas, índices y totales desde el WAL/snapshot"""
+    cart_items_db.clear()
+    cart_lines.clear()
+    cart_totals.clear()
+    for item in sorted(items.values(), key=lambda i: i.id):
+        _add_line(item)
+    if cart_items_db:
+        advance_past(max(cart_items_db))
+
+
+def _load_carts(carts):
+    carts_db.clear()
+    carts_db.update(carts)
+    for cart_id, cart in carts.items():
+        _schedule_expiry(cart_id, to_epoch(cart['updated_at']))
+
+
+journal.register('carts', lambda: dict(carts_db), _load_carts)
+journal.register('cart_items', lambda: dict(cart_items_db), _load_cart_items)
+
+def _line_price(cart_id, product_id, quantity):
+    # Como en el checkout: catálogo, lista de precios de la cuenta y tramos por
+    # volumen (el carrito de cada usuario tiene su mismo id)
+    return line_price(product_id, quantity, account_business_id(cart_id))
+
+
+def _line_cents(cart_id, product_id, quantity):
+    priced = _line_price(cart_id, product_id, quantity)
+    return None if priced is None else priced[2]
+
+
+# Resumen por carrito en centavos; se recalcula solo si cambian los precios
+cart_totals = CartTotalsIndex(_line_cents)
+on_price_change(cart_totals.invalidate)
+_EMPTY_SUMMARY = cart_totals.recompute(None, [])
+
+
+def _add_line(item):
+    cart_items_db[item.id] = item
+    cart_lines.setdefault(item.cart_id, {})[item.product_id] = item
+    cart_totals.apply(item.cart_id, item.product_id, 0, item.quantity)
+
+
+def _remove_line(item):
+    del cart_items_db[item.id]
+    lines = cart_lines.get(item.cart_id)
+    if lines is not None:
+        lines.pop(item.product_id, None)
+        if not lines:
+            del cart_lines[item.cart_id]
+    cart_totals.apply(item.cart_id, item.product_id, item.quantity, 0)
+
+
+def _schedule_expiry(cart_id, touched_at=None):
+    if CART_TTL_SECONDS:
+        expiry_wheel.schedule(cart_id, (touched_at or now_epoch()) + CART_TTL_SECONDS)
+
+
+def _touch_cart(cart_id, create=False):
+    """
+    Actualizar updated_at y reprogramar el vencimiento (llamar con _lock).
+    Devuelve el carrito para registrarlo en el WAL.
+    """
+    cart = carts_db.get(cart_id)
+    now = datetime.utcnow().isoformat()
+    if cart is None:
+        if not create:
+            return None
+        cart = carts_db[cart_id] = {
+            "id": cart_id,
+            "user_id": cart_id,
+            "created_at": now,
+            "updated_at": now
+        }
+    cart['updated_at'] = now
+    _schedule_expiry(cart_id)
+    return cart
+
+
+def _record_cart(cart_id, cart):
+    if cart is not None:
+        journal.record('carts', cart_id, cart)
+
+
+def _check_line(product_id, quantity):
+    """Reglas de /add para una línea: (producto, None) o (None, (error, status))"""
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+        return None, ("Cantidad inválida", 400)
+
+    product = products_index.get(product_id)
+    if not product:
+        return None, ("Producto no encontrado", 404)
+
+    if quantity > product['stock']:
+        return None, ("Stock insuficiente", 400)
+
+    return product, None
+
+
+def _add_lines(user_id, lines):
+    """
+    Sumar [(product_id, cantidad)] ya validadas al carrito (llamar con _lock).
+    Devuelve el carrito y las líneas modificadas, para el WAL.
+    """
+    cart = _touch_cart(user_id, create=True)
+    now = now_epoch()
+    touched = {}
+
+    for product_id, quantity in lines:
+        item = cart_lines.get(user_id, {}).get(product_id)
+        if item:
+            cart_totals.apply(user_id, product_id, item.quantity, item.quantity + quantity)
+            item.quantity += quantity
+            item.updated_at = now
+        else:
+            item = CartItem(next_id(), user_id, product_id, quantity, now)
+            _add_line(item)
+        touched[item.id] = item
+
+    return cart, list(touched.values())
+
+
+def checkout_cart(user_id, place_order):
+    """
+    Convertir el carrito en una orden de forma atómica. place_order(líneas)
+    corre con el carrito bloqueado y devuelve (orden, error); si hay orden, el
+    carrito se vacía en la misma operación, así una línea agregada durante el
+    checkout no se pierde ni se cobra dos veces. Lo que se registra en el WAL
+    (stock, orden, carrito) se escribe con el lock tomado, en el mismo orden
+    que en memoria, pero se espera en disco después de soltarlo, en un solo
+    fsync, y recién entonces se devuelve la orden.
+    """
+    with journal.deferred_sync():
+        with _lock:
+            items = sorted(cart_lines.get(user_id, {}).values(), key=lambda i: i.id)
+            order, error = place_order(items)
+            if order is None:
+                return order, error
+
+            cart_lines.pop(user_id, None)
+            for item in items:
+                del cart_items_db[item.id]
+            cart_totals.discard(user_id)
+            cart = _touch_cart(user_id)
+
+            journal.record_many('cart_items', ((item.id, None) for item in items))
+            _record_cart(user_id, cart)
+    return order, error
+
+
+def on_cart_expired(callback):
+    """
+    Registrar una función callback(cart_id, líneas) que se llama al vencer un
+    carrito, p. ej. para liberar stock retenido por esas líneas
+    """
+    _expiry_listeners.append(callback)
+
+
+def expire_carts(now=None):
+    """Eliminar los carritos vencidos y sus líneas; devuelve cuántos se eliminaron"""
+    expired = []
+    with journal.deferred_sync():
+        with _lock:
+            for cart_id in expiry_wheel.advance(now):
+                carts_db.pop(cart_id, None)
+                lines = list(cart_lines.pop(cart_id, {}).values())
+                for item in lines:
+                    del cart_items_db[item.id]
+                cart_totals.discard(cart_id)
+                expired.append((cart_id, lines))
+
+            journal.record_many('cart_items', ((item.id, None) for _, lines in expired for item in lines))
+            journal.record_many('carts', ((cart_id, None) for cart_id, _ in expired))
+
+    for cart_id, lines in expired:
+        for callback in list(_expiry_listeners):
+            callback(cart_id, lines)
+    return len(expired)
+
+
+def start_cart_expiry(interval_seconds):
+    """Eliminar carritos vencidos periódicamente en un hilo de fondo"""
+    def loop():
+        while True:
+            try:
+                expire_carts()
+            except Exception as e:
+                print(f"⚠️  Error eliminando carritos vencidos: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=loop, name='cart-expiry', daemon=True)
+    thread.start()
+    return thread
 
 
 @cart_bp.route('/', methods=['GET'])
@@ -42,50 +235,40 @@ def get_cart():
     if not user_id:
         return jsonify({"error": "user_id es requerido"}), 400
 
-    # Crear carrito si no existe
-    if user_id not in carts_db:
-        carts_db[user_id] = {
-            "id": user_id,
-            "user_id": user_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }
-
-    # Obtener items del carrito
-    user_cart_items = [
-        item for item in cart_items_db if item['cart_id'] == user_id]
+    # Obtener items del carrito (ordenados por id, como se agregaron)
+    with _lock:
+        cart = carts_db.get(user_id)
+        if cart is None:
+            # Leer no crea el carrito: se crea con el primer producto agregado
+            return jsonify({
+                "cart": {"id": user_id, "user_id": user_id,
+                         "created_at": None, "updated_at": None},
+                "items": [],
+                "summary": _EMPTY_SUMMARY
+            })
+        user_cart_items = sorted(cart_lines.get(user_id, {}).values(), key=lambda i: i.id)
+        summary = cart_totals.summary(user_id, lambda: user_cart_items)
 
     # Enriquecer con información del producto
     enriched_items = []
-    total = 0
-
     for item in user_cart_items:
-        product = next(
-            (p for p in available_products if p['id'] == item['product_id']), None)
+        product = products_index.get(item.product_id)
         if product:
-            item_total = product['price'] * item['quantity']
-            total += item_total
-
+            unit_cents, discount, line_cents = _line_price(user_id, item.product_id, item.quantity)
             enriched_items.append({
-                **item,
+                **item.serialize(),
                 "product_name": product['name'],
-                "product_price": product['price'],
-                "product_image": product['image_url'],
-                "item_total": item_total,
+                "product_price": unit_cents / 100,
+                "discount_pct": discount,
+                "product_image": product.get('image_url'),
+                "item_total": line_cents / 100,
                 "available_stock": product['stock']
             })
 
     return jsonify({
-        "cart": carts_db[user_id],
+        "cart": cart,
         "items": enriched_items,
-        "summary": {
-            "items_count": len(enriched_items),
-            "total_items": sum(item['quantity'] for item in enriched_items),
-            "subtotal": total,
-            "shipping": 0 if total == 0 else 10.00,
-            "tax": round(total * 0.08, 2),
-            "total": total + (0 if total == 0 else 10.00) + round(total * 0.08, 2)
-        }
+        "summary": summary
     })
 
 
@@ -101,58 +284,136 @@ def add_to_cart():
     product_id = data['product_id']
     quantity = data.get('quantity', 1)
 
-    # Verificar que el producto exista
-    product = next(
-        (p for p in available_products if p['id'] == product_id), None)
-    if not product:
-        return jsonify({"error": "Producto no encontrado"}), 404
+    # Verificar cantidad, que el producto exista y stock
+    product, error = _check_line(product_id, quantity)
+    if error:
+        message, status = error
+        return jsonify({"error": message}), status
 
-    # Verificar stock
-    if quantity > product['stock']:
-        return jsonify({"error": "Stock insuficiente"}), 400
-
-    # Crear carrito si no existe
-    if user_id not in carts_db:
-        carts_db[user_id] = {
-            "id": user_id,
-            "user_id": user_id,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }
+    # Crea el carrito si no existe y suma la cantidad si el producto ya estaba
+    with journal.deferred_sync(), _lock:
+        cart, touched = _add_lines(user_id, [(product_id, quantity)])
+        journal.record('cart_items', touched[0].id, touched[0])
+        _record_cart(user_id, cart)
 
-    # Verificar si el producto ya está en el carrito
-    existing_item = next(
-        (item for item in cart_items_db
-         if item['cart_id'] == user_id and item['product_id'] == product_id),
-        None
-    )
+    return jsonify({
+        "success": True,
+        "message": "Producto agregado al carrito",
+        "cart_id": user_id
+    })
 
-    global item_counter
 
-    if existing_item:
-        # Actualizar cantidad
-        existing_item['quantity'] += quantity
-        existing_item['updated_at'] = datetime.utcnow().isoformat()
-    else:
-        # Agregar nuevo item
-        new_item = {
-            "id": item_counter,
-            "cart_id": user_id,
-            "product_id": product_id,
-            "quantity": quantity,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        cart_items_db.append(new_item)
-        item_counter += 1
+@cart_bp.route('/add/batch', methods=['POST'])
+def add_to_cart_batch():
+    """
+    Agregar varios productos en una sola operación (volver a pedir una orden,
+    cargar una lista). Cada línea sigue las reglas de /add y se agregan todas
+    o ninguna.
+    """
+    data = request.json
 
-    # Actualizar timestamp del carrito
-    carts_db[user_id]['updated_at'] = datetime.utcnow().isoformat()
+    if not data or 'user_id' not in data or not isinstance(data.get('items'), list):
+        return jsonify({"error": "user_id e items (lista) son requeridos"}), 400
+
+    user_id = data['user_id']
+    items = data['items']
+
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"Máximo {MAX_BATCH_ITEMS} productos por lote"}), 400
+
+    lines = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or 'product_id' not in item:
+            errors.append({"index": index, "error": "product_id es requerido"})
+            continue
+        product_id = item['product_id']
+        quantity = item.get('quantity', 1)
+        product, error = _check_line(product_id, quantity)
+        if error:
+            errors.append({"index": index, "product_id": product_id, "error": error[0]})
+            continue
+        lines.append((product_id, quantity))
+
+    if errors:
+        return jsonify({
+            "success": False,
+            "applied": 0,
+            "errors": errors
+        }), 400
+
+    with journal.deferred_sync(), _lock:
+        cart, touched = _add_lines(user_id, lines)
+        summary = cart_totals.summary(user_id, lambda: cart_lines.get(user_id, {}).values())
+        journal.record_many('cart_items', ((item.id, item) for item in touched))
+        _record_cart(user_id, cart)
 
     return jsonify({
         "success": True,
-        "message": "Producto agregado al carrito",
-        "cart_id": user_id
+        "message": "Productos agregados al carrito",
+        "cart_id": user_id,
+        "applied": len(lines),
+        "summary": summary
+    })
+
+
+@cart_bp.route('/merge', methods=['POST'])
+def merge_carts():
+    """
+    Pasar las líneas de un carrito (p. ej. el de invitado, al iniciar sesión)
+    al carrito del usuario. Las cantidades del mismo producto se suman con las
+    reglas de /add; si alguna línea no es válida no se mueve nada.
+    """
+    data = request.json
+
+    if not data or 'user_id' not in data or 'from_cart_id' not in data:
+        return jsonify({"error": "user_id y from_cart_id son requeridos"}), 400
+
+    user_id = data['user_id']
+    from_cart_id = data['from_cart_id']
+
+    if user_id == from_cart_id:
+        return jsonify({"error": "El carrito de origen y el de destino son el mismo"}), 400
+
+    with journal.deferred_sync(), _lock:
+        source_items = sorted(cart_lines.get(from_cart_id, {}).values(), key=lambda i: i.id)
+
+        errors = []
+        for item in source_items:
+            product, error = _check_line(item.product_id, item.quantity)
+            if error:
+                errors.append({"item_id": item.id, "product_id": item.product_id,
+                               "error": error[0]})
+        if errors:
+            return jsonify({
+                "success": False,
+                "applied": 0,
+                "errors": errors
+            }), 400
+
+        # El carrito de origen desaparece con sus líneas
+        for item in source_items:
+            _remove_line(item)
+        cart_totals.discard(from_cart_id)
+        expiry_wheel.cancel(from_cart_id)
+        removed_cart = carts_db.pop(from_cart_id, None)
+
+        cart, touched = _add_lines(user_id, [(i.product_id, i.quantity) for i in source_items])
+        summary = cart_totals.summary(user_id, lambda: cart_lines.get(user_id, {}).values())
+
+        entries = [(item.id, None) for item in source_items]
+        entries.extend((item.id, item) for item in touched)
+        journal.record_many('cart_items', entries)
+        if removed_cart is not None:
+            journal.record('carts', from_cart_id, None)
+        _record_cart(user_id, cart)
+
+    return jsonify({
+        "success": True,
+        "message": "Carritos combinados",
+        "cart_id": user_id,
+        "applied": len(source_items),
+        "summary": summary
     })
 
 
@@ -166,38 +427,44 @@ def update_cart_item(item_id):
 
     quantity = data['quantity']
 
+    # Entero (0 quita la línea); "2", 2.5 o true no se aceptan
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        return jsonify({"error": "Cantidad inválida"}), 400
+
     if quantity < 0:
         return jsonify({"error": "La cantidad no puede ser negativa"}), 400
 
-    # Buscar el item
-    item = next(
-        (item for item in cart_items_db if item['id'] == item_id), None)
+    with journal.deferred_sync(), _lock:
+        # Buscar el item
+        item = cart_items_db.get(item_id)
 
-    if not item:
-        return jsonify({"error": "Item no encontrado en el carrito"}), 404
+        if not item:
+            return jsonify({"error": "Item no encontrado en el carrito"}), 404
 
-    # Verificar producto y stock
-    product = next(
-        (p for p in available_products if p['id'] == item['product_id']), None)
-    if not product:
-        return jsonify({"error": "Producto no encontrado"}), 404
+        # Verificar producto y stock
+        product = products_index.get(item.product_id)
+        if not product:
+            return jsonify({"error": "Producto no encontrado"}), 404
 
-    if quantity > product['stock']:
-        return jsonify({"error": "Stock insuficiente"}), 400
-
-    # Actualizar cantidad
-    if quantity == 0:
-        # Eliminar el item si la cantidad es 0
-        cart_items_db[:] = [i for i in cart_items_db if i['id'] != item_id]
-        message = "Item eliminado del carrito"
-    else:
-        item['quantity'] = quantity
-        item['updated_at'] = datetime.utcnow().isoformat()
-        message = "Cantidad actualizada"
-
-    # Actualizar timestamp del carrito
-    if item['cart_id'] in carts_db:
-        carts_db[item['cart_id']]['updated_at'] = datetime.utcnow().isoformat()
+        if quantity > product['stock']:
+            return jsonify({"error": "Stock insuficiente"}), 400
+
+        # Actualizar cantidad
+        if quantity == 0:
+            # Eliminar el item si la cantidad es 0
+            _remove_line(item)
+            message = "Item eliminado del carrito"
+        else:
+            cart_totals.apply(item.cart_id, item.product_id, item.quantity, quantity)
+            item.quantity = quantity
+            item.updated_at = now_epoch()
+            message = "Cantidad actualizada"
+
+        # Actualizar timestamp del carrito
+        cart = _touch_cart(item.cart_id)
+
+        journal.record('cart_items', item_id, item if quantity else None)
+        _record_cart(item.cart_id, cart)
 
     return jsonify({
         "success": True,
@@ -209,19 +476,21 @@ def update_cart_item(item_id):
 def remove_from_cart(item_id):
     """Eliminar item del carrito"""
 
-    # Buscar el item
-    item = next(
-        (item for item in cart_items_db if item['id'] == item_id), None)
+    with journal.deferred_sync(), _lock:
+        # Buscar el item
+        item = cart_items_db.get(item_id)
 
-    if not item:
-        return jsonify({"error": "Item no encontrado en el carrito"}), 404
+        if not item:
+            return jsonify({"error": "Item no encontrado en el carrito"}), 404
 
-    # Eliminar el item
-    cart_items_db[:] = [i for i in cart_items_db if i['id'] != item_id]
+        # Eliminar el item
+        _remove_line(item)
 
-    # Actualizar timestamp del carrito
-    if item['cart_id'] in carts_db:
-        carts_db[item['cart_id']]['updated_at'] = datetime.utcnow().isoformat()
+        # Actualizar timestamp del carrito
+        cart = _touch_cart(item.cart_id)
+
+        journal.record('cart_items', item_id, None)
+        _record_cart(item.cart_id, cart)
 
     return jsonify({
         "success": True,
@@ -240,12 +509,17 @@ def clear_cart():
     user_id = data['user_id']
 
     # Eliminar todos los items del usuario
-    cart_items_db[:] = [
-        item for item in cart_items_db if item['cart_id'] != user_id]
+    with journal.deferred_sync(), _lock:
+        removed = list(cart_lines.pop(user_id, {}).values())
+        for item in removed:
+            del cart_items_db[item.id]
+        cart_totals.discard(user_id)
+
+        # Actualizar timestamp del carrito
+        cart = _touch_cart(user_id)
 
-    # Actualizar timestamp del carrito
-    if user_id in carts_db:
-        carts_db[user_id]['updated_at'] = datetime.utcnow().isoformat()
+        journal.record_many('cart_items', ((item.id, None) for item in removed))
+        _record_cart(user_id, cart)
 
     return jsonify({
         "success": True,
@@ -1,5 +1,13 @@
 from flask import Blueprint, jsonify, request
-from datetime import datetime
+import threading
+import time
+from ..compression import invalidate_cache
+from ..movement_log import MovementLog
+from ..records import Movement, now_epoch, to_iso
+from ..journal import journal
+from ..stock_index import LowStockIndex
+from ..forecasting import run_inventory_forecast, reorder_status, DEFAULT_LEAD_TIME_DAYS
+from ..ids import next_id, advance_past
 
 inventory_bp = Blueprint('inventory', __name__)
 
@@ -11,122 +19,454 @@ inventory_db = [
         "current_stock": 10,
         "minimum_stock": 5,
         "maximum_stock": 50,
-        "last_restock": "2024-01-15T10:30:00Z",
-        "movements": [
-            {"date": "2024-01-15T10:30:00Z", "type": "restock",
-                "quantity": 20, "new_stock": 30},
-            {"date": "2024-01-20T14:15:00Z", "type": "sale",
-                "quantity": -2, "new_stock": 28}
-        ]
+        "last_restock": "2024-01-15T10:30:00Z"
     }
 ]
 
+# Índice product_id -> registro de inventario
+inventory_index = {inv['product_id']: inv for inv in inventory_db}
+
+# Índice ordenado de stock bajo + alertas de reposición
+stock_index = LowStockIndex()
+for _inv in inventory_db:
+    stock_index.update(_inv['product_id'], _inv['current_stock'], _inv['minimum_stock'])
+
+# Serializa las actualizaciones de stock (individuales y en lote)
+_stock_lock = threading.Lock()
+
+
+def _load_inventory(records):
+    """Reconstruir inventario e índices desde el WAL/snapshot"""
+    with _stock_lock:
+        inventory_db[:] = sorted(records.values(), key=lambda inv: inv['id'])
+        inventory_index.clear()
+        for inv in inventory_db:
+            inventory_index[inv['product_id']] = inv
+            stock_index.update(inv['product_id'], inv['current_stock'], inv['minimum_stock'])
+        if inventory_db:
+            advance_past(inventory_db[-1]['id'])
+    _sync_products({inv['product_id']: inv['current_stock'] for inv in inventory_db})
+
+
+journal.register('inventory', lambda: {inv['product_id']: dict(inv) for inv in inventory_db},
+                 _load_inventory)
+
+# Último pronóstico de demanda por producto (se recalcula en lote)
+forecasts = {}
+
+BATCH_MODES = ["atomic", "per_item"]
+MOVEMENT_TYPES = ["sale", "restock"]
+MAX_BATCH_SIZE = 50000
+
+# Movimientos de inventario (log separado y acotado por SKU)
+movement_log = MovementLog()
+movement_log.append(1, Movement("2024-01-15T10:30:00Z", "restock", 20, 30))
+movement_log.append(1, Movement("2024-01-20T14:15:00Z", "sale", -2, 28))
+
 
 @inventory_bp.route('/product/<int:product_id>', methods=['GET'])
 def get_product_inventory(product_id):
     """Obtener inventario de un producto"""
-    inventory = next(
-        (inv for inv in inventory_db if inv['product_id'] == product_id), None)
+    inventory = _find_inventory(product_id)
 
     if not inventory:
         return jsonify({"error": "Inventario no encontrado"}), 404
 
-    return jsonify(inventory)
+    return jsonify({
+        **inventory,
+        "movements_count": movement_log.count(product_id)
+    })
 
 
-@inventory_bp.route('/update-stock', methods=['POST'])
-def update_stock():
-    """Actualizar stock (para ventas o restock)"""
-    data = request.json
+@inventory_bp.route('/product/<int:product_id>/movements', methods=['GET'])
+def get_product_movements(product_id):
+    """Obtener movimientos de un producto (paginados, más recientes primero)"""
+    limit = min(request.args.get('limit', type=int, default=50), 500)
+    before = request.args.get('before', type=int)
+
+    movements, next_cursor = movement_log.page(
+        product_id, before=before, limit=limit)
+
+    return jsonify({
+        "success": True,
+        "movements": [movement.serialize() for movement in movements],
+        "next_cursor": next_cursor,
+        "snapshot": movement_log.snapshot(product_id)
+    })
+
+
+def _missing_fields(data):
+    return not isinstance(data, dict) or 'product_id' not in data \
+        or 'quantity' not in data or 'type' not in data
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _movement_error(data):
+    """Error de validación de un movimiento, o None si es válido"""
+    if _missing_fields(data):
+        return "product_id, quantity y type son requeridos"
+    if not _is_int(data['product_id']):
+        return "product_id debe ser un entero"
+    if data['type'] not in MOVEMENT_TYPES:
+        return f"Tipo inválido. Opciones: {MOVEMENT_TYPES}"
+    if not _is_int(data['quantity']) or data['quantity'] <= 0:
+        return "quantity debe ser un entero positivo"
+    return None
 
-    if not data or 'product_id' not in data or 'quantity' not in data or 'type' not in data:
-        return jsonify({"error": "product_id, quantity y type son requeridos"}), 400
 
+def _find_inventory(product_id):
+    return inventory_index.get(product_id)
+
+
+def _create_inventory(product_id, data):
+    """Crear nuevo registro de inventario"""
+    inventory = {
+        "id": next_id(),
+        "product_id": product_id,
+        "current_stock": 0,
+        "minimum_stock": data.get('minimum_stock', 5),
+        "maximum_stock": data.get('maximum_stock', 100),
+        "lead_time_days": data.get('lead_time_days', DEFAULT_LEAD_TIME_DAYS),
+        "last_restock": None
+    }
+    inventory_db.append(inventory)
+    inventory_index[product_id] = inventory
+    return inventory
+
+
+def _apply_movement(data, now=None):
+    """
+    Aplicar un movimiento (venta o restock) sobre el inventario.
+    Devuelve (inventario, movimiento, error). Debe llamarse con _stock_lock.
+    """
     product_id = data['product_id']
     quantity = data['quantity']
     movement_type = data['type']  # 'sale' o 'restock'
+    now = now or now_epoch()
 
-    # Buscar inventario
-    inventory = next(
-        (inv for inv in inventory_db if inv['product_id'] == product_id), None)
-
-    if not inventory:
-        # Crear nuevo registro de inventario
-        inventory = {
-            "id": len(inventory_db) + 1,
-            "product_id": product_id,
-            "current_stock": quantity if movement_type == 'restock' else 0,
-            "minimum_stock": data.get('minimum_stock', 5),
-            "maximum_stock": data.get('maximum_stock', 100),
-            "last_restock": datetime.utcnow().isoformat() if movement_type == 'restock' else None,
-            "movements": []
-        }
-        inventory_db.append(inventory)
+    inventory = _find_inventory(product_id)
 
     # Calcular nuevo stock
+    current_stock = inventory['current_stock'] if inventory else 0
     if movement_type == 'sale':
-        if inventory['current_stock'] < quantity:
-            return jsonify({"error": "Stock insuficiente"}), 400
-        new_stock = inventory['current_stock'] - quantity
+        if current_stock < quantity:
+            return inventory, None, "Stock insuficiente"
+        new_stock = current_stock - quantity
     else:  # restock
-        new_stock = inventory['current_stock'] + quantity
+        new_stock = current_stock + quantity
+
+    if not inventory:
+        inventory = _create_inventory(product_id, data)
 
     # Actualizar stock
     inventory['current_stock'] = new_stock
+    stock_index.update(product_id, new_stock, inventory['minimum_stock'])
 
     if movement_type == 'restock':
-        inventory['last_restock'] = datetime.utcnow().isoformat()
+        inventory['last_restock'] = to_iso(now)
 
     # Registrar movimiento
-    movement = {
-        "date": datetime.utcnow().isoformat(),
-        "type": movement_type,
-        "quantity": quantity if movement_type == 'restock' else -quantity,
-        "new_stock": new_stock,
-        "reason": data.get('reason', ''),
-        "user_id": data.get('user_id')
-    }
+    movement = movement_log.append(product_id, Movement(
+        now, movement_type,
+        quantity if movement_type == 'restock' else -quantity,
+        new_stock, data.get('reason', ''), data.get('user_id')))
+
+    return inventory, movement, None
 
-    inventory['movements'].append(movement)
 
-    # También actualizar el producto en products_db
+def _sync_products(stock_by_product):
+    """Reflejar el stock nuevo en products_db"""
     from .products import products_db
-    product = next((p for p in products_db if p['id'] == product_id), None)
-    if product:
-        product['stock'] = new_stock
+
+    changed = False
+    for product in products_db:
+        if product['id'] in stock_by_product:
+            product['stock'] = stock_by_product[product['id']]
+            changed = True
+
+    if changed:
+        invalidate_cache('products')
+
+
+@inventory_bp.route('/update-stock', methods=['POST'])
+def update_stock():
+    """Actualizar stock (para ventas o restock)"""
+    data = request.json
+
+    error = _movement_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # El WAL y products_db se actualizan con el lock tomado, en el mismo orden
+    # que el inventario; la espera al disco, después de soltarlo
+    with journal.deferred_sync(), _stock_lock:
+        inventory, movement, error = _apply_movement(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        new_stock = inventory['current_stock']
+        journal.record('inventory', inventory['product_id'], inventory)
+
+        # También actualizar el producto en products_db
+        _sync_products({data['product_id']: new_stock})
 
     return jsonify({
         "success": True,
         "message": f"Stock actualizado: {new_stock} unidades",
-        "inventory": inventory
+        "inventory": inventory,
+        "movement": movement.serialize()
     })
 
 
+@inventory_bp.route('/update-stock/batch', methods=['POST'])
+def update_stock_batch():
+    """
+    Actualizar stock en lote (restocks masivos, sincronización de POS).
+    mode='atomic' (por defecto): se aplican todos los movimientos o ninguno.
+    mode='per_item': se aplica cada movimiento válido y se informa el resultado de cada uno.
+    """
+    data = request.json
+
+    if not data or not isinstance(data.get('movements'), list):
+        return jsonify({"error": "movements (lista) es requerido"}), 400
+
+    movements = data['movements']
+    mode = data.get('mode', 'atomic')
+
+    if mode not in BATCH_MODES:
+        return jsonify({"error": f"Modo inválido. Opciones: {BATCH_MODES}"}), 400
+
+    if len(movements) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Máximo {MAX_BATCH_SIZE} movimientos por lote"}), 400
+
+    results = []
+    stock_by_product = {}
+    now = now_epoch()
+
+    with journal.deferred_sync(), _stock_lock:
+        if mode == 'atomic':
+            # Validar todo el lote contra el stock proyectado antes de aplicar
+            errors = []
+            projected = {}
+            for index, item in enumerate(movements):
+                error = _movement_error(item)
+                if error:
+                    errors.append({"index": index, "error": error})
+                    continue
+
+                product_id = item['product_id']
+                if product_id not in projected:
+                    inventory = _find_inventory(product_id)
+                    projected[product_id] = inventory['current_stock'] if inventory else 0
+
+                if item['type'] == 'sale':
+                    if projected[product_id] < item['quantity']:
+                        errors.append({"index": index, "product_id": product_id,
+                                       "error": "Stock insuficiente"})
+                        continue
+                    projected[product_id] -= item['quantity']
+                else:
+                    projected[product_id] += item['quantity']
+
+            if errors:
+                return jsonify({
+                    "success": False,
+                    "mode": mode,
+                    "applied": 0,
+                    "errors": errors
+                }), 400
+
+        for index, item in enumerate(movements):
+            error = _movement_error(item)
+            if error:
+                results.append({"index": index, "success": False, "error": error})
+                continue
+
+            inventory, movement, error = _apply_movement(item, now)
+            if error:
+                results.append({"index": index, "success": False,
+                                "product_id": item['product_id'], "error": error})
+                continue
+
+            stock_by_product[item['product_id']] = inventory['current_stock']
+            results.append({"index": index, "success": True,
+                            "product_id": item['product_id'], "movement": movement.serialize()})
+
+        journal.record_many('inventory', ((product_id, inventory_index[product_id])
+                                          for product_id in stock_by_product))
+        _sync_products(stock_by_product)
+
+    applied = sum(1 for r in results if r['success'])
+
+    return jsonify({
+        "success": applied == len(movements),
+        "mode": mode,
+        "applied": applied,
+        "failed": len(movements) - applied,
+        "results": results
+    })
+
+
+def reserve_stock(quantities, reason="", user_id=None):
+    """
+    Descontar stock de varios productos {product_id: cantidad} en una sola
+    operación, todo o nada (p. ej. al confirmar una compra). Un producto sin
+    registro de inventario parte del stock del catálogo. Devuelve la lista de
+    errores por producto; vacía si se descontó todo.
+    """
+    from .products import products_index
+
+    now = now_epoch()
+    with journal.deferred_sync(), _stock_lock:
+        errors = []
+        for product_id, quantity in quantities.items():
+            inventory = _find_inventory(product_id)
+            if inventory:
+                available = inventory['current_stock']
+            else:
+                available = products_index.get(product_id, {}).get('stock', 0)
+            if available < quantity:
+                errors.append({"product_id": product_id, "error": "Stock insuficiente",
+                               "available_stock": available})
+        if errors:
+            return errors
+
+        for product_id, quantity in quantities.items():
+            if not _find_inventory(product_id):
+                inventory = _create_inventory(product_id, {})
+                inventory['current_stock'] = products_index.get(product_id, {}).get('stock', 0)
+            _apply_movement({"product_id": product_id, "quantity": quantity, "type": "sale",
+                             "reason": reason, "user_id": user_id}, now)
+
+        journal.record_many('inventory', ((product_id, inventory_index[product_id])
+                                          for product_id in quantities))
+        _sync_products({product_id: inventory_index[product_id]['current_stock']
+                        for product_id in quantities})
+    return []
+
+
+def release_stock(quantities, reason=""):
+    """Devolver al inventario stock reservado con reserve_stock (orden cancelada)"""
+    now = now_epoch()
+    with journal.deferred_sync(), _stock_lock:
+        for product_id, quantity in quantities.items():
+            _apply_movement({"product_id": product_id, "quantity": quantity,
+                             "type": "restock", "reason": reason}, now)
+
+        journal.record_many('inventory', ((product_id, inventory_index[product_id])
+                                          for product_id in quantities))
+        _sync_products({product_id: inventory_index[product_id]['current_stock']
+                        for product_id in quantities})
+
+
 @inventory_bp.route('/low-stock', methods=['GET'])
 def get_low_stock():
     """Obtener productos con stock bajo"""
     threshold = request.args.get('threshold', type=int, default=10)
+    below_minimum = request.args.get('below_minimum', 'false').lower() == 'true'
+
+    from .products import products_db
+    products_by_id = {p['id']: p for p in products_db}
+
+    if below_minimum:
+        product_ids = stock_index.below_minimum()
+    else:
+        product_ids = stock_index.below(threshold)
 
     low_stock_items = []
 
-    for inventory in inventory_db:
-        if inventory['current_stock'] <= threshold:
-            # Obtener info del producto
-            from .products import products_db
-            product = next(
-                (p for p in products_db if p['id'] == inventory['product_id']), None)
-
-            if product:
-                low_stock_items.append({
-                    "product_id": inventory['product_id'],
-                    "product_name": product.get('name', 'Desconocido'),
-                    "current_stock": inventory['current_stock'],
-                    "minimum_stock": inventory['minimum_stock'],
-                    "reorder_quantity": inventory['maximum_stock'] - inventory['current_stock']
-                })
+    for product_id in product_ids:
+        inventory = inventory_index[product_id]
+        product = products_by_id.get(product_id)
+
+        if product:
+            forecast = forecasts.get(product_id)
+            if forecast:
+                reorder_quantity = reorder_status(forecast, inventory['current_stock'])['reorder_quantity']
+            else:
+                reorder_quantity = inventory['maximum_stock'] - inventory['current_stock']
+
+            low_stock_items.append({
+                "product_id": product_id,
+                "product_name": product.get('name', 'Desconocido'),
+                "current_stock": inventory['current_stock'],
+                "minimum_stock": inventory['minimum_stock'],
+                "reorder_quantity": reorder_quantity
+            })
 
     return jsonify({
         "success": True,
         "low_stock_items": low_stock_items,
         "threshold": threshold
     })
+
+
+@inventory_bp.route('/reorder-alerts', methods=['GET'])
+def get_reorder_alerts():
+    """Alertas de reposición (productos que cruzaron su stock mínimo)"""
+    limit = request.args.get('limit', type=int, default=50)
+    alerts = list(stock_index.alerts)[-limit:] if limit > 0 else []
+
+    return jsonify({
+        "success": True,
+        "alerts": alerts[::-1]
+    })
+
+
+def refresh_forecasts():
+    """Recalcular el pronóstico de demanda de todo el inventario"""
+    with _stock_lock:
+        records = [dict(inv) for inv in inventory_db]
+    new_forecasts = run_inventory_forecast(records, movement_log)
+    forecasts.clear()
+    forecasts.update(new_forecasts)
+    return len(new_forecasts)
+
+
+def start_forecast_scheduler(interval_seconds):
+    """Recalcular el pronóstico periódicamente en un hilo de fondo"""
+    def loop():
+        while True:
+            try:
+                refresh_forecasts()
+            except Exception as e:
+                print(f"⚠️  Error calculando pronóstico de inventario: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=loop, name='inventory-forecast', daemon=True)
+    thread.start()
+    return thread
+
+
+@inventory_bp.route('/forecast/run', methods=['POST'])
+def run_forecast():
+    """Ejecutar el pronóstico de demanda en lote"""
+    started = time.perf_counter()
+    count = refresh_forecasts()
+
+    return jsonify({
+        "success": True,
+        "products": count,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
+
+
+@inventory_bp.route('/forecast/<int:product_id>', methods=['GET'])
+def get_product_forecast(product_id):
+    """Obtener el último pronóstico de demanda de un producto"""
+    forecast = forecasts.get(product_id)
+    inventory = _find_inventory(product_id)
+
+    if not forecast or not inventory:
+        return jsonify({"error": "Pronóstico no disponible"}), 404
+
+    # La demanda es la del último lote; la cantidad a pedir, con el stock de ahora
+    current_stock = inventory['current_stock']
+    return jsonify({
+        "success": True,
+        "forecast": {**forecast, "current_stock": current_stock,
+                     **reorder_status(forecast, current_stock)}
+    })
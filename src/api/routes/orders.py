@@ -1,26 +1,90 @@
 from flask import Blueprint, jsonify, request
 from .payments import payments_bp
-from datetime import datetime, timedelta
 import random
+import time
+from ..cart_totals import shipping_cents, tax_cents, to_cents
+from ..pricing import price_items, PricingError
+from ..records import Order, OrderItem, now_epoch, to_iso
+from ..journal import journal
+from .cart import checkout_cart
+from .inventory import reserve_stock, release_stock
+from ..order_states import (OrderStateMachine, InvalidTransition, ORDER_TRANSITIONS,
+                            ORDER_STATUSES, ORDER_STATUS_ALIASES)
+from ..ids import next_id, advance_past
+from ..sample_data import sample_orders
+from .auth import account_business_id
 
 orders_bp = Blueprint('orders', __name__)
 
 # Base de datos de órdenes en memoria
 orders_db = []
-order_counter = 1000
 
-# Estados posibles de órdenes
-ORDER_STATUSES = [
-    "pending",       # Pendiente de pago
-    "processing",    # Procesando
-    "shipped",       # Enviado
-    "delivered",     # Entregado
-    "cancelled"      # Cancelado
-]
+# Índices por estado + stream de transiciones (ver api/order_states.py);
+# "pending" es el nombre anterior de pending_payment
+order_states = OrderStateMachine(ORDER_TRANSITIONS, aliases=ORDER_STATUS_ALIASES)
 
 # Métodos de pago
 PAYMENT_METHODS = ["credit_card", "debit_card", "paypal", "bank_transfer"]
 
+# Máximo de órdenes de ejemplo por request (más: flask generate-sample-orders)
+MAX_SAMPLE_ORDERS = 100000
+
+
+def _load_orders(orders):
+    """Reconstruir orders_db desde el WAL/snapshot"""
+    orders_db[:] = sorted(orders.values(), key=lambda o: o.id)
+    if orders_db:
+        advance_past(orders_db[-1].id)
+    order_states.clear()
+    order_states.load(orders_db)
+
+
+journal.register('orders', lambda: {o.id: o for o in orders_db}, _load_orders)
+
+# Órdenes con stock descontado en el checkout: se devuelve si se cancelan
+# y se da por consumido al enviarse
+stock_holds = set()
+
+
+def _load_stock_holds(holds):
+    stock_holds.clear()
+    stock_holds.update(holds)
+
+
+journal.register('stock_holds', lambda: dict.fromkeys(stock_holds, True), _load_stock_holds)
+
+
+def hold_stock(order):
+    """Registrar que el stock de la orden ya se descontó (ver reserve_stock)"""
+    stock_holds.add(order.id)
+    journal.record('stock_holds', order.id, True)
+
+
+def _settle_stock_hold(order, release):
+    """Cerrar la retención de stock de la orden (si tiene); release la devuelve al inventario"""
+    try:
+        stock_holds.remove(order.id)
+    except KeyError:
+        return
+    journal.record('stock_holds', order.id, None)
+
+    if release:
+        quantities = {}
+        for item in order.items:
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        release_stock(quantities, reason=f"Cancelación {order.order_number}")
+
+
+def _on_status_change(event):
+    # Stock retenido en el checkout: consumido al enviar, devuelto al cancelar
+    if event.to_status in ('shipped', 'delivered', 'cancelled'):
+        order = order_states.get(event.order_id)
+        if order is not None:
+            _settle_stock_hold(order, release=event.to_status == 'cancelled')
+
+
+order_states.subscribe(_on_status_change)
+
 
 @orders_bp.route('/', methods=['GET'])
 def get_orders():
@@ -29,18 +93,15 @@ def get_orders():
     status = request.args.get('status')
     limit = request.args.get('limit', type=int, default=20)
 
-    filtered_orders = orders_db
+    # Con status se parte del índice del estado (O(k)) en lugar de todas las órdenes
+    filtered_orders = order_states.orders(status) if status else orders_db
 
     if user_id:
         filtered_orders = [
-            order for order in filtered_orders if order['user_id'] == user_id]
-
-    if status:
-        filtered_orders = [
-            order for order in filtered_orders if order['status'] == status]
+            order for order in filtered_orders if order.user_id == user_id]
 
     # Ordenar por fecha más reciente
-    filtered_orders.sort(key=lambda x: x['created_at'], reverse=True)
+    filtered_orders.sort(key=lambda x: x.created_at, reverse=True)
 
     # Limitar resultados
     filtered_orders = filtered_orders[:limit]
@@ -48,25 +109,53 @@ def get_orders():
     return jsonify({
         "success": True,
         "count": len(filtered_orders),
-        "orders": filtered_orders
+        "orders": [order.serialize() for order in filtered_orders]
     })
 
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 def get_order(order_id):
     """Obtener una orden específica"""
-    order = next(
-        (order for order in orders_db if order['id'] == order_id), None)
+    order = order_states.get(order_id)
 
     if not order:
         return jsonify({"error": "Orden no encontrada"}), 404
 
     return jsonify({
         "success": True,
-        "order": order
+        "order": order.serialize()
     })
 
 
+def create_order_record(user_id, items, subtotal, data):
+    """Registrar una orden con líneas ya valoradas por el servidor"""
+    # El envío también lo calcula el servidor: el 'shipping' del cliente se ignora.
+    # Mismas reglas que el resumen del carrito (ver cart_totals)
+    subtotal_cents = to_cents(subtotal)
+    shipping_total = shipping_cents(subtotal_cents)
+    tax_total = tax_cents(subtotal_cents)
+    shipping = shipping_total / 100
+    tax = tax_total / 100
+    total = (subtotal_cents + shipping_total + tax_total) / 100
+
+    now = now_epoch()
+    new_order = Order(
+        next_id(), user_id, [OrderItem.from_line(line) for line in items],
+        subtotal, shipping, tax, total,
+        "pending_payment",  # Nuevo estado
+        data.get('payment_method', 'credit_card'),
+        shipping_address=data.get('shipping_address'),
+        billing_address=data.get('billing_address'),
+        customer_notes=data.get('customer_notes', ""),
+        created_at=now,
+        estimated_delivery=now + random.randint(3, 7) * 86400)
+
+    orders_db.append(new_order)
+    order_states.add(new_order)
+    journal.record('orders', new_order.id, new_order)
+    return new_order
+
+
 @orders_bp.route('/', methods=['POST'])
 def create_order():
     """Crear una nueva orden desde el carrito"""
@@ -81,60 +170,96 @@ def create_order():
     if not items:
         return jsonify({"error": "El carrito está vacío"}), 400
 
-    # 1. VERIFICAR STOCK ANTES DE CREAR LA ORDEN
-    for item in items:
-        # En producción, verificar contra base de datos real
-        if item.get('quantity', 1) > item.get('available_stock', 0):
-            return jsonify({
-                "error": f"Stock insuficiente para {item.get('name', 'producto')}",
-                "product_id": item.get('product_id')
-            }), 400
-
-    # 2. Calcular totales
-    subtotal = sum(item.get('price', 0) * item.get('quantity', 1)
-                   for item in items)
-    shipping = data.get('shipping', 10.00 if subtotal < 100 else 0)
-    tax = round(subtotal * 0.08, 2)
-    total = subtotal + shipping + tax
-
-    global order_counter
-    order_counter += 1
-
-    # 3. Crear nueva orden
-    new_order = {
-        "id": order_counter,
-        "order_number": f"ORD-{datetime.now().strftime('%Y%m%d')}-{order_counter:04d}",
-        "user_id": user_id,
-        "items": items,
-        "subtotal": subtotal,
-        "shipping": shipping,
-        "tax": tax,
-        "total": total,
-        "status": "pending_payment",  # Nuevo estado
-        "payment_method": data.get('payment_method', 'credit_card'),
-        "payment_status": "pending",
-        "payment_id": None,
-        "shipping_address": data.get('shipping_address', {}),
-        "billing_address": data.get('billing_address', {}),
-        "customer_notes": data.get('customer_notes', ""),
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
-        "estimated_delivery": (datetime.utcnow() + timedelta(days=random.randint(3, 7))).isoformat()
-    }
-
-    orders_db.append(new_order)
-
-    # 4. Retornar datos para pago
+    # 1. Valorar las líneas contra el catálogo y verificar stock
+    # (los precios y el stock enviados por el cliente se ignoran)
+    try:
+        priced = price_items(items, account_business_id(user_id), check_stock=True)
+    except PricingError as e:
+        return jsonify({
+            "error": "No se pudo crear la orden",
+            "details": e.errors
+        }), 400
+
+    # 2. Crear nueva orden
+    new_order = create_order_record(
+        user_id, priced['lines'], priced['subtotal'], data)
+
+    # 3. Retornar datos para pago
+    return _order_created(new_order)
+
+
+def create_held_order(user_id, items, subtotal, data, quantities, reason):
+    """
+    Crear la orden para el stock que ya se descontó con reserve_stock(quantities)
+    y retenerlo. Si algo falla, el stock vuelve al inventario antes de propagar
+    el error: nunca queda descontado sin una orden que lo retenga.
+    """
+    try:
+        order = create_order_record(user_id, items, subtotal, data)
+        hold_stock(order)
+    except Exception:
+        release_stock(quantities, reason=f"Reversión: {reason}")
+        raise
+    return order
+
+
+def _order_created(order):
     return jsonify({
         "success": True,
         "message": "Orden creada, proceder al pago",
-        "order": new_order,
+        "order": order.serialize(),
         "payment_required": True,
-        "payment_amount": total,
+        "payment_amount": order.total,
         "payment_endpoint": "/api/payments/create-payment"
     }), 201
 
 
+@orders_bp.route('/checkout', methods=['POST'])
+def checkout():
+    """
+    Crear la orden desde el carrito del usuario guardado en el servidor. Las
+    líneas se valoran en una pasada, el stock se descuenta y el carrito se
+    vacía en la misma operación; el cliente solo envía user_id y los datos de
+    pago y envío.
+    """
+    data = request.json
+
+    if not data or 'user_id' not in data:
+        return jsonify({"error": "user_id es requerido"}), 400
+
+    user_id = data['user_id']
+
+    def place_order(cart_items):
+        if not cart_items:
+            return None, ({"error": "El carrito está vacío"}, 400)
+
+        # 1. Valorar todas las líneas contra el catálogo
+        try:
+            priced = price_items(
+                [{"product_id": item.product_id, "quantity": item.quantity} for item in cart_items],
+                account_business_id(user_id))
+        except PricingError as e:
+            return None, ({"error": "No se pudo crear la orden", "details": e.errors}, 400)
+
+        # 2. Descontar el stock de todas las líneas (todo o nada)
+        quantities = {line['product_id']: line['quantity'] for line in priced['lines']}
+        errors = reserve_stock(quantities, reason="Checkout", user_id=user_id)
+        if errors:
+            return None, ({"error": "No se pudo crear la orden", "details": errors}, 400)
+
+        # 3. Crear la orden
+        order = create_held_order(user_id, priced['lines'], priced['subtotal'], data,
+                                  quantities, reason="Checkout")
+        return order, None
+
+    order, error = checkout_cart(user_id, place_order)
+    if error:
+        body, status = error
+        return jsonify(body), status
+
+    return _order_created(order)
+
+
 @orders_bp.route('/<int:order_id>/status', methods=['PUT'])
 def update_order_status(order_id):
     """Actualizar el estado de una orden"""
@@ -149,25 +274,32 @@ def update_order_status(order_id):
         return jsonify({"error": f"Estado inválido. Opciones: {ORDER_STATUSES}"}), 400
 
     # Buscar la orden
-    order = next(
-        (order for order in orders_db if order['id'] == order_id), None)
+    order = order_states.get(order_id)
 
     if not order:
         return jsonify({"error": "Orden no encontrada"}), 404
 
-    # Actualizar estado
-    order['status'] = new_status
-    order['updated_at'] = datetime.utcnow().isoformat()
+    # Actualizar estado (solo transiciones permitidas)
+    try:
+        order_states.transition(order, new_status)
+    except InvalidTransition as e:
+        return jsonify({"error": str(e), "allowed": e.allowed}), 400
 
-    # Si se marca como enviado, agregar tracking
+    # Fechas de envío / entrega / cancelación
     if new_status == 'shipped':
-        order['tracking_number'] = f"TRK-{random.randint(1000000000, 9999999999)}"
-        order['shipped_at'] = datetime.utcnow().isoformat()
+        order.tracking_number = f"TRK-{random.randint(1000000000, 9999999999)}"
+        order.shipped_at = order.updated_at
+    elif new_status == 'delivered':
+        order.delivered_at = order.updated_at
+    elif new_status == 'cancelled':
+        order.cancelled_at = order.updated_at
+
+    journal.record('orders', order.id, order)
 
     return jsonify({
         "success": True,
         "message": f"Estado actualizado a '{new_status}'",
-        "order": order
+        "order": order.serialize()
     })
 
 
@@ -176,27 +308,26 @@ def cancel_order(order_id):
     """Cancelar una orden"""
 
     # Buscar la orden
-    order = next(
-        (order for order in orders_db if order['id'] == order_id), None)
+    order = order_states.get(order_id)
 
     if not order:
         return jsonify({"error": "Orden no encontrada"}), 404
 
-    # Verificar si se puede cancelar
-    if order['status'] in ['shipped', 'delivered']:
-        return jsonify({"error": "No se puede cancelar una orden ya enviada o entregada"}), 400
+    # Actualizar estado (no se cancela una orden enviada, entregada o ya cancelada)
+    try:
+        order_states.transition(order, 'cancelled')
+    except InvalidTransition:
+        return jsonify({"error": f"No se puede cancelar una orden en estado '{order.status}'"}), 400
 
-    # Actualizar estado
-    order['status'] = 'cancelled'
-    order['updated_at'] = datetime.utcnow().isoformat()
-    order['cancelled_at'] = datetime.utcnow().isoformat()
-    order['cancellation_reason'] = request.json.get(
+    order.cancelled_at = order.updated_at
+    order.cancellation_reason = (request.json or {}).get(
         'reason', 'Solicitud del cliente')
+    journal.record('orders', order.id, order)
 
     return jsonify({
         "success": True,
         "message": "Orden cancelada exitosamente",
-        "order": order
+        "order": order.serialize()
     })
 
 
@@ -204,7 +335,7 @@ def cancel_order(order_id):
 def get_user_orders_summary(user_id):
     """Obtener resumen de órdenes del usuario"""
 
-    user_orders = [order for order in orders_db if order['user_id'] == user_id]
+    user_orders = [order for order in orders_db if order.user_id == user_id]
 
     if not user_orders:
         return jsonify({
@@ -217,14 +348,14 @@ def get_user_orders_summary(user_id):
             }
         })
 
-    total_spent = sum(order['total'] for order in user_orders)
+    total_spent = sum(order.total for order in user_orders)
     avg_order_value = total_spent / len(user_orders)
-    last_order = max(user_orders, key=lambda x: x['created_at'])
+    last_order = max(user_orders, key=lambda x: x.created_at)
 
     # Contar por estado
     status_counts = {}
     for order in user_orders:
-        status = order['status']
+        status = order.status
         status_counts[status] = status_counts.get(status, 0) + 1
 
     return jsonify({
@@ -233,76 +364,93 @@ def get_user_orders_summary(user_id):
             "total_orders": len(user_orders),
             "total_spent": total_spent,
             "avg_order_value": avg_order_value,
-            "last_order_date": last_order['created_at'],
+            "last_order_date": to_iso(last_order.created_at),
             "status_counts": status_counts
         }
     })
 
 
+def add_orders(orders, record=True):
+    """
+    Agregar órdenes ya armadas (datos de ejemplo) a orders_db e índices.
+    record=False no las escribe una por una en el WAL (un snapshot después las guarda).
+    """
+    orders_db.extend(orders)
+    order_states.load(orders)
+    if record:
+        journal.record_many('orders', ((o.id, o) for o in orders))
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
 @orders_bp.route('/generate-sample', methods=['POST'])
 def generate_sample_orders():
-    """Generar órdenes de ejemplo (solo para desarrollo)"""
-    user_id = request.json.get('user_id', 1)
-    count = request.json.get('count', 5)
-
-    sample_products = [
-        {"id": 1, "name": "Producto Premium", "price": 150.00},
-        {"id": 2, "name": "Producto Básico", "price": 89.99},
-        {"id": 3, "name": "Producto Eco", "price": 120.50},
-        {"id": 4, "name": "Accesorio", "price": 29.99}
-    ]
-
-    global order_counter
-
-    for i in range(count):
-        order_counter += 1
-
-        # Seleccionar productos aleatorios
-        num_items = random.randint(1, 3)
-        items = []
-        for _ in range(num_items):
-            product = random.choice(sample_products)
-            items.append({
-                "product_id": product["id"],
-                "name": product["name"],
-                "price": product["price"],
-                "quantity": random.randint(1, 3)
-            })
-
-        subtotal = sum(item['price'] * item['quantity'] for item in items)
-        shipping = 0 if subtotal > 100 else 10
-        tax = round(subtotal * 0.08, 2)
-
-        # Fecha aleatoria en los últimos 60 días
-        days_ago = random.randint(0, 60)
-        order_date = datetime.utcnow() - timedelta(days=days_ago)
-
-        new_order = {
-            "id": order_counter,
-            "order_number": f"ORD-{order_date.strftime('%Y%m%d')}-{order_counter:04d}",
-            "user_id": user_id,
-            "items": items,
-            "subtotal": subtotal,
-            "shipping": shipping,
-            "tax": tax,
-            "total": subtotal + shipping + tax,
-            "status": random.choice(ORDER_STATUSES),
-            "payment_method": random.choice(PAYMENT_METHODS),
-            "payment_status": "completed",
-            "created_at": order_date.isoformat(),
-            "updated_at": order_date.isoformat(),
-            "estimated_delivery": (order_date + timedelta(days=random.randint(3, 7))).isoformat()
-        }
+    """
+    Generar órdenes de ejemplo (solo para desarrollo). Body opcional:
+    count, user_id (un solo cliente) o users (clientes 1..users), days, seed.
+    Para millones de órdenes fuera de un request: flask generate-sample-orders.
+    """
+    data = request.json or {}
+    count = data.get('count', 5)
+    if not _is_int(count) or not 0 <= count <= MAX_SAMPLE_ORDERS:
+        return jsonify({"error": f"count debe ser un entero entre 0 y {MAX_SAMPLE_ORDERS}"}), 400
+
+    days = data.get('days', 60)
+    if not _is_int(days) or days < 0:
+        return jsonify({"error": "days debe ser un entero no negativo"}), 400
+
+    seed = data.get('seed')
+    if seed is not None and (not _is_int(seed) or seed < 0):
+        return jsonify({"error": "seed debe ser un entero no negativo"}), 400
+
+    users = data['users'] if 'users' in data else [data.get('user_id', 1)]
+    if _is_int(users):
+        valid_users = users > 0
+    else:
+        valid_users = isinstance(users, list) and users and all(_is_int(u) for u in users)
+    if not valid_users:
+        return jsonify({"error": "users debe ser un entero positivo o una lista de user_id"}), 400
+
+    started = time.perf_counter()
+    orders = sample_orders(count, users=users, days=days, seed=seed)
+    add_orders(orders)
+
+    return jsonify({
+        "success": True,
+        "message": f"Generadas {count} órdenes de ejemplo",
+        "generated_orders": count,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
 
-        # Si está entregado, agregar fecha de entrega
-        if new_order['status'] == 'delivered':
-            new_order['delivered_at'] = (
-                order_date + timedelta(days=random.randint(2, 5))).isoformat()
 
-        orders_db.append(new_order)
+@orders_bp.route('/events', methods=['GET'])
+def get_order_events():
+    """
+    Transiciones de estado posteriores al cursor `after` (seq), para consumir
+    incrementalmente. Si stream_id cambia, el proceso se reinició y hay que
+    reconstruir desde /status-counts.
+    """
+    after = request.args.get('after', type=int, default=0)
+    limit = min(request.args.get('limit', type=int, default=100), 1000)
+
+    page = order_states.events_after(after, limit)
 
     return jsonify({
         "success": True,
-        "message": f"Generadas {count} órdenes de ejemplo",
-        "generated_orders": count
+        "stream_id": order_states.stream_id,
+        "events": [event.serialize() for event in page['events']],
+        "next_cursor": page['next_cursor'],
+        "truncated": page['truncated']
+    })
+
+
+@orders_bp.route('/status-counts', methods=['GET'])
+def get_order_status_counts():
+    """Cantidad de órdenes por estado (desde los índices, sin recorrer las órdenes)"""
+    return jsonify({
+        "success": True,
+        "counts": order_states.counts(),
+        "transitions": ORDER_TRANSITIONS
     })
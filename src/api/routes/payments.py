@@ -1,50 +1,237 @@
 from flask import Blueprint, jsonify, request
-from datetime import datetime
-import random
+import json
+import os
+import urllib.request
+from ..journal import journal
+from ..order_states import InvalidTransition
+from ..payment_queue import PaymentInProgress, PaymentQueue
+from ..webhook_ingest import WebhookIngestor, SIGNATURE_HEADER, sign_payload
 
 payments_bp = Blueprint('payments', __name__)
 
 
+def handle_payment_event(event):
+    """Aplicar un evento de pago a su orden; devuelve la orden (o None)"""
+    from .orders import order_states
+
+    payment = event.get('payment') or {}
+    order = order_states.get(payment.get('order_id'))
+
+    if not order:
+        return None
+
+    order.set_payment(payment.get('payment_id'), payment.get('status'))
+    if payment.get('status') == 'completed' and order.status == 'pending_payment':
+        try:
+            order_states.transition(order, 'processing', order.updated_at)
+        except InvalidTransition:
+            pass  # otro evento (o una cancelación) ya la cambió de estado
+    return order
+
+
+def apply_payment_events(events):
+    """Aplicar un lote de eventos de pago (un solo registro en el WAL por lote)"""
+    updated = {}
+    for event in events:
+        order = handle_payment_event(event)
+        if order is not None:
+            updated[order.id] = order
+    journal.record_many('orders', updated.items())
+
+
+# Cola local de webhooks: verificación, deduplicación y aplicación en lotes.
+# PAYMENT_WEBHOOK_ALLOW_UNSIGNED=1 acepta webhooks sin firma (solo desarrollo)
+webhook_ingestor = WebhookIngestor(
+    apply_payment_events,
+    path=os.environ.get('WEBHOOK_QUEUE_PATH'),
+    secret=os.environ.get('PAYMENT_WEBHOOK_SECRET'),
+    allow_unsigned=os.environ.get('PAYMENT_WEBHOOK_ALLOW_UNSIGNED', '').lower() in ('1', 'true'))
+
+if not webhook_ingestor.configured:
+    print("⚠️  PAYMENT_WEBHOOK_SECRET no configurado: /api/payments/webhook responde 503")
+
+
+def _deliver_webhook(event):
+    """Entregar el resultado del pago por el webhook (HTTP si hay URL configurada)"""
+    webhook_url = os.environ.get('PAYMENT_WEBHOOK_URL')
+    if not webhook_url:
+        webhook_ingestor.ingest(event)
+        return
+
+    body = json.dumps(event).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    if webhook_ingestor.secret:
+        headers[SIGNATURE_HEADER] = sign_payload(body, webhook_ingestor.secret)
+
+    req = urllib.request.Request(webhook_url, data=body, headers=headers, method='POST')
+    with urllib.request.urlopen(req, timeout=10) as response:
+        response.read()
+
+
+PAYMENT_WAIT_TIMEOUT = 30
+
+# Cola de pagos asíncrona (hilos de trabajo + pasarela simulada)
+payment_queue = PaymentQueue(deliver=_deliver_webhook)
+
+
+def payment_for_order(data):
+    """
+    Armar el pago a partir de la orden: el monto es el total calculado en el
+    servidor, nunca el enviado por el cliente. Devuelve (payment, None) o
+    (None, (body, status)) si la orden no existe o no admite el pago.
+    """
+    from .orders import order_states
+
+    order = order_states.get(data['order_id'])
+    if not order:
+        return None, ({"error": "Orden no encontrada"}, 404)
+
+    if order.status != 'pending_payment' or order.payment_status == 'completed':
+        return None, ({"error": f"La orden no admite pagos (estado '{order.status}')"}, 409)
+
+    if 'amount' in data and data['amount'] != order.total:
+        return None, ({"error": "amount no coincide con el total de la orden",
+                       "amount": order.total}, 400)
+
+    payment = {key: data[key] for key in ('currency', 'payment_method') if key in data}
+    payment.update(order_id=order.id, amount=order.total)
+    return payment, None
+
+
+def idempotent_job(idempotency_key, order_id):
+    """
+    Trabajo ya registrado con la clave de idempotencia (None si no hay). Lanza
+    ValueError si la clave se usó para otra orden.
+    """
+    if not idempotency_key:
+        return None
+    job = payment_queue.idempotency.get(idempotency_key)
+    if job is not None and job['payment']['order_id'] != order_id:
+        raise ValueError("La clave de idempotencia ya se usó con otro payload")
+    return job
+
+
+def payment_job_response(job, created=True):
+    if job['status'] in ('completed', 'failed'):
+        message = "Pago completado" if job['status'] == 'completed' else "Pago fallido"
+    elif created:
+        message = "Pago en proceso"
+    else:
+        message = "Pago ya registrado con esta clave de idempotencia"
+
+    return {
+        "success": job['status'] != 'failed',
+        "message": message,
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "payment": job['payment'],
+        "status_endpoint": f"/api/payments/jobs/{job['job_id']}"
+    }
+
+
+def payment_conflict_response(error):
+    """409 con el trabajo que ya cobra (o cobró) la orden"""
+    return {
+        "error": str(error),
+        "job_id": error.job['job_id'],
+        "status": error.job['status'],
+        "status_endpoint": f"/api/payments/jobs/{error.job['job_id']}"
+    }
+
+
 @payments_bp.route('/create-payment', methods=['POST'])
 def create_payment():
-    """Crear una transacción de pago"""
+    """Encolar una transacción de pago (202 con el id del trabajo; con wait=true, 200 con el resultado)"""
     data = request.json
 
-    if not data or 'order_id' not in data or 'amount' not in data:
-        return jsonify({"error": "order_id y amount son requeridos"}), 400
-
-    # Simular procesamiento de pago (80% éxito, 20% fallo)
-    is_successful = random.random() > 0.2
-
-    payment_data = {
-        "payment_id": f"PAY-{datetime.now().strftime('%Y%m%d')}-{random.randint(1000, 9999)}",
-        "order_id": data['order_id'],
-        "amount": data['amount'],
-        "currency": "USD",
-        "status": "completed" if is_successful else "failed",
-        "payment_method": data.get('payment_method', 'credit_card'),
-        "created_at": datetime.utcnow().isoformat(),
-        "transaction_id": f"TXN{random.randint(1000000000, 9999999999)}" if is_successful else None
-    }
+    if not data or 'order_id' not in data:
+        return jsonify({"error": "order_id es requerido"}), 400
+
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+    # Reintento con la misma clave: el resultado guardado, aunque la orden ya esté pagada
+    try:
+        job = idempotent_job(idempotency_key, data['order_id'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if job is not None:
+        status = 200 if job['status'] in ('completed', 'failed') else 202
+        return jsonify(payment_job_response(job, created=False)), status
+
+    payment, error = payment_for_order(data)
+    if error:
+        body, status = error
+        return jsonify(body), status
+
+    try:
+        job, created = payment_queue.submit(payment, idempotency_key)
+    except PaymentInProgress as e:
+        return jsonify(payment_conflict_response(e)), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+
+    # wait=true: esperar el resultado de la pasarela (ocupa el worker; ver asgi.py)
+    if data.get('wait') or request.args.get('wait') == 'true':
+        job = payment_queue.wait(job, timeout=PAYMENT_WAIT_TIMEOUT)
+        if job['status'] in ('completed', 'failed'):
+            return jsonify(payment_job_response(job, created)), 200
+
+    return jsonify(payment_job_response(job, created)), 202
+
+
+@payments_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_payment_job(job_id):
+    """Consultar el estado de un trabajo de pago"""
+    job = payment_queue.get(job_id)
+
+    if not job:
+        return jsonify({"error": "Trabajo de pago no encontrado"}), 404
 
     return jsonify({
-        "success": is_successful,
-        "message": "Pago completado" if is_successful else "Pago fallido",
-        "payment": payment_data
+        "success": True,
+        "job": job
     })
 
 
 @payments_bp.route('/webhook', methods=['POST'])
 def payment_webhook():
-    """Webhook para notificaciones de pago (simulado)"""
+    """Webhook para notificaciones de pago (se confirma al quedar en la cola y se aplica en lote)"""
     # En producción, esto vendría de PayPal/Stripe/MercadoPago
-    webhook_data = request.json
+    body = request.get_data()
+
+    if not webhook_ingestor.configured:
+        return jsonify({"error": "Webhook de pagos sin configurar"}), 503
+
+    if not webhook_ingestor.verify(body, request.headers.get(SIGNATURE_HEADER)):
+        return jsonify({"error": "Firma inválida"}), 401
+
+    try:
+        webhook_data = json.loads(body)
+    except ValueError:
+        webhook_data = None
+
+    if not isinstance(webhook_data, dict):
+        return jsonify({"error": "Evento inválido"}), 400
+
+    # 202 solo con el evento ya en disco: si no se pudo guardar, la pasarela reintenta
+    try:
+        status = webhook_ingestor.ingest(webhook_data)
+    except OSError:
+        return jsonify({"error": "No se pudo guardar el evento"}), 503
+
+    return jsonify({
+        "success": True,
+        "message": "Webhook recibido",
+        "status": status
+    }), 202
 
-    print(f"Webhook recibido: {webhook_data}")
 
+@payments_bp.route('/webhook/stats', methods=['GET'])
+def get_webhook_stats():
+    """Estadísticas de la ingesta de webhooks"""
     return jsonify({
         "success": True,
-        "message": "Webhook procesado"
+        "stats": {**webhook_ingestor.stats, "pending": webhook_ingestor.pending()}
     })
 
 
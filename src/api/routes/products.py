@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
+from ..compression import cached_response, invalidate_cache
 
 products_bp = Blueprint('products', __name__)
 
@@ -43,8 +44,12 @@ products_db = [
     }
 ]
 
+# Índice id -> producto (búsquedas O(1) desde carrito, órdenes y precios)
+products_index = {p['id']: p for p in products_db}
+
 
 @products_bp.route('/', methods=['GET'])
+@cached_response(ttl=30, namespace='products')
 def get_products():
     """Obtener todos los productos"""
     category = request.args.get('category')
@@ -69,7 +74,7 @@ def get_products():
 @products_bp.route('/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """Obtener un producto específico"""
-    product = next((p for p in products_db if p['id'] == product_id), None)
+    product = products_index.get(product_id)
 
     if not product:
         return jsonify({"error": "Producto no encontrado"}), 404
@@ -77,7 +82,32 @@ def get_product(product_id):
     return jsonify(product)
 
 
+@products_bp.route('/<int:product_id>/price', methods=['PUT'])
+def update_product_price(product_id):
+    """Cambiar el precio de catálogo (carritos y checkout lo ven en la próxima lectura)"""
+    from ..pricing import set_catalog_price, PricingError
+
+    data = request.json
+
+    if not data or 'price' not in data:
+        return jsonify({"error": "price es requerido"}), 400
+
+    try:
+        set_catalog_price(product_id, data['price'])
+    except PricingError as e:
+        status = 404 if e.errors[0]["error"] == "Producto no encontrado" else 400
+        return jsonify({"error": "No se pudo cambiar el precio", "details": e.errors}), status
+
+    invalidate_cache('products')
+    return jsonify({
+        "success": True,
+        "message": "Precio actualizado",
+        "product": products_index[product_id]
+    })
+
+
 @products_bp.route('/categories', methods=['GET'])
+@cached_response(ttl=300, namespace='products')
 def get_categories():
     """Obtener todas las categorías"""
     categories = list(set(p['category'] for p in products_db if p['category']))
@@ -1,25 +1,58 @@
 from flask import Blueprint, jsonify, request
-from datetime import datetime
+import threading
+from ..quote_store import create_quote_store, QUOTE_STATUSES
+from ..pricing import price_items, PricingError
+from .auth import account_business_id
 
 quotes_bp = Blueprint('quotes', __name__)
 
-# Base de datos de cotizaciones en memoria
-quotes_db = []
+# Almacén de cotizaciones (memoria o base de datos, ver QUOTE_STORE)
+quotes_store = create_quote_store()
+
+# Serializa los cambios de estado y la conversión cotización -> orden
+_conversion_lock = threading.Lock()
+
+# Estados que ya no cambian; "converted" solo lo asigna la conversión
+FINAL_QUOTE_STATUSES = ["rejected", "expired", "converted"]
 
 
 @quotes_bp.route('/', methods=['GET'])
 def get_quotes():
-    """Obtener todas las cotizaciones"""
-    user_id = request.args.get('user_id')
-    role = request.args.get('role')
+    """Obtener cotizaciones (por cliente o negocio, con filtro de estado y cursor)"""
+    user_id = request.args.get('user_id', type=int)
+    role = request.args.get('role', 'customer')
+    status = request.args.get('status')
+    before = request.args.get('cursor', type=int)
+    limit = max(1, min(request.args.get('limit', type=int, default=20), 100))
 
-    filtered_quotes = quotes_db
+    if status and status not in QUOTE_STATUSES:
+        return jsonify({"error": f"Estado inválido. Opciones: {QUOTE_STATUSES}"}), 400
 
+    filters = {}
     if user_id:
-        filtered_quotes = [
-            q for q in filtered_quotes if q['customer_id'] == int(user_id)]
+        if role == 'business':
+            filters['business_id'] = user_id
+        else:
+            filters['customer_id'] = user_id
+
+    quotes, next_cursor = quotes_store.list(
+        status=status, before=before, limit=limit, **filters)
+
+    return jsonify({
+        "quotes": quotes,
+        "next_cursor": next_cursor
+    })
 
-    return jsonify(filtered_quotes)
+
+@quotes_bp.route('/<int:quote_id>', methods=['GET'])
+def get_quote(quote_id):
+    """Obtener una cotización"""
+    quote = quotes_store.get(quote_id)
+
+    if not quote:
+        return jsonify({"error": "Cotización no encontrada"}), 404
+
+    return jsonify({"quote": quote})
 
 
 @quotes_bp.route('/', methods=['POST'])
@@ -30,20 +63,95 @@ def create_quote():
     if not data or not data.get('customer_id') or not data.get('items'):
         return jsonify({"error": "Datos incompletos"}), 400
 
-    new_quote = {
-        "id": len(quotes_db) + 1,
-        "customer_id": data['customer_id'],
-        "business_id": data.get('business_id', 1),
-        "items": data['items'],
-        "status": "pending",
-        "total_price": sum(item.get('price', 0) * item.get('quantity', 1) for item in data['items']),
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat()
-    }
+    # Negocio al que se dirige la cotización (solo para listarla; no fija los precios)
+    business_id = data.get('business_id', 1)
 
-    quotes_db.append(new_quote)
+    # Precios resueltos en el servidor (lista de la cuenta del cliente + tramos por volumen)
+    try:
+        priced = price_items(data['items'], account_business_id(data['customer_id']))
+    except PricingError as e:
+        return jsonify({"error": "Cotización inválida", "details": e.errors}), 400
+
+    new_quote = quotes_store.create({
+        "customer_id": data['customer_id'],
+        "business_id": business_id,
+        "items": priced['lines'],
+        "total_price": priced['subtotal']
+    })
 
     return jsonify({
         "message": "Cotización creada exitosamente",
         "quote": new_quote
     }), 201
+
+
+@quotes_bp.route('/<int:quote_id>', methods=['PUT'])
+def update_quote(quote_id):
+    """Actualizar el estado de una cotización"""
+    data = request.json
+
+    if not data or 'status' not in data:
+        return jsonify({"error": "status es requerido"}), 400
+
+    if data['status'] not in QUOTE_STATUSES:
+        return jsonify({"error": f"Estado inválido. Opciones: {QUOTE_STATUSES}"}), 400
+
+    if data['status'] == 'converted':
+        return jsonify({"error": "Use /convert para convertir la cotización en orden"}), 400
+
+    with _conversion_lock:
+        quote = quotes_store.get(quote_id)
+
+        if not quote:
+            return jsonify({"error": "Cotización no encontrada"}), 404
+
+        if quote['status'] in FINAL_QUOTE_STATUSES:
+            return jsonify({"error": f"La cotización ya está '{quote['status']}'"}), 409
+
+        quote = quotes_store.update(quote_id, status=data['status'])
+
+    return jsonify({
+        "message": f"Cotización actualizada a '{data['status']}'",
+        "quote": quote
+    })
+
+
+@quotes_bp.route('/<int:quote_id>/convert', methods=['POST'])
+def convert_quote_to_order(quote_id):
+    """Convertir una cotización aceptada en orden (respetando los precios cotizados)"""
+    from .orders import create_held_order
+    from .inventory import reserve_stock
+
+    data = request.get_json(silent=True) or {}
+
+    with _conversion_lock:
+        quote = quotes_store.get(quote_id)
+
+        if not quote:
+            return jsonify({"error": "Cotización no encontrada"}), 404
+
+        if quote['status'] == 'converted':
+            return jsonify({"error": "La cotización ya fue convertida",
+                            "order_id": quote.get('order_id')}), 409
+
+        if quote['status'] != 'accepted':
+            return jsonify({"error": "Solo se pueden convertir cotizaciones aceptadas"}), 400
+
+        # Descontar el stock de todas las líneas (todo o nada), como en el checkout
+        quantities = {line['product_id']: line['quantity'] for line in quote['items']}
+        errors = reserve_stock(quantities, reason=f"Cotización {quote_id}",
+                               user_id=quote['customer_id'])
+        if errors:
+            return jsonify({"error": "No se pudo convertir la cotización", "details": errors}), 400
+
+        order = create_held_order(quote['customer_id'], quote['items'], quote['total_price'],
+                                  data, quantities, reason=f"Cotización {quote_id}")
+        quote = quotes_store.update(
+            quote_id, status='converted', order_id=order.id)
+
+    return jsonify({
+        "success": True,
+        "message": "Cotización convertida en orden",
+        "quote": quote,
+        "order": order.serialize()
+    }), 201
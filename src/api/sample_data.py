@@ -0,0 +1,212 @@
+"""
+Generador vectorizado de órdenes sintéticas (desarrollo y pruebas de carga).
+
+generate_order_columns() sortea todo con NumPy en arreglos por columna, sin un
+bucle de Python por orden ni por línea:
+- fechas: más órdenes cuanto más recientes (crecimiento diario), más los fines
+  de semana y con picos al mediodía y a la noche
+- líneas por orden y cantidades: geométricas (casi siempre 1 o 2)
+- productos: popularidad tipo Zipf (pocos productos concentran las ventas)
+- clientes: unos pocos compran mucho más que el resto
+- estado según antigüedad: las recientes siguen pendientes o en proceso,
+  las viejas están entregadas; ~5% canceladas
+- montos en centavos enteros, con las mismas reglas de envío e impuesto que
+  el checkout (cart_totals)
+
+build_orders() arma los registros de api/records.py: el único bucle es el
+que crea las órdenes, y las líneas iguales (producto, cantidad) comparten un
+mismo OrderItem.
+"""
+
+import gc
+from itertools import islice
+
+import numpy as np
+
+from .cart_totals import FREE_SHIPPING_CENTS, SHIPPING_CENTS, tax_cents, to_cents
+from .ids import reserve_ids
+from .order_states import ORDER_STATUSES
+from .records import Order, OrderItem, now_epoch
+
+SAMPLE_PRODUCTS = [
+    {"id": 1, "name": "Producto Premium", "price": 150.00},
+    {"id": 2, "name": "Producto Básico", "price": 89.99},
+    {"id": 3, "name": "Producto Eco", "price": 120.50},
+    {"id": 4, "name": "Accesorio", "price": 29.99}
+]
+
+STATUSES = ORDER_STATUSES
+PAYMENT_METHODS = ["credit_card", "debit_card", "paypal", "bank_transfer"]
+PAYMENT_WEIGHTS = [0.5, 0.25, 0.18, 0.07]
+
+# Probabilidad de cada estado (en el orden de STATUSES) según la antigüedad
+STATUS_BY_AGE = [
+    (1, [0.30, 0.50, 0.15, 0.00, 0.05]),             # menos de 1 día
+    (5, [0.02, 0.15, 0.45, 0.33, 0.05]),             # de 1 a 5 días
+    (None, [0.00, 0.00, 0.01, 0.93, 0.06]),          # más de 5 días
+]
+
+# Peso relativo de cada hora del día (UTC)
+HOUR_WEIGHTS = [2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 9, 11,
+                13, 12, 10, 9, 9, 10, 12, 14, 15, 13, 9, 5]
+
+DAILY_GROWTH = 0.01
+WEEKEND_BOOST = 1.25
+MAX_ITEMS = 6
+MAX_QUANTITY = 5
+
+
+def _zipf_weights(n, exponent, rng):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(weights / weights.sum())
+
+
+def generate_order_columns(count, products=SAMPLE_PRODUCTS, users=1, days=60,
+                           now=None, seed=None):
+    """
+    Sortear count órdenes. users: cantidad de clientes (ids 1..users) o una
+    lista de user_id. Devuelve un dict de arreglos; las líneas de la orden i
+    son item_*[item_offsets[i]:item_offsets[i + 1]].
+    """
+    rng = np.random.default_rng(seed)
+    now = now_epoch() if now is None else now
+
+    # Fechas: día (tendencia + fin de semana), hora del día y segundo
+    day_ago = np.arange(days + 1)
+    today = now - now % 86400
+    weekday = ((today - day_ago * 86400) // 86400 + 3) % 7   # 0 = lunes
+    day_weights = (1 + DAILY_GROWTH) ** -day_ago * np.where(weekday >= 5, WEEKEND_BOOST, 1.0)
+    hour_weights = np.asarray(HOUR_WEIGHTS, dtype=np.float64)
+    day = rng.choice(day_ago, count, p=day_weights / day_weights.sum())
+    hour = rng.choice(24, count, p=hour_weights / hour_weights.sum())
+    created_at = today - day * 86400 + hour * 3600 + rng.integers(0, 3600, count)
+    # Las horas de hoy que todavía no pasaron van al día anterior
+    created_at[created_at > now] -= 86400
+    created_at.sort()
+
+    # Clientes
+    if isinstance(users, int):
+        user_ids = np.arange(1, users + 1)
+    else:
+        user_ids = np.asarray(users)
+    activity = rng.lognormal(0.0, 1.0, len(user_ids))
+    user_id = rng.choice(user_ids, count, p=activity / activity.sum())
+
+    # Líneas: cantidad por orden, producto y unidades
+    lines = np.minimum(rng.geometric(0.6, count), MAX_ITEMS)
+    item_offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(lines, out=item_offsets[1:])
+    total_items = int(item_offsets[-1])
+    item_product = rng.choice(len(products), total_items, p=_zipf_weights(len(products), 1.1, rng))
+    item_quantity = np.minimum(rng.geometric(0.75, total_items), MAX_QUANTITY)
+
+    # Montos en centavos
+    price_cents = np.array([to_cents(p["price"]) for p in products], dtype=np.int64)
+    line_cents = price_cents[item_product] * item_quantity
+    subtotal_cents = np.add.reduceat(line_cents, item_offsets[:-1]) if count else line_cents
+    shipping_cents = np.where(subtotal_cents >= FREE_SHIPPING_CENTS, 0, SHIPPING_CENTS)
+
+    # Estado según antigüedad
+    age_days = (now - created_at) / 86400
+    status = np.empty(count, dtype=np.int8)
+    lower = 0
+    for upper, weights in STATUS_BY_AGE:
+        mask = age_days >= lower if upper is None else (age_days >= lower) & (age_days < upper)
+        status[mask] = rng.choice(len(STATUSES), int(mask.sum()), p=weights)
+        lower = upper
+
+    # Fechas derivadas (sin pasar de now)
+    shipped_at = np.minimum(created_at + rng.integers(1, 3, count) * 86400, now)
+    delivered_at = np.minimum(shipped_at + rng.integers(1, 4, count) * 86400, now)
+    cancelled_at = np.minimum(created_at + rng.integers(600, 86400, count), now)
+
+    return {
+        "count": count,
+        "created_at": created_at,
+        "user_id": user_id,
+        "status": status,
+        "payment_method": rng.choice(len(PAYMENT_METHODS), count, p=PAYMENT_WEIGHTS),
+        "estimated_delivery": created_at + rng.integers(3, 8, count) * 86400,
+        "shipped_at": shipped_at,
+        "delivered_at": delivered_at,
+        "cancelled_at": cancelled_at,
+        "tracking_number": rng.integers(1000000000, 10000000000, count),
+        "item_offsets": item_offsets,
+        "item_product": item_product,
+        "item_quantity": item_quantity,
+        "subtotal_cents": subtotal_cents,
+        "shipping_cents": shipping_cents,
+        "tax_cents": tax_cents(subtotal_cents),
+    }
+
+
+def build_orders(columns, products=SAMPLE_PRODUCTS, ids=None):
+    """Registros Order desde generate_order_columns (ids: por defecto reservados en bloque)"""
+    ids = reserve_ids(columns["count"]) if ids is None else ids
+    # Millones de objetos nuevos disparan el GC cíclico una y otra vez
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _build_orders(columns, products, ids)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _build_orders(columns, products, ids):
+
+    # Una tupla de líneas por orden, con OrderItem compartidos por (producto, cantidad)
+    keys = (columns["item_product"] * (MAX_QUANTITY + 1) + columns["item_quantity"]).tolist()
+    shared = {}
+    for key in set(keys):
+        product = products[key // (MAX_QUANTITY + 1)]
+        shared[key] = OrderItem(product["id"], product["name"], key % (MAX_QUANTITY + 1),
+                                product["price"])
+    lines = iter(list(map(shared.__getitem__, keys)))
+    items = [tuple(islice(lines, n)) for n in np.diff(columns["item_offsets"]).tolist()]
+
+    cents = columns["subtotal_cents"] + columns["shipping_cents"] + columns["tax_cents"]
+    status = columns["status"]
+    shipped, delivered, cancelled = (status == STATUSES.index(name)
+                                     for name in ("shipped", "delivered", "cancelled"))
+    payment_status = np.where(status == STATUSES.index("pending_payment"),
+                              "pending", "completed").tolist()
+    # Fecha de la última transición: envío, entrega o cancelación según el estado
+    updated_at = np.select([shipped, delivered, cancelled],
+                           [columns["shipped_at"], columns["delivered_at"], columns["cancelled_at"]],
+                           columns["created_at"])
+
+    orders = []
+    append = orders.append
+    for order_id, user_id, order_items, subtotal, shipping, tax, total, state, method, \
+            paid, created, updated, estimated in zip(
+                ids, columns["user_id"].tolist(), items,
+                (columns["subtotal_cents"] / 100).tolist(),
+                (columns["shipping_cents"] / 100).tolist(),
+                (columns["tax_cents"] / 100).tolist(), (cents / 100).tolist(),
+                [STATUSES[s] for s in status.tolist()],
+                [PAYMENT_METHODS[m] for m in columns["payment_method"].tolist()],
+                payment_status, columns["created_at"].tolist(), updated_at.tolist(),
+                columns["estimated_delivery"].tolist()):
+        append(Order(order_id, user_id, order_items, subtotal, shipping, tax, total,
+                     state, method, payment_status=paid, created_at=created,
+                     updated_at=updated, estimated_delivery=estimated))
+
+    # Campos que solo tienen las órdenes enviadas, entregadas o canceladas
+    shipped_at = columns["shipped_at"].tolist()
+    tracking = columns["tracking_number"].tolist()
+    for i in np.flatnonzero(shipped | delivered).tolist():
+        order = orders[i]
+        order.shipped_at = shipped_at[i]
+        order.tracking_number = f"TRK-{tracking[i]}"
+    for i in np.flatnonzero(delivered).tolist():
+        orders[i].delivered_at = orders[i].updated_at
+    for i in np.flatnonzero(cancelled).tolist():
+        orders[i].cancelled_at = orders[i].updated_at
+    return orders
+
+
+def sample_orders(count, products=SAMPLE_PRODUCTS, users=1, days=60, now=None, seed=None):
+    """Sortear y armar count órdenes (columnas + registros)"""
+    columns = generate_order_columns(count, products, users, days, now, seed)
+    return build_orders(columns, products)
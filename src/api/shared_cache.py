@@ -0,0 +1,185 @@
+"""
+Cache compartida entre procesos sobre un segmento de memoria mapeado.
+
+Todos los workers de gunicorn de un host mapean el mismo archivo (en /dev/shm
+por defecto, es decir memoria y no disco), así un payload caliente se calcula
+y se guarda una sola vez y ocupa memoria una sola vez.
+
+Claves versionadas: cada namespace tiene un contador de versión dentro del
+segmento y forma parte de la clave real. Invalidar un namespace solo
+incrementa su versión; las entradas viejas quedan inalcanzables para todos los
+procesos a la vez y se sobrescriben cuando hace falta espacio.
+
+Disposición del segmento:
+    cabecera       magic, n_slots, slot_size, generación global
+    namespaces     NAMESPACE_SLOTS entradas (hash, versión)
+    slots          n_slots bloques de slot_size bytes: (hash, expira, largo) + pickle
+
+Un lock de registro POSIX (lockf) serializa las escrituras entre procesos y un
+threading.Lock entre hilos del mismo proceso.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+MAGIC = b"SHC1"
+HEADER = struct.Struct("<4sIIQ")            # magic, n_slots, slot_size, generación
+NAMESPACE_ENTRY = struct.Struct("<QQ")      # hash del namespace, versión
+SLOT_HEADER = struct.Struct("<QdI")         # hash de la clave, expira (epoch), largo
+NAMESPACE_SLOTS = 256
+NAMESPACE_OFFSET = 64
+SLOTS_OFFSET = 8192
+PROBE_LENGTH = 8
+
+DEFAULT_PATH = f"/dev/shm/ecommerce-cache-{os.getuid()}"
+DEFAULT_SLOTS = 1024
+DEFAULT_SLOT_SIZE = 64 * 1024
+
+
+def _hash(text):
+    value = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1  # 0 marca un slot vacío
+
+
+class SharedMemoryCache:
+    def __init__(self, path=None, slots=None, slot_size=None):
+        self.path = path or os.environ.get("SHARED_CACHE_PATH", DEFAULT_PATH)
+        self.n_slots = slots or int(os.environ.get("SHARED_CACHE_SLOTS", DEFAULT_SLOTS))
+        self.slot_size = slot_size or int(os.environ.get("SHARED_CACHE_SLOT_KB", DEFAULT_SLOT_SIZE // 1024)) * 1024
+        self.size = SLOTS_OFFSET + self.n_slots * self.slot_size
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "too_large": 0}
+
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked(exclusive=True):
+            self._ensure_layout()
+        self._map = mmap.mmap(self._fd, self.size)
+
+        # Un hilo que tenía el lock en el fork no existe en el hijo
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def _ensure_layout(self):
+        """Crear o reinicializar el segmento si no coincide con esta configuración"""
+        header = os.pread(self._fd, HEADER.size, 0)
+        if len(header) == HEADER.size:
+            magic, n_slots, slot_size, _ = HEADER.unpack(header)
+            if (magic, n_slots, slot_size) == (MAGIC, self.n_slots, self.slot_size) \
+                    and os.fstat(self._fd).st_size == self.size:
+                return
+
+        # Truncar a 0 pone todos los slots y versiones en cero (archivo disperso)
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self.size)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, self.n_slots, self.slot_size, 0), 0)
+
+    @contextmanager
+    def _locked(self, exclusive=False):
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    # Versiones
+    def _namespace_slot(self, namespace):
+        """(offset, hash, versión) del namespace; offset None si la tabla está llena"""
+        ns_hash = _hash(namespace)
+        start = ns_hash % NAMESPACE_SLOTS
+        for i in range(NAMESPACE_SLOTS):
+            offset = NAMESPACE_OFFSET + ((start + i) % NAMESPACE_SLOTS) * NAMESPACE_ENTRY.size
+            stored_hash, version = NAMESPACE_ENTRY.unpack_from(self._map, offset)
+            if stored_hash in (ns_hash, 0):
+                return offset, ns_hash, version
+        return None, ns_hash, 0
+
+    def versioned_key(self, namespace, key):
+        """Clave con la generación y la versión actuales del namespace"""
+        with self._locked():
+            generation = HEADER.unpack_from(self._map, 0)[3]
+            _, _, version = self._namespace_slot(namespace)
+        return f"{generation}:{namespace}:{version}:{key}"
+
+    def version(self, namespace):
+        with self._locked():
+            return self._namespace_slot(namespace)[2]
+
+    # Slots
+    def _slot_offsets(self, key_hash):
+        start = key_hash % self.n_slots
+        for i in range(PROBE_LENGTH):
+            yield SLOTS_OFFSET + ((start + i) % self.n_slots) * self.slot_size
+
+    def get(self, full_key):
+        now = time.time()
+        with self._locked():
+            key_hash = _hash(full_key)
+            for offset in self._slot_offsets(key_hash):
+                stored_hash, expires_at, length = SLOT_HEADER.unpack_from(self._map, offset)
+                if stored_hash != key_hash or expires_at <= now:
+                    continue
+                start = offset + SLOT_HEADER.size
+                stored_key, value = pickle.loads(self._map[start:start + length])
+                if stored_key == full_key:
+                    self.stats["hits"] += 1
+                    return value
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, full_key, value, expires_at):
+        """
+        Guardar un valor hasta expires_at (epoch). full_key sale de
+        versioned_key() antes de calcular el valor: si el namespace se invalidó
+        entretanto, el valor queda bajo la versión vieja y nadie lo lee.
+        False si no entra en un slot.
+        """
+        now = time.time()
+        with self._locked(exclusive=True):
+            payload = pickle.dumps((full_key, value), protocol=pickle.HIGHEST_PROTOCOL)
+            if SLOT_HEADER.size + len(payload) > self.slot_size:
+                self.stats["too_large"] += 1
+                return False
+
+            # Preferir la misma clave o un slot libre/vencido; si no, el que vence antes
+            key_hash = _hash(full_key)
+            target = None
+            oldest = None
+            for offset in self._slot_offsets(key_hash):
+                stored_hash, stored_expires, _ = SLOT_HEADER.unpack_from(self._map, offset)
+                if stored_hash == key_hash or stored_hash == 0 or stored_expires <= now:
+                    target = offset
+                    break
+                if oldest is None or stored_expires < oldest[1]:
+                    oldest = (offset, stored_expires)
+            if target is None:
+                target = oldest[0]
+
+            start = target + SLOT_HEADER.size
+            self._map[start:start + len(payload)] = payload
+            SLOT_HEADER.pack_into(self._map, target, key_hash, expires_at, len(payload))
+            self.stats["sets"] += 1
+            return True
+
+    def invalidate(self, namespace=None):
+        """Nueva versión del namespace (o de todo el cache) visible para todos los procesos"""
+        with self._locked(exclusive=True):
+            offset = None
+            if namespace is not None:
+                offset, ns_hash, version = self._namespace_slot(namespace)
+
+            if offset is None:
+                # Todo el cache (o tabla de namespaces llena): nueva generación
+                magic, n_slots, slot_size, generation = HEADER.unpack_from(self._map, 0)
+                HEADER.pack_into(self._map, 0, magic, n_slots, slot_size, generation + 1)
+                return
+            NAMESPACE_ENTRY.pack_into(self._map, offset, ns_hash, version + 1)
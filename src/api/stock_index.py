@@ -0,0 +1,86 @@
+"""
+Índice ordenado de stock para consultas de stock bajo y alertas de reposición.
+
+Se mantienen dos listas ordenadas:
+- (current_stock, product_id) para "stock <= umbral"
+- (current_stock - minimum_stock, product_id) para "por debajo del mínimo"
+
+Cada actualización es O(log n) para ubicar la entrada y las consultas devuelven
+solo los k elementos que cumplen la condición. La alerta de reposición se emite
+una sola vez cuando un producto cruza minimum_stock y se rearma al reponerse.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from datetime import datetime
+
+_INF = float("inf")
+
+
+class LowStockIndex:
+    def __init__(self, max_alerts=1000):
+        self._entries = {}
+        self._by_stock = []
+        self._by_gap = []
+        self._alerted = set()
+        self._subscribers = []
+        self.alerts = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _remove(sorted_list, key):
+        i = bisect_left(sorted_list, key)
+        if i < len(sorted_list) and sorted_list[i] == key:
+            del sorted_list[i]
+
+    def update(self, product_id, current_stock, minimum_stock):
+        """Registrar el stock actual de un producto; devuelve la alerta si se emitió"""
+        with self._lock:
+            previous = self._entries.get(product_id)
+            if previous is not None:
+                stock, minimum = previous
+                self._remove(self._by_stock, (stock, product_id))
+                self._remove(self._by_gap, (stock - minimum, product_id))
+
+            self._entries[product_id] = (current_stock, minimum_stock)
+            insort(self._by_stock, (current_stock, product_id))
+            insort(self._by_gap, (current_stock - minimum_stock, product_id))
+
+            alert = None
+            if current_stock <= minimum_stock:
+                if product_id not in self._alerted:
+                    self._alerted.add(product_id)
+                    alert = {
+                        "product_id": product_id,
+                        "current_stock": current_stock,
+                        "minimum_stock": minimum_stock,
+                        "date": datetime.utcnow().isoformat()
+                    }
+                    self.alerts.append(alert)
+            else:
+                self._alerted.discard(product_id)
+
+        if alert:
+            for callback in list(self._subscribers):
+                callback(alert)
+        return alert
+
+    def below(self, threshold):
+        """product_id con current_stock <= threshold, de menor a mayor stock"""
+        end = bisect_right(self._by_stock, (threshold, _INF))
+        return [product_id for _, product_id in self._by_stock[:end]]
+
+    def below_minimum(self, margin=0):
+        """product_id con current_stock - minimum_stock <= margin"""
+        end = bisect_right(self._by_gap, (margin, _INF))
+        return [product_id for _, product_id in self._by_gap[:end]]
+
+    def subscribe(self, callback):
+        """Registrar una función que recibe cada alerta de reposición"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
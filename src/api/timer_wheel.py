@@ -0,0 +1,105 @@
+"""
+Rueda de temporizadores jerárquica (Varghese & Lauck) para vencimientos por TTL.
+
+Cada nivel tiene SLOTS casilleros; el nivel 0 avanza de a un tick y cada
+casillero del nivel l cubre SLOTS**l ticks. Una clave se ubica en el nivel más
+bajo cuyo rango alcanza su vencimiento y baja de nivel (cascada) cuando la
+rueda de abajo completa una vuelta. Programar, reprogramar y cancelar son O(1)
+y avanzar cuesta O(ticks + claves vencidas), sin recorrer las claves vivas.
+
+Con tick de 1 s y 4 niveles de 64 casilleros el horizonte es de ~194 días; un
+vencimiento más lejano se ubica al final y se reubica en cada cascada.
+"""
+
+import threading
+import time
+
+SLOTS = 64
+LEVELS = 4
+
+
+class TimerWheel:
+    def __init__(self, tick_seconds=1.0, slots=SLOTS, levels=LEVELS, now=None):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self._spans = [slots ** level for level in range(levels + 1)]
+        self._wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._deadlines = {}   # clave -> tick de vencimiento
+        self._location = {}    # clave -> (nivel, casillero)
+        self._tick = self._to_tick(time.time() if now is None else now)
+        self._lock = threading.Lock()
+
+    def _to_tick(self, epoch):
+        return int(epoch // self.tick_seconds)
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def _place(self, key, tick, earliest):
+        # Vencimientos pasados van al primer tick que todavía se procesa
+        tick = max(tick, earliest)
+        delta = tick - self._tick
+        for level in range(self.levels):
+            if delta < self._spans[level + 1]:
+                break
+        else:
+            # Más allá del horizonte: último tick alcanzable, se reubica al bajar
+            level = self.levels - 1
+            tick = self._tick + self._spans[self.levels] - 1
+        index = (tick // self._spans[level]) % self.slots
+        self._wheels[level][index].add(key)
+        self._location[key] = (level, index)
+
+    def _unplace(self, key):
+        location = self._location.pop(key, None)
+        if location is not None:
+            level, index = location
+            self._wheels[level][index].discard(key)
+
+    def schedule(self, key, expires_at):
+        """Programar (o reprogramar) el vencimiento de una clave en epoch"""
+        tick = self._to_tick(expires_at)
+        with self._lock:
+            self._unplace(key)
+            self._deadlines[key] = tick
+            self._place(key, tick, self._tick + 1)
+
+    def cancel(self, key):
+        with self._lock:
+            self._unplace(key)
+            self._deadlines.pop(key, None)
+
+    def advance(self, now=None):
+        """Avanzar el reloj hasta now y devolver las claves vencidas"""
+        target = self._to_tick(time.time() if now is None else now)
+        expired = []
+        with self._lock:
+            while self._tick < target:
+                if not self._deadlines:
+                    # Rueda vacía: no hay nada que recorrer tick a tick
+                    self._tick = target
+                    break
+                self._tick += 1
+                tick = self._tick
+
+                # Cascada: de arriba hacia abajo, así lo que baja al nivel 0 vence en este tick
+                for level in range(self.levels - 1, 0, -1):
+                    if tick % self._spans[level] == 0:
+                        index = (tick // self._spans[level]) % self.slots
+                        bucket = self._wheels[level][index]
+                        self._wheels[level][index] = set()
+                        for key in bucket:
+                            self._place(key, self._deadlines[key], tick)
+
+                index = tick % self.slots
+                bucket = self._wheels[0][index]
+                self._wheels[0][index] = set()
+                for key in bucket:
+                    del self._location[key]
+                    del self._deadlines[key]
+                expired.extend(bucket)
+        return expired
@@ -0,0 +1,300 @@
+"""
+Ingesta de webhooks de pago de alto volumen.
+
+El request HTTP solo verifica la firma, descarta duplicados (por event_id, con
+un conjunto de vistos acotado) y agrega el evento a una cola local; la respuesta
+es inmediata. Un hilo de fondo aplica los eventos en lotes.
+
+Si WEBHOOK_QUEUE_PATH está configurado la cola es durable: cada evento se
+agrega a un archivo JSONL y el offset del último lote aplicado se guarda en
+<path>.offset, así al reiniciar se reprocesa solo lo pendiente. ingest() no
+devuelve hasta que el evento está en disco; los requests concurrentes
+comparten el fsync (group commit, como en journal.py). Si la escritura falla
+el event_id no queda como visto: el reintento del emisor se acepta.
+
+Un lote que apply_batch no puede aplicar se reintenta (max_attempts); si
+sigue fallando pasa a la cola de descarte (<path>.dead, o dead_letters en
+memoria) y recién entonces avanza el offset.
+
+Sin secreto (PAYMENT_WEBHOOK_SECRET) todos los webhooks se rechazan, salvo
+que se acepten sin firma explícitamente (allow_unsigned, solo desarrollo).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+MAX_SEEN_EVENTS = 200000
+BATCH_SIZE = 500
+MAX_APPLY_ATTEMPTS = 3
+RETRY_DELAY = 0.5      # segundos; crece con cada intento
+
+
+def sign_payload(body, secret):
+    """Firma HMAC-SHA256 (hex) del cuerpo del webhook"""
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class WebhookIngestor:
+    def __init__(self, apply_batch, path=None, secret=None, allow_unsigned=False,
+                 batch_size=BATCH_SIZE, max_seen=MAX_SEEN_EVENTS,
+                 max_attempts=MAX_APPLY_ATTEMPTS, retry_delay=RETRY_DELAY):
+        self.apply_batch = apply_batch
+        self.path = path
+        self.secret = secret
+        self.allow_unsigned = allow_unsigned
+        self.batch_size = batch_size
+        self.max_seen = max_seen
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.stats = {"accepted": 0, "duplicates": 0, "applied": 0, "batches": 0,
+                      "retries": 0, "dead_lettered": 0}
+        # Lotes descartados cuando no hay cola durable (con path van a <path>.dead)
+        self.dead_letters = deque(maxlen=max_seen)
+
+        self._seen = OrderedDict()
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._file = None
+        self._written = 0    # eventos escritos en el archivo
+        self._synced = 0     # eventos ya en disco (fsync)
+        self._sync_lock = threading.Lock()
+        self._pid = None
+
+        if self.path:
+            self._recover()
+            if self._pending:
+                self._ensure_worker()
+
+    # Verificación y deduplicación
+
+    @property
+    def configured(self):
+        """False si no hay secreto y no se aceptan webhooks sin firma"""
+        return bool(self.secret) or self.allow_unsigned
+
+    def verify(self, body, signature):
+        if not self.secret:
+            return self.allow_unsigned
+        if not signature:
+            return False
+        return hmac.compare_digest(sign_payload(body, self.secret), signature)
+
+    def _mark_seen(self, event_id):
+        """Registrar un event_id; devuelve False si ya se había visto"""
+        if event_id in self._seen:
+            self._seen.move_to_end(event_id)
+            return False
+        self._seen[event_id] = True
+        if len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        return True
+
+    def _forget(self, event_id):
+        """Quitar un event_id de los vistos (el evento no quedó aceptado)"""
+        if event_id is not None:
+            self._seen.pop(event_id, None)
+
+    # Cola durable
+
+    def _offset_path(self):
+        return f"{self.path}.offset"
+
+    def _read_offset(self):
+        try:
+            with open(self._offset_path()) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _dead_path(self):
+        return f"{self.path}.dead"
+
+    def _write_offset(self, offset):
+        tmp = f"{self._offset_path()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp, self._offset_path())
+
+    def _recover(self):
+        """Volver a encolar los eventos que no llegaron a aplicarse"""
+        offset = self._read_offset()
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                position = offset
+                for line in f:
+                    position += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # línea incompleta al final (caída a mitad de escritura)
+                    self._mark_seen(event.get("event_id"))
+                    self._pending.append((event, position))
+        self._file = open(self.path, "ab")
+
+    def ingest(self, event):
+        """
+        Aceptar un evento; devuelve 'accepted' o 'duplicate'. Con cola durable
+        vuelve recién cuando el evento está en disco (lanza OSError si no se
+        pudo escribir).
+        """
+        event_id = event.get("event_id")
+
+        with self._cond:
+            if event_id is not None and not self._mark_seen(event_id):
+                self.stats["duplicates"] += 1
+                return "duplicate"
+
+            end_offset = None
+            if self._file is not None:
+                try:
+                    end_offset = self._append(event)
+                except OSError:
+                    self._forget(event_id)
+                    raise
+                written = self._written
+
+            self._pending.append((event, end_offset))
+            self.stats["accepted"] += 1
+            self._cond.notify()
+
+        self._ensure_worker()
+        if end_offset is not None:
+            try:
+                self._wait_durable(written)
+            except OSError:
+                # Sigue en la cola y se aplicará, pero no es durable: el emisor
+                # reintenta y el reintento no puede responderse como duplicado
+                with self._cond:
+                    self._forget(event_id)
+                raise
+        return "accepted"
+
+    def _append(self, event):
+        """
+        Agregar el evento al archivo (llamar con _cond) y devolver el offset
+        final. Si la escritura falla se recorta lo escrito a medias, así una
+        línea cortada no tapa a las siguientes al recuperar.
+        """
+        start = self._file.tell()
+        try:
+            self._file.write(json.dumps(event).encode("utf-8") + b"\n")
+            self._file.flush()
+        except OSError:
+            try:
+                self._file.close()   # cierra aunque el flush pendiente falle
+            except OSError:
+                pass
+            try:
+                os.truncate(self.path, start)
+            except OSError as e:
+                print(f"⚠️  No se pudo recortar la cola de webhooks {self.path}: {e}")
+            self._file = open(self.path, "ab")
+            raise
+        self._written += 1
+        return self._file.tell()
+
+    def _wait_durable(self, target):
+        """
+        Group commit: quien toma el lock hace un fsync que cubre todo lo escrito
+        hasta ese momento; los que esperaban detrás ya quedan cubiertos.
+        """
+        with self._sync_lock:
+            if self._synced >= target:
+                return
+            with self._cond:
+                written = self._written
+            os.fsync(self._file.fileno())
+            self._synced = written
+
+    # Aplicación en lotes
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._work, name="webhook-ingest",
+                             daemon=True).start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popleft())
+            return batch
+
+    def _work(self):
+        while True:
+            self.drain_once(self._next_batch())
+
+    def drain_once(self, batch):
+        """
+        Aplicar un lote y confirmar su offset. Si apply_batch falla se reintenta;
+        después de max_attempts el lote va a la cola de descarte. Si tampoco se
+        puede descartar, el lote vuelve al frente de la cola y el offset no se mueve.
+        """
+        events = [event for event, _ in batch]
+        outcome = "applied"
+        if not self._apply(events):
+            try:
+                self._dead_letter(events)
+            except OSError as e:
+                print(f"⚠️  No se pudo descartar el lote de webhooks: {e}")
+                with self._cond:
+                    self._pending.extendleft(reversed(batch))
+                time.sleep(self.retry_delay)
+                return
+            outcome = "dead_lettered"
+
+        end_offset = batch[-1][1]
+        if end_offset is not None:
+            with self._cond:
+                # Si la cola quedó vacía se puede truncar el archivo
+                if not self._pending and self._file.tell() == end_offset:
+                    # Primero el offset: una caída entre ambos pasos solo
+                    # provoca reaplicar eventos, nunca perderlos
+                    self._write_offset(0)
+                    self._file.truncate(0)
+                    self._file.seek(0)
+                else:
+                    self._write_offset(end_offset)
+
+        self.stats[outcome] += len(batch)
+        self.stats["batches"] += 1
+
+    def _apply(self, events):
+        """apply_batch con reintentos; False si falló max_attempts veces"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.apply_batch(events)
+                return True
+            except Exception as e:
+                print(f"⚠️  Error aplicando lote de webhooks (intento {attempt}): {e}")
+                if attempt < self.max_attempts:
+                    self.stats["retries"] += 1
+                    time.sleep(self.retry_delay * attempt)
+        return False
+
+    def _dead_letter(self, events):
+        """Guardar un lote que no se pudo aplicar (JSONL en <path>.dead, con fsync)"""
+        if not self.path:
+            self.dead_letters.extend(events)
+            return
+        with open(self._dead_path(), "ab") as f:
+            f.write(b"".join(json.dumps(event).encode("utf-8") + b"\n" for event in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self):
+        return len(self._pending)
@@ -5,11 +5,30 @@ from flask_jwt_extended import JWTManager
 
 # Importar la función que crea la app
 from api import create_app
+from api.database import pool_metrics
+from api.db_routing import STICKY_HEADER
+from api.journal import journal
+from api.routes.cart import CART_TTL_SECONDS, start_cart_expiry
 
+# Blueprints, base de datos, compresión, admin y comandos (ver api/__init__.py)
 app = create_app()
 
-# Configurar CORS para que funcione con tu frontend
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+# Recuperar los almacenes en memoria desde el WAL (opcional, DURABILITY_DIR)
+if journal.enabled:
+    print(f"✅ Estado recuperado del WAL: {journal.recover()}")
+
+# Pronóstico de demanda de inventario en lote (opcional)
+if os.environ.get("FORECAST_INTERVAL_SECONDS"):
+    from api.routes.inventory import start_forecast_scheduler
+    start_forecast_scheduler(int(os.environ["FORECAST_INTERVAL_SECONDS"]))
+
+# Vencimiento de carritos abandonados (CART_TTL_SECONDS, 0 = desactivado)
+if CART_TTL_SECONDS:
+    start_cart_expiry(int(os.environ.get("CART_SWEEP_SECONDS", 60)))
+
+# Configurar CORS para que funcione con tu frontend; el front lee y reenvía
+# X-DB-Primary-Until (ver api/db_routing.py)
+CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": [STICKY_HEADER]}})
 
 # Configurar JWT
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "super-secret")
@@ -22,6 +41,11 @@ jwt = JWTManager(app)
 def health_check():
     return jsonify({"status": "healthy", "message": "API is running"}), 200
 
+
+@app.route('/health/db', methods=['GET'])
+def db_pool_health():
+    return jsonify(pool_metrics(app)), 200
+
 # Ruta de prueba
 
 
@@ -0,0 +1,97 @@
+# ASGI entry point: async handlers for the I/O-bound endpoints, Flask for the rest.
+# Run it with uvicorn (one event loop per worker):
+#   $ uvicorn asgi:application --app-dir src --port 3001
+#   $ uvicorn asgi:application --app-dir src --workers 4 --port 3001
+
+import asyncio
+import os
+
+from app import app
+from api.asgi_router import AsyncRouter, EventStream
+from api.routes.analytics import realtime_metrics
+from api.payment_queue import PaymentInProgress
+from api.routes.payments import (payment_queue, payment_for_order, idempotent_job,
+                                 payment_job_response, payment_conflict_response,
+                                 webhook_ingestor, PAYMENT_WAIT_TIMEOUT, SIGNATURE_HEADER)
+
+REALTIME_STREAM_INTERVAL = float(os.environ.get("REALTIME_STREAM_INTERVAL", 2))
+
+application = AsyncRouter(app)
+
+
+@application.route('/api/payments/create-payment', methods=['POST'])
+async def create_payment(request):
+    """Igual que la vista Flask, pero wait=true espera a la pasarela sin ocupar un hilo"""
+    data = request.get_json()
+
+    if not data or 'order_id' not in data:
+        return {"error": "order_id es requerido"}, 400
+
+    idempotency_key = request.headers.get('idempotency-key') or data.get('idempotency_key')
+    wait = data.get('wait') or request.args.get('wait') == 'true'
+
+    try:
+        job, created = idempotent_job(idempotency_key, data['order_id']), False
+        if job is None:
+            payment, error = payment_for_order(data)
+            if error:
+                return error
+            if not wait:
+                job, created = payment_queue.submit(payment, idempotency_key)
+                return payment_job_response(job, created), 202
+            job, created = await payment_queue.submit_async(payment, idempotency_key)
+    except PaymentInProgress as e:
+        return payment_conflict_response(e), 409
+    except ValueError as e:
+        return {"error": str(e)}, 409
+
+    if wait and not created and job['status'] not in ('completed', 'failed'):
+        # Clave de idempotencia repetida: el trabajo original sigue en curso
+        job = await asyncio.get_running_loop().run_in_executor(
+            None, payment_queue.wait, job, PAYMENT_WAIT_TIMEOUT)
+
+    status = 200 if job['status'] in ('completed', 'failed') else 202
+    return payment_job_response(job, created), status
+
+
+@application.route('/api/payments/webhook', methods=['POST'])
+async def payment_webhook(request):
+    """Webhook de pagos: la escritura en la cola durable corre fuera del event loop"""
+    if not webhook_ingestor.configured:
+        return {"error": "Webhook de pagos sin configurar"}, 503
+
+    if not webhook_ingestor.verify(request.body, request.headers.get(SIGNATURE_HEADER.lower())):
+        return {"error": "Firma inválida"}, 401
+
+    webhook_data = request.get_json()
+    if not isinstance(webhook_data, dict):
+        return {"error": "Evento inválido"}, 400
+
+    try:
+        status = await asyncio.get_running_loop().run_in_executor(
+            None, webhook_ingestor.ingest, webhook_data)
+    except OSError:
+        return {"error": "No se pudo guardar el evento"}, 503
+
+    return {"success": True, "message": "Webhook recibido", "status": status}, 202
+
+
+@application.route('/api/analytics/realtime', methods=['GET'])
+async def get_realtime_metrics(request):
+    return realtime_metrics(), 200
+
+
+@application.route('/api/analytics/realtime/stream', methods=['GET'])
+async def stream_realtime_metrics(request):
+    """Métricas en tiempo real como server-sent events (una conexión abierta por cliente)"""
+    try:
+        interval = max(0.5, float(request.args.get('interval', REALTIME_STREAM_INTERVAL)))
+    except ValueError:
+        interval = REALTIME_STREAM_INTERVAL
+
+    async def events():
+        while True:
+            yield realtime_metrics()['data']
+            await asyncio.sleep(interval)
+
+    return EventStream(events())
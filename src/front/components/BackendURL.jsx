@@ -3,6 +3,11 @@ import React from 'react';
 // URL base del backend - usando tu URL específica
 const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'https://cuddly-space-fishstick-q7xqj5g5v45c9q49-3001.app.github.dev/api';
 
+// Lecturas del primario después de escribir (read-your-writes, ver api/db_routing.py):
+// el backend responde X-DB-Primary-Until y lo reenviamos en los requests siguientes
+const STICKY_HEADER = 'X-DB-Primary-Until';
+let primaryUntil = null;
+
 const useBackend = () => {
 	// Función para hacer fetch al backend
 	const fetchFromBackend = async (endpoint, options = {}) => {
@@ -13,6 +18,7 @@ const useBackend = () => {
 			headers: {
 				'Content-Type': 'application/json',
 				...(token && { 'Authorization': `Bearer ${token}` }),
+				...(primaryUntil && { [STICKY_HEADER]: primaryUntil }),
 				...options.headers
 			},
 			...options
@@ -21,6 +27,7 @@ const useBackend = () => {
 		try {
 			console.log('Fetching from:', url); // Debug
 			const response = await fetch(url, defaultOptions);
+			primaryUntil = response.headers.get(STICKY_HEADER) || primaryUntil;
 
 			if (!response.ok) {
 				const errorText = await response.text();
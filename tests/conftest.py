@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+URL_PREFIXES = {
+    "auth": "/api/auth",
+    "products": "/api/products",
+    "customers": "/api/customers",
+    "business": "/api/business",
+    "quotes": "/api/quotes",
+    "analytics": "/api/analytics",
+    "cart": "/api/cart",
+    "orders": "/api/orders",
+    "payments": "/api/payments",
+    "inventory": "/api/inventory",
+}
+
+
+@pytest.fixture
+def make_app():
+    """make_app("cart", "orders"): app de Flask con esos blueprints registrados"""
+    def make(*names):
+        app = Flask("tests")
+        app.config["TESTING"] = True
+        for name in names:
+            module = __import__(f"api.routes.{name}", fromlist=["_"])
+            app.register_blueprint(getattr(module, f"{name}_bp"), url_prefix=URL_PREFIXES[name])
+        return app
+    return make
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import func, select
+
+from api import create_app
+from api.models import db, Order, Product, User
+from conftest import SRC_DIR, URL_PREFIXES
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_factory_registers_every_blueprint(app):
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+    for prefix in URL_PREFIXES.values():
+        assert any(rule.startswith(prefix) for rule in rules), prefix
+
+    # Compresión y pool de conexiones instalados por la fábrica
+    response = app.test_client().get("/api/products/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Accept-Encoding" in response.vary
+    assert app.extensions["db_engines"]
+
+
+# Importa los puntos de entrada reales (wsgi para gunicorn, asgi para uvicorn)
+# y manda un request por cada uno
+ENTRY_POINTS = """
+import asyncio
+import wsgi, asgi
+
+assert wsgi.application.test_client().get("/health").status_code == 200
+
+async def call(path):
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await asgi.application({"type": "http", "http_version": "1.1", "method": "GET", "path": path, "query_string": b"",
+                            "headers": [], "root_path": "", "scheme": "http",
+                            "server": ("test", 80)}, receive, send)
+    return messages[0]["status"]
+
+assert asyncio.run(call("/health")) == 200
+assert asyncio.run(call("/api/products/")) == 200
+"""
+
+
+def test_wsgi_and_asgi_entry_points_import_and_serve(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'entry.db'}", CART_TTL_SECONDS="0")
+    env.pop("DURABILITY_DIR", None)
+    result = subprocess.run([sys.executable, "-c", ENTRY_POINTS], cwd=SRC_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+
+def test_admin_is_mounted_by_the_factory(app):
+    client = app.test_client()
+    assert client.get("/admin/").status_code == 200
+    result = app.test_cli_runner().invoke(args=["insert-test-data", "--users", "5", "--products", "3",
+                                                "--orders", "12"])
+    assert result.exit_code == 0, result.output
+    # Vistas del admin con endpoint propio: /admin/cart/ no choca con el blueprint del carrito
+    for model in ("user", "order", "cart", "cartitem"):
+        assert client.get(f"/admin/{model}/").status_code == 200, model
+    page = client.get("/admin/order/").get_data(as_text=True)
+    assert page.count('name="rowid"') == 12
+    assert client.get("/api/cart/?user_id=974001").status_code == 200
+
+
+def test_insert_test_users_command(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["insert-test-users", "25"])
+    assert result.exit_code == 0, result.output
+    assert "All test users created" in result.output
+
+    result = runner.invoke(args=["insert-test-users", "5", "--per-row"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(User)) == 30
+
+
+def test_insert_test_data_command(app):
+    result = app.test_cli_runner().invoke(args=[
+        "insert-test-data", "--users", "20", "--products", "10", "--orders", "50", "--batch-size", "16"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        counts = {model: db.session.scalar(select(func.count()).select_from(model))
+                  for model in (User, Product, Order)}
+    assert counts == {User: 20, Product: 10, Order: 50}
+
+
+COUNT_ORDERS = "import app; from api.routes.orders import orders_db; print(len(orders_db))"
+
+
+def _run(args, env):
+    result = subprocess.run([sys.executable] + args, cwd=SRC_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_generate_sample_orders_hands_orders_to_the_next_start(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'cli.db'}", CART_TTL_SECONDS="0")
+    env.pop("DURABILITY_DIR", None)
+    initial = int(_run(["-c", COUNT_ORDERS], env).split()[-1])
+
+    env["DURABILITY_DIR"] = str(tmp_path / "wal")
+    # Con app.py (recupera al importarse) y con la fábrica sola: las dos suman
+    # sobre lo que ya había en el WAL
+    _run(["-m", "flask", "--app", "app", "generate-sample-orders", "30", "--seed", "1"], env)
+    _run(["-m", "flask", "--app", "api:create_app", "generate-sample-orders", "20", "--seed", "2"], env)
+    assert int(_run(["-c", COUNT_ORDERS], env).split()[-1]) == initial + 50
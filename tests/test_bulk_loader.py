@@ -0,0 +1,62 @@
+import pytest
+from flask import Flask
+from sqlalchemy import delete, func, select
+
+from api.bulk_loader import load_dataset, reset_id_sequence
+from api.models import db, Order, OrderItem, Product, User
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask("tests")
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'bulk.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _count(model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_load_dataset_counts_and_line_references(app):
+    results = load_dataset(users=50, products=20, orders=300, batch_size=64)
+    assert results["users"] == _count(User) == 50
+    assert results["products"] == _count(Product) == 20
+    assert results["orders"] == _count(Order) == 300
+    assert results["order_items"] == _count(OrderItem) >= 300
+
+    orphan_items = db.session.execute(
+        select(func.count()).select_from(OrderItem)
+        .where(OrderItem.order_id.not_in(select(Order.id)))).scalar()
+    assert orphan_items == 0
+
+
+def test_orders_only_reference_existing_users(app):
+    load_dataset(users=40, products=5, batch_size=16)
+    # Huecos en los ids: usuarios borrados en el medio y al principio
+    db.session.execute(delete(User).where(User.id.between(5, 30)))
+    db.session.execute(delete(User).where(User.id == 1))
+    db.session.commit()
+    existing = set(db.session.execute(select(User.id)).scalars())
+
+    load_dataset(orders=2000, batch_size=500)
+    used = set(db.session.execute(select(Order.user_id).distinct()).scalars())
+    assert used <= existing
+    assert len(used) > len(existing) // 2
+
+
+def test_new_rows_after_a_load_get_fresh_ids(app):
+    load_dataset(users=10, batch_size=4)
+    reset_id_sequence(User)  # sin efecto fuera de Postgres
+    user = User(email="after@test.com", password="x", name="Después")
+    db.session.add(user)
+    db.session.commit()
+    assert user.id == 11
+
+
+def test_orders_need_users_and_products(app):
+    with pytest.raises(ValueError):
+        load_dataset(orders=10)
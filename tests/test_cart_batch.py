@@ -0,0 +1,74 @@
+import itertools
+
+import pytest
+
+from api.routes import cart, products
+
+_user_ids = itertools.count(971000)
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app("cart").test_client()
+
+
+def _quantities(user_id):
+    return {pid: item.quantity for pid, item in cart.cart_lines.get(user_id, {}).items()}
+
+
+def test_batch_adds_all_lines_and_sums_repeated_products(client):
+    user_id = next(_user_ids)
+    response = client.post("/api/cart/add/batch", json={"user_id": user_id, "items": [
+        {"product_id": 1, "quantity": 2}, {"product_id": 3}, {"product_id": 1, "quantity": 1}]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["applied"] == 3
+    assert body["summary"]["total_items"] == 4
+    assert _quantities(user_id) == {1: 3, 3: 1}
+
+
+def test_batch_with_an_invalid_line_applies_nothing(client):
+    user_id = next(_user_ids)
+    response = client.post("/api/cart/add/batch", json={"user_id": user_id, "items": [
+        {"product_id": 1, "quantity": 2}, {"product_id": 999}, {"quantity": 1},
+        {"product_id": 2, "quantity": "2"}, {"product_id": 2, "quantity": 50}]})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["applied"] == 0
+    assert [e["index"] for e in body["errors"]] == [1, 2, 3, 4]
+    assert user_id not in cart.carts_db
+
+
+def test_batch_size_is_limited(client, monkeypatch):
+    monkeypatch.setattr(cart, "MAX_BATCH_ITEMS", 2)
+    response = client.post("/api/cart/add/batch", json={"user_id": next(_user_ids),
+                                                        "items": [{"product_id": 1}] * 3})
+    assert response.status_code == 400
+
+
+def test_merge_moves_lines_and_removes_the_source_cart(client):
+    guest, user_id = next(_user_ids), next(_user_ids)
+    client.post("/api/cart/add/batch", json={"user_id": guest, "items": [
+        {"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1}]})
+    client.post("/api/cart/add", json={"user_id": user_id, "product_id": 1, "quantity": 3})
+
+    response = client.post("/api/cart/merge", json={"user_id": user_id, "from_cart_id": guest})
+    assert response.status_code == 200
+    assert response.get_json()["summary"]["total_items"] == 6
+    assert _quantities(user_id) == {1: 5, 2: 1}
+    assert guest not in cart.carts_db and guest not in cart.cart_lines
+    assert guest not in cart.expiry_wheel
+
+
+def test_merge_rejects_same_cart_and_invalid_lines(client, monkeypatch):
+    guest, user_id = next(_user_ids), next(_user_ids)
+    assert client.post("/api/cart/merge", json={"user_id": guest, "from_cart_id": guest}).status_code == 400
+
+    client.post("/api/cart/add", json={"user_id": guest, "product_id": 2, "quantity": 4})
+    # El stock bajó después de agregar: la línea ya no pasa las reglas de /add
+    monkeypatch.setitem(products.products_index[2], "stock", 3)
+    response = client.post("/api/cart/merge", json={"user_id": user_id, "from_cart_id": guest})
+    assert response.status_code == 400
+    assert response.get_json()["errors"][0]["error"] == "Stock insuficiente"
+    assert _quantities(guest) == {2: 4}
+    assert user_id not in cart.carts_db
@@ -0,0 +1,162 @@
+import itertools
+import random
+
+import pytest
+
+from api import pricing
+from api.cart_totals import CartTotalsIndex, shipping_cents, tax_cents, to_cents
+from api.routes import cart, orders, products
+
+_user_ids = itertools.count(960000)
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app("cart").test_client()
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Productos 1-3 con stock de sobra; los precios se restauran al terminar"""
+    prices = {product_id: products.products_index[product_id]["price"] for product_id in (1, 2, 3)}
+    for product_id in prices:
+        monkeypatch.setitem(products.products_index[product_id], "stock", 1000)
+    yield list(prices)
+    for product_id, price in prices.items():
+        pricing.set_catalog_price(product_id, price)
+
+
+def _lines(user_id):
+    return sorted(cart.cart_lines.get(user_id, {}).values(), key=lambda i: i.id)
+
+
+def _summary(client, user_id):
+    return client.get(f"/api/cart/?user_id={user_id}").get_json()["summary"]
+
+
+def test_tax_rounds_half_up_in_cents():
+    assert tax_cents(0) == 0
+    assert tax_cents(1000) == 80
+    assert tax_cents(1006) == 80   # 80.48
+    assert tax_cents(1007) == 81   # 80.56
+    assert to_cents(100.5) * 3 == 30150
+
+
+def test_index_recomputes_after_price_change():
+    prices = {1: 1.10, 2: 2.25}
+    index = CartTotalsIndex(lambda cart_id, product_id, quantity: to_cents(prices[product_id]) * quantity)
+    index.apply("c", 1, 0, 3)
+    index.apply("c", 2, 0, 1)
+    assert index.summary("c", lambda: pytest.fail("no debía recalcular"))["subtotal"] == 5.55
+
+    class Line:
+        def __init__(self, product_id, quantity):
+            self.product_id, self.quantity = product_id, quantity
+
+    prices[1] = 2.00
+    index.invalidate()
+    assert index.summary("c", lambda: [Line(1, 3), Line(2, 1)])["subtotal"] == 8.25
+
+
+def test_shipping_matches_the_order_rules():
+    assert shipping_cents(0) == 0
+    assert shipping_cents(9999) == 1000
+    assert shipping_cents(10000) == 0
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_totals_match_recomputed_under_random_operations(client, catalog, seed):
+    """Propiedad: tras cualquier secuencia de operaciones el resumen mantenido
+    es igual al recalculado desde las líneas, y ambos a lo que cobraría el
+    checkout (price_items, con tramos por volumen)"""
+    rng = random.Random(seed)
+    users = [next(_user_ids) for _ in range(3)]
+    expected = {user_id: {} for user_id in users}   # user_id -> {product_id: cantidad}
+    _run_operations(client, rng, users, expected, catalog)
+
+
+def _run_operations(client, rng, users, expected, product_ids):
+    for _ in range(250):
+        user_id = rng.choice(users)
+        lines = _lines(user_id)
+        operation = rng.choice(["add", "add", "batch", "update", "update", "remove",
+                                "merge", "clear", "price"])
+
+        if operation == "add":
+            product_id, quantity = rng.choice(product_ids), rng.randint(1, 8)
+            client.post("/api/cart/add", json={"user_id": user_id, "product_id": product_id,
+                                               "quantity": quantity})
+            expected[user_id][product_id] = expected[user_id].get(product_id, 0) + quantity
+        elif operation == "batch":
+            items = [{"product_id": rng.choice(product_ids), "quantity": rng.randint(1, 3)}
+                     for _ in range(rng.randint(1, 4))]
+            client.post("/api/cart/add/batch", json={"user_id": user_id, "items": items})
+            for item in items:
+                product_id = item["product_id"]
+                expected[user_id][product_id] = expected[user_id].get(product_id, 0) + item["quantity"]
+        elif operation == "update" and lines:
+            item, quantity = rng.choice(lines), rng.randint(0, 12)
+            client.put(f"/api/cart/update/{item.id}", json={"quantity": quantity})
+            if quantity:
+                expected[user_id][item.product_id] = quantity
+            else:
+                del expected[user_id][item.product_id]
+        elif operation == "remove" and lines:
+            item = rng.choice(lines)
+            client.delete(f"/api/cart/remove/{item.id}")
+            del expected[user_id][item.product_id]
+        elif operation == "merge":
+            source = rng.choice([u for u in users if u != user_id])
+            response = client.post("/api/cart/merge", json={"user_id": user_id, "from_cart_id": source})
+            if response.status_code == 200:
+                for product_id, quantity in expected[source].items():
+                    expected[user_id][product_id] = expected[user_id].get(product_id, 0) + quantity
+                expected[source] = {}
+        elif operation == "clear":
+            client.post("/api/cart/clear", json={"user_id": user_id})
+            expected[user_id] = {}
+        elif operation == "price":
+            pricing.set_catalog_price(rng.choice(product_ids), round(rng.uniform(0.01, 300), 2))
+
+        for checked in users:
+            lines = _lines(checked)
+            assert {i.product_id: i.quantity for i in lines} == expected[checked]
+            checkout = pricing.price_items(
+                [{"product_id": p, "quantity": q} for p, q in expected[checked].items()])
+            summary = _summary(client, checked)
+            assert summary == cart.cart_totals.recompute(checked, lines)
+            assert summary["subtotal"] == checkout["subtotal"]
+            assert summary["total_items"] == sum(expected[checked].values())
+
+
+def test_catalog_price_change_reaches_cart_and_checkout(make_app, catalog):
+    client = make_app("cart", "orders", "products").test_client()
+    user_id = next(_user_ids)
+    client.post("/api/cart/add", json={"user_id": user_id, "product_id": 3, "quantity": 10})
+    before = _summary(client, user_id)
+    assert before["subtotal"] == 1432.12   # 10 x 150.75 con 5% por volumen
+
+    assert client.put("/api/products/3/price", json={"price": -1}).status_code == 400
+    assert client.put("/api/products/999999/price", json={"price": 1}).status_code == 404
+    assert client.put("/api/products/3/price", json={"price": 20.00}).status_code == 200
+    assert client.get("/api/products/3").get_json()["price"] == 20.00
+    summary = _summary(client, user_id)
+    assert summary["subtotal"] == 190.00
+    assert summary["shipping"] == 0 and summary["tax"] == 15.20 and summary["total"] == 205.20
+
+    order = client.post("/api/orders/checkout", json={"user_id": user_id}).get_json()["order"]
+    assert [order[key] for key in ("subtotal", "shipping", "tax", "total")] == \
+        [summary[key] for key in ("subtotal", "shipping", "tax", "total")]
+    orders.order_states.transition(orders.order_states.get(order["id"]), "cancelled")
+
+
+@pytest.mark.parametrize("quantity", [True, 2.5, "2", None, [1], -1])
+def test_update_rejects_invalid_quantity(client, quantity):
+    user_id = next(_user_ids)
+    client.post("/api/cart/add", json={"user_id": user_id, "product_id": 1, "quantity": 2})
+    item = _lines(user_id)[0]
+
+    response = client.put(f"/api/cart/update/{item.id}", json={"quantity": quantity})
+    assert response.status_code == 400
+    assert item.quantity == 2
+    assert _summary(client, user_id)["total_items"] == 2
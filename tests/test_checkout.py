@@ -0,0 +1,111 @@
+import itertools
+import os
+import threading
+
+import pytest
+
+from api.journal import Journal
+from api.routes import cart, inventory, orders
+
+_user_ids = itertools.count(972000)
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app("cart", "orders").test_client()
+
+
+def _fill_cart(client, user_id):
+    client.post("/api/cart/add", json={"user_id": user_id, "product_id": 1, "quantity": 1})
+
+
+def test_checkout_creates_the_order_and_empties_the_cart(client):
+    user_id = next(_user_ids)
+    assert client.post("/api/orders/checkout", json={"user_id": user_id}).status_code == 400
+
+    _fill_cart(client, user_id)
+    response = client.post("/api/orders/checkout", json={"user_id": user_id})
+    assert response.status_code == 201
+    order = response.get_json()["order"]
+    assert [item["product_id"] for item in order["items"]] == [1]
+    assert order["id"] in orders.stock_holds
+    assert user_id not in cart.cart_lines
+
+
+def test_durability_wait_happens_after_the_cart_lock_is_released(client, tmp_path, monkeypatch):
+    journal = Journal(str(tmp_path), sync="batch", fsync_window=0)
+    for module in (cart, orders, inventory):
+        monkeypatch.setattr(module, "journal", journal)
+    user_id = next(_user_ids)
+    _fill_cart(client, user_id)
+
+    # El fsync queda bloqueado hasta que el test lo suelte
+    in_fsync, release = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        in_fsync.set()
+        release.wait(10)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    responses = []
+    thread = threading.Thread(target=lambda: responses.append(
+        client.post("/api/orders/checkout", json={"user_id": user_id})))
+    thread.start()
+    try:
+        assert in_fsync.wait(10)
+        # Mientras espera el disco el carrito ya está libre, pero la orden no se devolvió
+        assert cart._lock.acquire(timeout=5)
+        cart._lock.release()
+        assert user_id not in cart.cart_lines
+        assert not responses
+    finally:
+        release.set()
+        thread.join(10)
+        journal.close()
+
+    assert responses[0].status_code == 201
+    assert journal.stats["records"] >= 4   # stock, orden, retención y carrito
+
+
+def _stock(product_id):
+    return inventory.inventory_index[product_id]["current_stock"]
+
+
+@pytest.mark.parametrize("shipping", ["free", -500])
+def test_checkout_ignores_client_shipping(client, shipping):
+    user_id = next(_user_ids)
+    _fill_cart(client, user_id)
+    response = client.post("/api/orders/checkout", json={"user_id": user_id, "shipping": shipping})
+    assert response.status_code == 201
+    order = response.get_json()["order"]
+    assert order["shipping"] in (0, 10.0)
+    assert order["total"] == pytest.approx(order["subtotal"] + order["shipping"] + order["tax"])
+    assert order["total"] > 0
+
+
+def test_failed_checkout_returns_the_stock_and_keeps_the_cart(client, monkeypatch):
+    user_id = next(_user_ids)
+    _fill_cart(client, user_id)
+    # Primer checkout para que el producto tenga registro de inventario
+    client.post("/api/orders/checkout", json={"user_id": user_id})
+    _fill_cart(client, user_id)
+    before = _stock(1)
+
+    def broken_record(*args):
+        raise RuntimeError("disco lleno")
+
+    monkeypatch.setattr(orders, "create_order_record", broken_record)
+    with pytest.raises(RuntimeError):
+        client.post("/api/orders/checkout", json={"user_id": user_id})
+    assert _stock(1) == before
+    assert user_id in cart.cart_lines
+
+
+@pytest.mark.parametrize("items", [[1, "x"], [None], "abc", {"product_id": 1},
+                                   [{"product_id": [1]}], [{"product_id": 1, "quantity": True}]])
+def test_create_order_rejects_malformed_lines(client, items):
+    response = client.post("/api/orders/", json={"user_id": next(_user_ids), "items": items})
+    assert response.status_code == 400
+    assert response.get_json()["details"]
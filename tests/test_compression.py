@@ -0,0 +1,114 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from api import compression
+from api.compression import cached_response, compress_bytes, compress_stream, init_compression
+
+
+@pytest.fixture
+def client():
+    app = Flask("tests")
+    init_compression(app)
+    payload = {"items": [{"id": i, "name": f"Producto {i}"} for i in range(200)]}
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route("/large")
+    def large():
+        return jsonify(payload)
+
+    @app.route("/binary")
+    def binary():
+        return Response(b"\x89PNG" * 1000, mimetype="image/png")
+
+    @app.route("/stream")
+    def stream():
+        return Response((json.dumps(item) + "\n" for item in payload["items"]),
+                        mimetype="text/plain")
+
+    @app.route("/cached")
+    @cached_response(ttl=60, namespace="tests-cached")
+    def cached():
+        cached.calls += 1
+        return jsonify(payload)
+    cached.calls = 0
+
+    app.payload = payload
+    app.cached_view = cached
+    compression.invalidate_cache("tests-cached")
+    return app.test_client()
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"ok": True}
+
+
+def test_large_response_is_gzipped_and_round_trips(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    body = gzip.decompress(response.data)
+    assert json.loads(body) == client.application.payload
+    assert len(response.data) < len(body) / 3
+
+
+def test_deflate_and_no_accept_encoding(client):
+    response = client.get("/large", headers={"Accept-Encoding": "deflate"})
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert json.loads(zlib.decompress(response.data)) == client.application.payload
+
+    plain = client.get("/large")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_json() == client.application.payload
+
+
+def test_incompressible_mimetype_is_untouched(client):
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.data == b"\x89PNG" * 1000
+
+
+def test_streamed_response_is_compressed_by_chunks(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert [json.loads(line) for line in lines] == client.application.payload["items"]
+
+
+def test_cached_response_is_compressed_once(client, monkeypatch):
+    calls = []
+    real = compression.compress_bytes
+
+    def counting(data, encoding, level=compression.DEFAULT_LEVEL):
+        calls.append(encoding)
+        return real(data, encoding, level)
+
+    monkeypatch.setattr(compression, "compress_bytes", counting)
+    bodies = [client.get("/cached", headers={"Accept-Encoding": "gzip"}).data for _ in range(5)]
+    assert calls == ["gzip"]
+    assert client.application.cached_view.calls == 1
+    assert len(set(bodies)) == 1
+    assert json.loads(gzip.decompress(bodies[0])) == client.application.payload
+
+    # Otra codificación agrega su variante sin volver a ejecutar la vista
+    client.get("/cached", headers={"Accept-Encoding": "deflate"})
+    assert calls == ["gzip", "deflate"]
+    assert client.application.cached_view.calls == 1
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+def test_stream_output_matches_whole_body(encoding):
+    chunks = [f"linea {i}\n" for i in range(1000)]
+    streamed = b"".join(compress_stream(iter(chunks), encoding))
+    whole = compress_bytes("".join(chunks).encode(), encoding)
+    decompress = gzip.decompress if encoding == "gzip" else zlib.decompress
+    assert decompress(streamed) == decompress(whole)
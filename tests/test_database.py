@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from api.database import database_url, engine_options, init_database, pool_metrics
+from api.models import db
+
+
+@pytest.fixture
+def env(monkeypatch):
+    for name in ("DATABASE_URL", "DATABASE_REPLICA_URL", "DB_POOL_SIZE", "DB_MAX_OVERFLOW",
+                 "DB_POOL_TIMEOUT", "DB_POOL_RECYCLE", "DB_POOL_PRE_PING", "DB_STATEMENT_TIMEOUT_MS"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_database_url_normalizes_heroku_scheme(env):
+    assert database_url() == "sqlite:////tmp/test.db"
+    env.setenv("DATABASE_URL", "postgres://u:p@db/app")
+    assert database_url() == "postgresql://u:p@db/app"
+    assert database_url("DATABASE_REPLICA_URL", default=None) is None
+
+
+def test_engine_options_per_backend(env):
+    env.setenv("DB_POOL_SIZE", "7")
+    env.setenv("DB_STATEMENT_TIMEOUT_MS", "2500")
+
+    memory = engine_options("sqlite://")
+    assert "pool_size" not in memory and "connect_args" not in memory
+
+    sqlite_file = engine_options("sqlite:////tmp/x.db")
+    assert sqlite_file["pool_size"] == 7
+    assert sqlite_file["connect_args"] == {"check_same_thread": False}
+
+    postgres = engine_options("postgresql://db/app")
+    assert postgres["pool_size"] == 7 and postgres["max_overflow"] == 10
+    assert postgres["pool_recycle"] == 1800 and postgres["pool_pre_ping"] is True
+    assert postgres["connect_args"] == {"options": "-c statement_timeout=2500"}
+
+
+def test_pool_is_bounded_and_instrumented(env, tmp_path):
+    env.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'pool.db'}")
+    env.setenv("DB_POOL_SIZE", "2")
+    env.setenv("DB_MAX_OVERFLOW", "1")
+    app = init_database(Flask("tests"))
+    # Los contadores son del proceso: otros tests también abren conexiones
+    before = pool_metrics(app)["counters"]
+
+    def query():
+        with app.app_context():
+            for _ in range(20):
+                db.session.execute(text("SELECT 1"))
+                db.session.remove()
+
+    threads = [threading.Thread(target=query) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = pool_metrics(app)
+    pool = metrics["pools"][0]
+    assert pool["pool_class"] == "QueuePool" and pool["size"] == 2
+    assert pool["checked_out"] == 0
+    counters = {name: value - before[name] for name, value in metrics["counters"].items()}
+    # Las conexiones se reutilizan: como mucho size + overflow aperturas
+    assert 1 <= counters["connects"] <= 3
+    assert counters["checkouts"] >= 120
+    assert counters["checkins"] == counters["checkouts"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requiere fork")
+def test_forked_child_does_not_reuse_parent_connections(env, tmp_path):
+    env.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'fork.db'}")
+    app = init_database(Flask("tests"))
+    with app.app_context():
+        db.session.execute(text("SELECT 1"))
+        db.session.remove()
+    assert pool_metrics(app)["pools"][0]["checked_in"] == 1
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        metrics = pool_metrics(app)
+        os.write(write_fd, f"{metrics['pools'][0]['checked_in']},{metrics['counters']['connects']}".encode())
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as pipe:
+        assert pipe.read() == "0,0"
+    assert pool_metrics(app)["pools"][0]["checked_in"] == 1
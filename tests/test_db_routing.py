@@ -0,0 +1,60 @@
+import time
+
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+from api import db_routing
+from api.db_routing import STICKY_COOKIE, STICKY_HEADER, init_read_routing, use_replica
+
+
+@pytest.fixture
+def client():
+    bp = Blueprint("products", __name__)
+
+    @bp.route("/", methods=["GET"])
+    def read():
+        return jsonify({"replica": use_replica()})
+
+    @bp.route("/", methods=["POST"])
+    def write():
+        return jsonify({}), 201
+
+    @bp.route("/fail", methods=["POST"])
+    def fail():
+        return jsonify({}), 400
+
+    app = Flask("tests")
+    app.register_blueprint(bp, url_prefix="/api/products")
+    init_read_routing(app)
+    return app.test_client(use_cookies=False)
+
+
+def _replica(client, headers=None):
+    return client.get("/api/products/", headers=headers or {}).get_json()["replica"]
+
+
+def test_reads_use_replica_until_a_write(client):
+    assert _replica(client) is True
+    response = client.post("/api/products/")
+    primary_until = response.headers[STICKY_HEADER]
+    assert time.time() < float(primary_until) <= time.time() + db_routing.STICKY_SECONDS
+
+    # El cliente reenvía el header (sin cookies, como con CORS origins="*")
+    assert _replica(client, {STICKY_HEADER: primary_until}) is False
+    assert _replica(client) is True
+
+
+def test_failed_writes_do_not_stick(client):
+    assert STICKY_HEADER not in client.post("/api/products/fail").headers
+
+
+def test_cookie_still_works_for_same_origin(client):
+    cookie = client.post("/api/products/").headers["Set-Cookie"]
+    assert cookie.startswith(f"{STICKY_COOKIE}=")
+    value = cookie.split(";")[0].split("=", 1)[1]
+    assert _replica(client, {"Cookie": f"{STICKY_COOKIE}={value}"}) is False
+
+
+@pytest.mark.parametrize("value", ["abc", "0", str(time.time() - 1), str(time.time() + 10 ** 6)])
+def test_invalid_expired_or_forged_values_read_from_replica(client, value):
+    assert _replica(client, {STICKY_HEADER: value}) is True
@@ -0,0 +1,90 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from api.forecasting import daily_sales_matrix, forecast_demand, reorder_status, smoothing_weights
+
+_product_ids = itertools.count(950000)
+
+
+def test_smoothing_weights_sum_to_one_and_favor_recent_days():
+    weights = smoothing_weights(365, alpha=0.3)
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights[-1] == pytest.approx(0.3)
+    assert np.all(np.diff(weights[1:]) > 0)
+
+
+def test_constant_demand_is_forecast_exactly():
+    matrix = np.full((3, 90), 4.0)
+    result = forecast_demand(matrix, np.array([0.0, 30.0, 100.0]), np.array([500.0] * 3),
+                             np.array([7.0, 7.0, 14.0]))
+    assert result["demand_rate"] == pytest.approx([4.0, 4.0, 4.0])
+    assert result["demand_std"] == pytest.approx([0.0, 0.0, 0.0])
+    assert result["reorder_point"] == pytest.approx([28.0, 28.0, 56.0])
+    # order_up_to = reorder_point + demanda * 7 días de revisión
+    assert list(result["reorder_quantity"]) == [56, 26, 0]
+    assert list(result["needs_reorder"]) == [True, False, False]
+
+
+def test_daily_matrix_drops_sales_outside_the_window():
+    dates = np.array(["2026-01-01", "2026-01-10", "2026-01-10", "2025-12-01"], dtype="datetime64[D]")
+    matrix = daily_sales_matrix((np.array([0, 0, 1, 1]), dates, np.array([2.0, 3.0, 5.0, 9.0])),
+                                2, 10, "2026-01-10")
+    assert matrix.shape == (2, 10)
+    assert matrix[0].tolist() == [2.0] + [0.0] * 8 + [3.0]
+    assert matrix[1].sum() == 5.0
+
+
+def test_forecast_tracks_true_demand_rate():
+    """Precisión: ventas Poisson con tasa conocida por SKU, 1 año de historia"""
+    rng = np.random.default_rng(3)
+    rates = rng.uniform(5, 50, 5000)
+    matrix = rng.poisson(rates[:, None], (5000, 365)).astype(np.float64)
+    result = forecast_demand(matrix, np.zeros(5000), np.full(5000, 1e9), np.full(5000, 7.0))
+
+    relative = result["demand_rate"] / rates
+    assert abs(relative.mean() - 1) < 0.02            # sin sesgo
+    assert np.median(np.abs(relative - 1)) < 0.15     # error típico del suavizado con alpha 0.3
+    assert np.corrcoef(result["demand_std"] ** 2, rates)[0, 1] > 0.95
+
+    # El punto de reorden cubre la demanda de los 7 días de entrega ~95% de las veces
+    lead_time_demand = rng.poisson(rates * 7)
+    assert 0.93 < (lead_time_demand <= result["reorder_point"]).mean() < 0.98
+
+
+def test_reorder_status_uses_current_stock():
+    forecast = {"order_up_to": 40.0, "reorder_point": 25.0}
+    assert reorder_status(forecast, 10) == {"reorder_quantity": 30, "needs_reorder": True}
+    assert reorder_status(forecast, 25) == {"reorder_quantity": 15, "needs_reorder": True}
+    assert reorder_status(forecast, 60) == {"reorder_quantity": 0, "needs_reorder": False}
+
+
+def test_low_stock_reorder_quantity_follows_stock_after_forecast(make_app, monkeypatch):
+    from api.routes import products
+
+    client = make_app("inventory").test_client()
+    product_id = next(_product_ids)
+    monkeypatch.setattr(products, "products_db", products.products_db + [{"id": product_id, "name": "Test"}])
+    client.post("/api/inventory/update-stock",
+                json={"product_id": product_id, "quantity": 60, "type": "restock"})
+    for _ in range(10):
+        client.post("/api/inventory/update-stock",
+                    json={"product_id": product_id, "quantity": 2, "type": "sale"})
+
+    assert client.post("/api/inventory/forecast/run").status_code == 200
+    forecast = client.get(f"/api/inventory/forecast/{product_id}").get_json()["forecast"]
+    assert forecast["current_stock"] == 40
+
+    # Vender después del lote: la cantidad a pedir sigue al stock de ahora
+    client.post("/api/inventory/update-stock",
+                json={"product_id": product_id, "quantity": 15, "type": "sale"})
+    after = client.get(f"/api/inventory/forecast/{product_id}").get_json()["forecast"]
+    assert after["current_stock"] == 25
+    assert after["order_up_to"] == forecast["order_up_to"]
+    assert after["reorder_quantity"] == max(int(np.ceil(forecast["order_up_to"] - 25)), 0)
+    assert after["reorder_quantity"] > forecast["reorder_quantity"]
+
+    low = client.get("/api/inventory/low-stock?threshold=25").get_json()["low_stock_items"]
+    item = next(i for i in low if i["product_id"] == product_id)
+    assert item["reorder_quantity"] == after["reorder_quantity"]
@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from api import ids as ids_module
+from api.ids import MAX_WORKERS, IdGenerator, claim_worker_id, parse_id
+
+
+def test_ids_are_unique_increasing_and_fit_in_53_bits():
+    generator = IdGenerator(worker_id=3)
+    ids = [generator.next_id() for _ in range(5000)]
+    assert ids == sorted(set(ids))
+    assert max(ids) < 2 ** 53
+    assert {parse_id(value)[1] for value in ids} == {3}
+    assert abs(parse_id(ids[-1])[0] - time.time() * 1000) < 5000
+
+
+def test_threads_never_share_an_id():
+    generator = IdGenerator(worker_id=4)
+    results = [[] for _ in range(8)]
+
+    def take(out):
+        for _ in range(3000):
+            out.append(generator.next_id())
+
+    threads = [threading.Thread(target=take, args=(out,)) for out in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    every = [value for out in results for value in out]
+    assert len(set(every)) == len(every)
+    assert all(out == sorted(out) for out in results)
+
+
+def test_reserve_and_advance_past_keep_later_ids_ahead():
+    generator = IdGenerator(worker_id=5)
+    reserved = generator.reserve(1000)
+    assert reserved == sorted(set(reserved)) and len(reserved) == 1000
+    assert generator.next_id() > reserved[-1]
+
+    future = reserved[-1] + (1000 << 13)   # ~1 s de ids más adelante
+    generator.advance_past(future)
+    assert parse_id(generator.next_id())[0] > parse_id(future)[0]
+
+
+def test_claimed_worker_ids_are_exclusive_per_process(tmp_path, monkeypatch):
+    monkeypatch.setenv("ID_WORKER_DIR", str(tmp_path))
+    monkeypatch.setenv("ID_WORKER_IDS", "7-8")
+    first, fd = claim_worker_id()
+    assert first == 7
+
+    # El generador del hijo de un fork reclama otro número: el 7 sigue tomado
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    child = context.Process(target=lambda: queue.put(ids_module.ids.worker_id))
+    child.start()
+    assert queue.get(timeout=10) == 8
+    child.join()
+
+    os.close(fd)
+    again, fd = claim_worker_id()
+    os.close(fd)
+    assert again == 7
+
+
+def test_fixed_worker_id_is_validated():
+    with pytest.raises(ValueError):
+        IdGenerator(worker_id=MAX_WORKERS)
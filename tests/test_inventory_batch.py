@@ -0,0 +1,99 @@
+import itertools
+
+import pytest
+
+from api.routes import inventory
+
+_product_ids = itertools.count(910000)
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app("inventory").test_client()
+
+
+def _stock(product_id):
+    record = inventory.inventory_index.get(product_id)
+    return record["current_stock"] if record else None
+
+
+def _restocked(client, quantity=10):
+    product_id = next(_product_ids)
+    client.post("/api/inventory/update-stock",
+                json={"product_id": product_id, "quantity": quantity, "type": "restock"})
+    return product_id
+
+
+BAD_MOVEMENTS = [
+    ({"quantity": "3", "type": "restock"}, "entero positivo"),
+    ({"quantity": 2.5, "type": "restock"}, "entero positivo"),
+    ({"quantity": True, "type": "restock"}, "entero positivo"),
+    ({"quantity": -100, "type": "sale"}, "entero positivo"),
+    ({"quantity": 0, "type": "restock"}, "entero positivo"),
+    ({"quantity": 1, "type": "refund"}, "Tipo inválido"),
+]
+
+
+@pytest.mark.parametrize("fields,message", BAD_MOVEMENTS)
+def test_single_update_rejects_invalid_movement(client, fields, message):
+    product_id = _restocked(client)
+    response = client.post("/api/inventory/update-stock", json={"product_id": product_id, **fields})
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+    assert _stock(product_id) == 10
+
+
+def test_single_update_requires_fields(client):
+    response = client.post("/api/inventory/update-stock", json={"quantity": 1, "type": "sale"})
+    assert response.status_code == 400
+    assert "requeridos" in response.get_json()["error"]
+
+
+def test_per_item_reports_bad_movements_and_applies_the_rest(client):
+    product_id = _restocked(client)
+    movements = [{"product_id": product_id, **fields} for fields, _ in BAD_MOVEMENTS]
+    movements.append({"product_id": "abc", "quantity": 1, "type": "restock"})
+    movements.append({"product_id": product_id, "quantity": 4, "type": "sale"})
+
+    response = client.post("/api/inventory/update-stock/batch",
+                           json={"mode": "per_item", "movements": movements})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["applied"] == 1 and body["failed"] == len(movements) - 1
+    assert [r["success"] for r in body["results"]] == [False] * (len(movements) - 1) + [True]
+    assert body["results"][-2]["error"] == "product_id debe ser un entero"
+    assert _stock(product_id) == 6
+
+
+def test_atomic_rejects_the_whole_batch(client):
+    product_id = _restocked(client)
+    response = client.post("/api/inventory/update-stock/batch", json={"movements": [
+        {"product_id": product_id, "quantity": 3, "type": "sale"},
+        {"product_id": product_id, "quantity": -100, "type": "sale"},
+        {"product_id": product_id, "quantity": "2", "type": "restock"},
+    ]})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["applied"] == 0
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    assert _stock(product_id) == 10
+
+
+def test_atomic_checks_projected_stock_across_items(client):
+    product_id = _restocked(client)
+    response = client.post("/api/inventory/update-stock/batch", json={"movements": [
+        {"product_id": product_id, "quantity": 6, "type": "sale"},
+        {"product_id": product_id, "quantity": 6, "type": "sale"},
+    ]})
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"index": 1, "product_id": product_id, "error": "Stock insuficiente"}]
+
+    response = client.post("/api/inventory/update-stock/batch", json={"movements": [
+        {"product_id": product_id, "quantity": 6, "type": "sale"},
+        {"product_id": product_id, "quantity": 5, "type": "restock"},
+        {"product_id": product_id, "quantity": 9, "type": "sale"},
+    ]})
+    assert response.status_code == 200
+    assert _stock(product_id) == 0
+    assert [r["movement"]["new_stock"] for r in response.get_json()["results"]] == [4, 9, 0]
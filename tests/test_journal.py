@@ -0,0 +1,199 @@
+import os
+import pickle
+import threading
+
+import pytest
+
+from api import journal as journal_module
+from api.journal import Journal, JournalWriteError
+
+
+def _journal(directory, stores, **options):
+    journal = Journal(str(directory), sync="batch", snapshot_every=10 ** 9, fsync_window=0, **options)
+    for name, entries in stores.items():
+        journal.register(name, lambda entries=entries: dict(entries), entries.update)
+    return journal
+
+
+def _recovered(directory, *names):
+    stores = {name: {} for name in names}
+    journal = _journal(directory, stores)
+    journal.recover()
+    journal.close()
+    return stores
+
+
+def test_snapshot_runs_in_a_thread_without_fork(tmp_path, monkeypatch):
+    def no_fork():
+        raise AssertionError("el snapshot no debe hacer fork")
+
+    monkeypatch.setattr(os, "fork", no_fork)
+    monkeypatch.setattr(journal_module, "SNAPSHOT_CHUNK", 7)
+    items = {}
+    journal = _journal(tmp_path, {"items": items})
+    for key in range(100):
+        items[key] = {"n": key}
+        journal.record("items", key, items[key])
+    journal.snapshot()
+    journal.close()
+
+    assert journal.stats["snapshots"] == 1
+    assert _recovered(tmp_path, "items")["items"] == items
+
+
+def test_snapshot_with_concurrent_writers_recovers_latest_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "SNAPSHOT_CHUNK", 50)
+    items = {}
+    lock = threading.Lock()
+    journal = _journal(tmp_path, {"items": items})
+    for key in range(2000):
+        items[key] = 0
+    journal.record_many("items", items.items())
+
+    stop = threading.Event()
+
+    def writer(offset):
+        version = 0
+        while not stop.is_set():
+            version += 1
+            for key in range(offset, 2000, 4):
+                with lock:
+                    items[key] = version
+                    journal.record("items", key, version)
+                if stop.is_set():
+                    break
+
+    threads = [threading.Thread(target=writer, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(3):
+        journal.snapshot()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    assert journal.stats["snapshots"] == 3
+    assert _recovered(tmp_path, "items")["items"] == items
+
+
+def test_failed_write_is_reported_to_the_waiter(tmp_path, monkeypatch):
+    items = {}
+    journal = _journal(tmp_path, {"items": items})
+    journal.record("items", "before", 1)
+
+    real_fsync = os.fsync
+    failures = [OSError(5, "Input/output error")]
+
+    def flaky_fsync(fd):
+        if failures:
+            raise failures.pop()
+        real_fsync(fd)
+
+    monkeypatch.setattr(journal_module.os, "fsync", flaky_fsync)
+    with pytest.raises(JournalWriteError):
+        journal.record("items", "lost", 2)
+    journal.record("items", "after", 3)
+    journal.close()
+
+    assert journal.stats["failed_batches"] == 1
+    assert _recovered(tmp_path, "items")["items"] == {"before": 1, "after": 3}
+
+
+def test_recovers_snapshot_in_previous_format(tmp_path):
+    with open(tmp_path / f"snapshot-{2:020d}.bin", "wb") as f:
+        pickle.dump({"lsn": 2, "stores": {"items": {"a": 1, "b": 2}}}, f)
+    journal = _journal(tmp_path, {"items": {}})
+    journal.close()
+
+    assert _recovered(tmp_path, "items")["items"] == {"a": 1, "b": 2}
+
+
+def test_truncated_snapshot_falls_back_to_the_previous_one(tmp_path):
+    items = {}
+    journal = _journal(tmp_path, {"items": items})
+    items["a"] = 1
+    journal.record("items", "a", 1)
+    first = journal.snapshot()
+    items["b"] = 2
+    journal.record("items", "b", 2)
+    journal.close()
+
+    # Un snapshot posterior cortado antes del final: se ignora y se reaplica el WAL
+    data = open(tmp_path / f"snapshot-{first:020d}.bin", "rb").read()
+    with open(tmp_path / f"snapshot-{first + 5:020d}.bin", "wb") as f:
+        f.write(data[:-len(pickle.dumps(None))])
+
+    assert _recovered(tmp_path, "items")["items"] == {"a": 1, "b": 2}
+
+
+class PausingJournal(Journal):
+    """Frena el primer registro del hilo "updater" hasta que el test lo suelte"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.paused, self.resume = threading.Event(), threading.Event()
+
+    def record_many(self, store, entries):
+        if threading.current_thread().name == "updater" and not self.paused.is_set():
+            self.paused.set()
+            self.resume.wait(10)
+        super().record_many(store, entries)
+
+
+def test_cart_wal_follows_the_order_of_the_changes(make_app, tmp_path, monkeypatch):
+    from api.routes import cart
+
+    journal = PausingJournal(str(tmp_path), sync="batch", fsync_window=0)
+    monkeypatch.setattr(cart, "journal", journal)
+    client = make_app("cart").test_client()
+    user_id = 974100
+    client.post("/api/cart/add", json={"user_id": user_id, "product_id": 1, "quantity": 1})
+    item_id = cart.cart_lines[user_id][1].id
+
+    # Cambiar la cantidad y, mientras eso se registra, borrar la línea: el
+    # WAL tiene que terminar con el borrado, como la memoria
+    updater = threading.Thread(name="updater", target=lambda: client.put(
+        f"/api/cart/update/{item_id}", json={"quantity": 2}))
+    remover = threading.Thread(target=lambda: client.delete(f"/api/cart/remove/{item_id}"))
+    updater.start()
+    assert journal.paused.wait(10)
+    remover.start()
+    remover.join(0.2)
+    journal.resume.set()
+    updater.join(10)
+    remover.join(10)
+    journal.close()
+
+    assert item_id not in cart.cart_items_db
+    assert item_id not in _recovered(tmp_path, "cart_items", "carts")["cart_items"]
+
+
+def test_stock_changes_reach_products_in_order(make_app, tmp_path, monkeypatch):
+    from api.routes import inventory, products
+
+    journal = PausingJournal(str(tmp_path), sync="batch", fsync_window=0)
+    monkeypatch.setattr(inventory, "journal", journal)
+    client = make_app("inventory").test_client()
+    product_id = inventory.inventory_db[0]['product_id']
+
+    def move(kind, quantity):
+        client.post("/api/inventory/update-stock", json={
+            "product_id": product_id, "quantity": quantity, "type": kind})
+
+    # Una venta frenada en el WAL y un restock que llega mientras tanto: el
+    # stock de products_db tiene que quedar con el último valor
+    seller = threading.Thread(name="updater", target=move, args=("sale", 1))
+    restocker = threading.Thread(target=move, args=("restock", 1))
+    seller.start()
+    assert journal.paused.wait(10)
+    restocker.start()
+    restocker.join(0.2)
+    journal.resume.set()
+    seller.join(10)
+    restocker.join(10)
+    journal.close()
+
+    stock = inventory.inventory_index[product_id]['current_stock']
+    assert products.products_index[product_id]['stock'] == stock
+    assert _recovered(tmp_path, "inventory")["inventory"][product_id]['current_stock'] == stock
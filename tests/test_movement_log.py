@@ -0,0 +1,72 @@
+import os
+
+from api.movement_log import MovementLog
+from api.records import Movement
+
+
+def _fill(log, product_id, count, start_stock=0):
+    stock = start_stock
+    for i in range(count):
+        quantity = 5 if i % 3 else -2
+        stock += quantity
+        log.append(product_id, Movement(1700000000 + i, "restock" if quantity > 0 else "sale",
+                                        quantity, stock))
+    return stock
+
+
+def test_memory_is_bounded_and_history_is_archived(tmp_path):
+    log = MovementLog(segment_size=10, max_segments=3, directory=str(tmp_path))
+    stock = _fill(log, 7, 1000)
+
+    assert log.count(7) == 1000
+    assert log.retained(7) <= 10 * 3
+    assert log.replay(7) == stock
+    # Los segmentos que salieron de memoria están en disco
+    assert len(os.listdir(log.directory)) == (1000 - log.retained(7)) // 10
+    assert log.snapshot(7)["seq"] == 1000 - log.retained(7)
+
+
+def test_pages_walk_the_whole_history_newest_first(tmp_path):
+    log = MovementLog(segment_size=10, max_segments=3, directory=str(tmp_path))
+    _fill(log, 1, 257)
+    _fill(log, 2, 40)
+
+    seen = []
+    cursor = None
+    while True:
+        items, cursor = log.page(1, before=cursor, limit=23)
+        seen.extend(items)
+        if cursor is None:
+            break
+    assert [m.id for m in seen] == list(range(257, 0, -1))
+    # new_stock encadenado: cada movimiento parte del stock del anterior
+    for newer, older in zip(seen, seen[1:]):
+        assert newer.new_stock == older.new_stock + newer.quantity
+    assert log.count(2) == 40
+
+
+def test_page_limits_and_unknown_sku(tmp_path):
+    log = MovementLog(segment_size=4, max_segments=2, directory=str(tmp_path))
+    _fill(log, 1, 20)
+    items, cursor = log.page(1, limit=5)
+    assert [m.id for m in items] == [20, 19, 18, 17, 16] and cursor == 16
+    items, cursor = log.page(1, before=3, limit=5)
+    assert [m.id for m in items] == [2, 1] and cursor is None
+    assert log.page(99) == ([], None)
+    assert log.count(99) == 0
+
+
+def test_update_stock_returns_only_the_new_movement(make_app):
+    client = make_app("inventory").test_client()
+    product_id = 424242
+    for _ in range(3):
+        response = client.post("/api/inventory/update-stock",
+                               json={"product_id": product_id, "quantity": 4, "type": "restock"})
+        assert response.status_code == 200
+    body = response.get_json()
+    assert "movements" not in body["inventory"]
+    assert body["movement"]["id"] == 3 and body["movement"]["new_stock"] == 12
+
+    page = client.get(f"/api/inventory/product/{product_id}/movements?limit=2").get_json()
+    assert [m["id"] for m in page["movements"]] == [3, 2]
+    assert page["next_cursor"] == 2
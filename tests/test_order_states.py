@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from api.order_states import InvalidTransition, OrderStateMachine
+from api.routes.orders import ORDER_TRANSITIONS
+
+
+class FakeOrder:
+    def __init__(self, order_id, status="pending_payment"):
+        self.id = order_id
+        self.status = status
+        self.created_at = self.updated_at = 0
+
+    def set_status(self, status, now):
+        self.status = status
+        self.updated_at = now
+
+
+def test_only_allowed_transitions_pass():
+    machine = OrderStateMachine(ORDER_TRANSITIONS)
+    order = FakeOrder(1)
+    machine.add(order)
+    machine.transition(order, "processing")
+    machine.transition(order, "shipped")
+
+    with pytest.raises(InvalidTransition) as error:
+        machine.transition(order, "cancelled")
+    assert error.value.allowed == ["delivered"]
+    assert order.status == "shipped"
+    assert machine.orders("shipped") == [order]
+
+
+def test_indexes_match_a_scan_under_random_transitions():
+    rng = random.Random(5)
+    machine = OrderStateMachine(ORDER_TRANSITIONS, max_events=10 ** 6)
+    orders = [FakeOrder(order_id) for order_id in range(500)]
+    for order in orders:
+        machine.add(order)
+
+    for _ in range(3000):
+        order = rng.choice(orders)
+        allowed = machine.allowed(order.status)
+        if allowed:
+            machine.transition(order, rng.choice(allowed), now=1)
+
+    for status in ORDER_TRANSITIONS:
+        assert {o.id for o in machine.orders(status)} == {o.id for o in orders if o.status == status}
+    assert sum(machine.counts().values()) == len(orders)
+    assert all(machine.get(o.id) is o for o in orders)
+
+
+def test_aliases_are_normalized_on_load():
+    machine = OrderStateMachine(ORDER_TRANSITIONS, aliases={"pending": "pending_payment"})
+    order = FakeOrder(1, status="pending")
+    machine.load([order])
+    assert order.status == "pending_payment"
+    assert machine.orders("pending_payment") == [order]
+    with pytest.raises(InvalidTransition):
+        machine.load([FakeOrder(2, status="bogus")])
+
+
+def test_event_stream_pages_and_reports_truncation():
+    machine = OrderStateMachine(ORDER_TRANSITIONS, max_events=5)
+    received = []
+    machine.subscribe(received.append)
+    orders = [FakeOrder(order_id) for order_id in range(4)]
+    for order in orders:
+        machine.add(order)
+    for order in orders:
+        machine.transition(order, "processing")
+
+    assert [e.seq for e in received] == list(range(1, 9))
+    page = machine.events_after(0, limit=2)
+    assert page["truncated"]   # los eventos 1-3 ya salieron del buffer
+    assert [e.seq for e in page["events"]] == [4, 5]
+    rest = machine.events_after(page["next_cursor"])
+    assert [e.seq for e in rest["events"]] == [6, 7, 8] and not rest["truncated"]
+    assert machine.events_after(8) == {"events": [], "next_cursor": 8, "truncated": False}
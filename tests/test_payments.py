@@ -0,0 +1,197 @@
+import threading
+import time
+
+import pytest
+
+from api import payment_queue as payment_queue_module
+from api.payment_queue import GatewayError, PaymentInProgress, PaymentQueue, SimulatedGateway
+from api.routes import orders, payments
+
+
+def _instant_gateway():
+    return SimulatedGateway(latency_ms=0, decline_rate=0, error_rate=0)
+
+
+class FlakyGateway:
+    """Falla `failures` veces y después aprueba"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def charge(self, payment):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise GatewayError("Timeout")
+        return {"status": "completed", "transaction_id": "TXN1"}
+
+
+class GatedGateway:
+    """Retiene cada cobro hasta que se abre la compuerta; aprueba o rechaza"""
+
+    def __init__(self, status="completed"):
+        self.status = status
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def charge(self, payment):
+        self.calls += 1
+        self.gate.wait(5)
+        return {"status": self.status, "transaction_id": "TXN1" if self.status == "completed" else None}
+
+
+@pytest.fixture
+def client(make_app, monkeypatch):
+    queue = PaymentQueue(gateway=_instant_gateway(),
+                         deliver=lambda event: payments.apply_payment_events([event]))
+    monkeypatch.setattr(payments, "payment_queue", queue)
+    return make_app("orders", "payments").test_client()
+
+
+def _order(client):
+    response = client.post("/api/orders/", json={
+        "user_id": 1, "items": [{"product_id": 1, "quantity": 1}]})
+    return response.get_json()["order"]
+
+
+def test_payment_charges_the_server_side_total(client):
+    order = _order(client)
+    response = client.post("/api/payments/create-payment",
+                           json={"order_id": order["id"], "wait": True})
+    assert response.status_code == 200
+    assert response.get_json()["payment"]["amount"] == order["total"]
+    assert orders.order_states.get(order["id"]).status == "processing"
+
+    # Ya pagada: un pago nuevo (sin clave) se rechaza
+    again = client.post("/api/payments/create-payment", json={"order_id": order["id"]})
+    assert again.status_code == 409
+
+
+def test_payment_rejects_unknown_orders_and_wrong_amounts(client):
+    order = _order(client)
+    assert client.post("/api/payments/create-payment", json={"order_id": -1}).status_code == 404
+    mismatch = client.post("/api/payments/create-payment",
+                           json={"order_id": order["id"], "amount": 0.01})
+    assert mismatch.status_code == 400
+    assert mismatch.get_json()["amount"] == order["total"]
+    assert client.post("/api/payments/create-payment", json={}).status_code == 400
+
+
+def test_payment_rejects_orders_not_pending_payment(client):
+    order = _order(client)
+    client.put(f"/api/orders/{order['id']}/status", json={"status": "cancelled"})
+    response = client.post("/api/payments/create-payment", json={"order_id": order["id"]})
+    assert response.status_code == 409
+    assert orders.order_states.get(order["id"]).status == "cancelled"
+
+
+def test_idempotent_retry_after_job_eviction(client, monkeypatch):
+    monkeypatch.setattr(payment_queue_module, "MAX_JOBS", 2)
+    order = _order(client)
+    first = client.post("/api/payments/create-payment", json={"order_id": order["id"], "wait": True},
+                        headers={"Idempotency-Key": "evicted-key"}).get_json()
+
+    for _ in range(3):
+        client.post("/api/payments/create-payment", json={"order_id": _order(client)["id"], "wait": True})
+    assert first["job_id"] not in payments.payment_queue.jobs
+
+    again = client.post("/api/payments/create-payment", json={"order_id": order["id"]},
+                        headers={"Idempotency-Key": "evicted-key"})
+    # La orden ya está pagada, pero la clave repetida devuelve el resultado guardado
+    assert again.status_code == 200
+    assert again.get_json()["job_id"] == first["job_id"]
+    assert again.get_json()["payment"]["payment_id"] == first["payment"]["payment_id"]
+
+
+def test_idempotency_key_reused_with_other_payload(client):
+    first, second = _order(client), _order(client)
+    client.post("/api/payments/create-payment", json={"order_id": first["id"]},
+                headers={"Idempotency-Key": "reused-key"})
+    response = client.post("/api/payments/create-payment", json={"order_id": second["id"]},
+                           headers={"Idempotency-Key": "reused-key"})
+    assert response.status_code == 409
+
+
+def test_transient_failures_are_retried(monkeypatch):
+    monkeypatch.setattr(payment_queue_module, "BACKOFF_BASE_SECONDS", 0.001)
+    gateway = FlakyGateway(failures=2)
+    delivered = []
+    queue = PaymentQueue(gateway=gateway, deliver=delivered.append, workers=1)
+
+    job, created = queue.submit({"order_id": 1, "amount": 10.0})
+    job = queue.wait(job, timeout=5)
+    assert created and job["status"] == "completed" and job["attempts"] == 3
+    assert [event["type"] for event in delivered] == ["payment.completed"]
+
+
+def test_workers_overlap_gateway_latency():
+    """40 pagos de ~50 ms con 8 hilos: ~0.25 s en vez de ~2 s en serie"""
+    queue = PaymentQueue(gateway=SimulatedGateway(latency_ms=50, decline_rate=0, error_rate=0),
+                         workers=8)
+    started = time.perf_counter()
+    jobs = [queue.submit({"order_id": i, "amount": 1.0})[0] for i in range(40)]
+    for job in jobs:
+        assert queue.wait(job, timeout=5)["status"] == "completed"
+    assert time.perf_counter() - started < 1.0
+
+
+@pytest.mark.parametrize("keys", [(None, None), ("key-a", "key-b")])
+def test_second_charge_while_the_first_is_pending_is_rejected(client, keys):
+    gateway = GatedGateway()
+    payments.payment_queue.gateway = gateway
+    order = _order(client)
+
+    def charge(key):
+        headers = {"Idempotency-Key": key} if key else {}
+        return client.post("/api/payments/create-payment", json={"order_id": order["id"]},
+                           headers=headers)
+
+    first = charge(keys[0])
+    assert first.status_code == 202
+    second = charge(keys[1])
+    assert second.status_code == 409
+    assert second.get_json()["job_id"] == first.get_json()["job_id"]
+
+    gateway.gate.set()
+    payments.payment_queue.wait(payments.payment_queue.get(first.get_json()["job_id"]), timeout=5)
+    assert gateway.calls == 1
+    assert charge(None).status_code == 409
+
+
+def test_declined_charge_allows_a_new_one(client):
+    gateway = GatedGateway(status="failed")
+    gateway.gate.set()
+    payments.payment_queue.gateway = gateway
+    order = _order(client)
+    declined = client.post("/api/payments/create-payment", json={"order_id": order["id"], "wait": True})
+    assert declined.get_json()["status"] == "failed"
+
+    gateway.status = "completed"
+    retry = client.post("/api/payments/create-payment", json={"order_id": order["id"], "wait": True})
+    assert retry.status_code == 200 and retry.get_json()["status"] == "completed"
+
+
+def test_concurrent_submits_enqueue_one_job_per_order():
+    gateway = GatedGateway()
+    queue = PaymentQueue(gateway=gateway, workers=2)
+    barrier = threading.Barrier(8)
+    created, rejected = [], []
+
+    def submit():
+        barrier.wait()
+        try:
+            created.append(queue.submit({"order_id": 7, "amount": 10.0})[0])
+        except PaymentInProgress as e:
+            rejected.append(e.job)
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gateway.gate.set()
+
+    assert len(created) == 1 and len(rejected) == 7
+    assert all(job is created[0] for job in rejected)
+    assert queue.wait(created[0], timeout=5)["status"] == "completed"
+    assert gateway.calls == 1
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+from flask import Flask
+
+from api.models import db
+from api.quote_store import MemoryQuoteStore, SqlQuoteStore, QUOTE_STATUSES
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request):
+    if request.param == "memory":
+        yield MemoryQuoteStore()
+        return
+    app = Flask("tests")
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield SqlQuoteStore()
+        db.session.remove()
+
+
+def _seed(store, count=300, seed=0):
+    rng = random.Random(seed)
+    quotes = []
+    for _ in range(count):
+        quote = store.create({"customer_id": rng.randint(1, 8), "business_id": rng.randint(1, 4),
+                              "items": [{"product_id": 1, "quantity": 1}],
+                              "status": rng.choice(QUOTE_STATUSES[:3])})
+        quotes.append(quote)
+    return quotes
+
+
+def _all_pages(store, limit, **filters):
+    ids, cursor = [], None
+    while True:
+        page, cursor = store.list(before=cursor, limit=limit, **filters)
+        ids.extend(q["id"] for q in page)
+        if cursor is None:
+            return ids
+
+
+def test_ids_are_unique_and_increasing(store):
+    ids = [q["id"] for q in _seed(store, 100)]
+    assert ids == sorted(set(ids))
+    assert store.count() == 100
+
+
+@pytest.mark.parametrize("filters", [
+    {}, {"customer_id": 3}, {"business_id": 2}, {"status": "accepted"},
+    {"customer_id": 5, "status": "pending"}, {"business_id": 1, "status": "rejected"},
+])
+def test_cursor_pages_match_a_filtered_scan(store, filters):
+    quotes = _seed(store)
+    expected = sorted((q["id"] for q in quotes
+                       if all(q[name] == value for name, value in filters.items())), reverse=True)
+    assert expected
+    for limit in (1, 7, 50, 1000):
+        assert _all_pages(store, limit, **filters) == expected
+
+
+def test_status_update_moves_quote_between_indexes(store):
+    quotes = _seed(store, 60)
+    target = next(q for q in quotes if q["status"] == "pending")
+    store.update(target["id"], status="accepted")
+
+    pending = _all_pages(store, 10, customer_id=target["customer_id"], status="pending")
+    accepted = _all_pages(store, 10, customer_id=target["customer_id"], status="accepted")
+    assert target["id"] not in pending
+    assert target["id"] in accepted
+    assert accepted == sorted(accepted, reverse=True)
+    assert store.get(target["id"])["status"] == "accepted"
+
+
+def test_unknown_quote(store):
+    assert store.get(123456789) is None
+    assert store.update(123456789, status="accepted") is None
+    assert store.list(customer_id=99) == ([], None)
+
+
+@pytest.mark.parametrize("limit", [0, -5])
+def test_non_positive_limit_is_clamped_to_one(store, limit):
+    quotes = _seed(store, 3)
+    page, cursor = store.list(limit=limit)
+    assert [q["id"] for q in page] == [quotes[-1]["id"]]
+    assert cursor == quotes[-1]["id"]
+    assert _all_pages(store, limit) == [q["id"] for q in reversed(quotes)]
+
+
+def test_route_filters_by_role_and_pages_by_cursor(make_app, monkeypatch):
+    from api.routes import quotes
+
+    monkeypatch.setattr(quotes, "quotes_store", MemoryQuoteStore())
+    for customer_id, business_id in [(1, 2), (2, 1), (1, 1), (2, 2), (1, 2)]:
+        quotes.quotes_store.create({"customer_id": customer_id, "business_id": business_id,
+                                    "items": [], "status": "pending"})
+    client = make_app("quotes").test_client()
+
+    as_business = client.get("/api/quotes/?user_id=2&role=business").get_json()["quotes"]
+    as_customer = client.get("/api/quotes/?user_id=2").get_json()["quotes"]
+    assert [q["business_id"] for q in as_business] == [2, 2, 2]
+    assert [q["customer_id"] for q in as_customer] == [2, 2]
+
+    first = client.get("/api/quotes/?user_id=1&limit=2").get_json()
+    rest = client.get(f"/api/quotes/?user_id=1&limit=2&cursor={first['next_cursor']}").get_json()
+    assert len(first["quotes"]) == 2 and len(rest["quotes"]) == 1
+    assert rest["next_cursor"] is None
+    assert len(client.get("/api/quotes/?user_id=1&limit=0").get_json()["quotes"]) == 1
+    assert client.get("/api/quotes/?status=bogus").status_code == 400
@@ -0,0 +1,153 @@
+import itertools
+
+import pytest
+
+from api import pricing
+from api.quote_store import MemoryQuoteStore
+from api.routes import auth, inventory, orders, products, quotes
+
+_product_ids = itertools.count(970000)
+
+
+@pytest.fixture
+def client(make_app, monkeypatch):
+    monkeypatch.setattr(quotes, "quotes_store", MemoryQuoteStore())
+    return make_app("quotes", "orders", "business", "inventory").test_client()
+
+
+@pytest.fixture
+def product(monkeypatch):
+    product_id = next(_product_ids)
+    monkeypatch.setitem(products.products_index, product_id,
+                        {"id": product_id, "name": "Test", "price": 10.0, "stock": 8})
+    return product_id
+
+
+def _stock(product_id):
+    record = inventory.inventory_index.get(product_id)
+    return record["current_stock"] if record else None
+
+
+def _accepted_quote(client, product_id, quantity=3):
+    quote = client.post("/api/quotes/", json={
+        "customer_id": 1, "items": [{"product_id": product_id, "quantity": quantity}]}).get_json()["quote"]
+    client.put(f"/api/quotes/{quote['id']}", json={"status": "accepted"})
+    return quote["id"]
+
+
+def test_convert_reserves_stock_once(client, product):
+    quote_id = _accepted_quote(client, product)
+    orders_before = len(orders.orders_db)
+
+    response = client.post(f"/api/quotes/{quote_id}/convert")
+    assert response.status_code == 201
+    order_id = response.get_json()["order"]["id"]
+    assert _stock(product) == 5
+    assert order_id in orders.stock_holds
+
+    again = client.post(f"/api/quotes/{quote_id}/convert")
+    assert again.status_code == 409
+    assert again.get_json()["order_id"] == order_id
+    assert len(orders.orders_db) == orders_before + 1
+    assert _stock(product) == 5
+
+
+def test_converted_is_terminal(client, product):
+    quote_id = _accepted_quote(client, product)
+    client.post(f"/api/quotes/{quote_id}/convert")
+
+    for status in ("accepted", "pending", "rejected"):
+        response = client.put(f"/api/quotes/{quote_id}", json={"status": status})
+        assert response.status_code == 409
+    assert client.post(f"/api/quotes/{quote_id}/convert").status_code == 409
+    assert quotes.quotes_store.get(quote_id)["status"] == "converted"
+
+
+def test_status_converted_only_through_convert(client, product):
+    quote_id = _accepted_quote(client, product)
+    response = client.put(f"/api/quotes/{quote_id}", json={"status": "converted"})
+    assert response.status_code == 400
+    assert quotes.quotes_store.get(quote_id)["status"] == "accepted"
+
+
+def test_convert_without_stock_creates_nothing(client, product):
+    quote_id = _accepted_quote(client, product, quantity=9)
+    orders_before = len(orders.orders_db)
+    response = client.post(f"/api/quotes/{quote_id}/convert")
+    assert response.status_code == 400
+    assert len(orders.orders_db) == orders_before
+    assert quotes.quotes_store.get(quote_id)["status"] == "accepted"
+
+
+def test_price_list_comes_from_the_account_not_the_body(client, product, monkeypatch):
+    monkeypatch.setitem(pricing.business_price_lists, 77, {product: 1.0})
+    monkeypatch.setattr(auth, "users_db", auth.users_db + [{"id": 555, "business_id": 77}])
+    pricing.invalidate_price_tables()
+
+    body = {"items": [{"product_id": product, "quantity": 1}], "business_id": 77}
+    as_stranger = client.post("/api/orders/", json={"user_id": 1, **body}).get_json()
+    as_member = client.post("/api/orders/", json={"user_id": 555, **body}).get_json()
+    assert as_stranger["order"]["subtotal"] == 10.0
+    assert as_member["order"]["subtotal"] == 1.0
+
+    quote = client.post("/api/quotes/", json={"customer_id": 1, **body}).get_json()["quote"]
+    assert quote["total_price"] == 10.0
+
+
+@pytest.mark.parametrize("body", [
+    {"prices": {"x": 5}},
+    {"prices": {"1": "abc"}},
+    {"prices": {"1": -1}},
+    {"prices": {"1": True}},
+    {"prices": {}, "volume_tiers": [5]},
+    {"prices": {}, "volume_tiers": [[0, 5]]},
+    {"prices": {}, "volume_tiers": [[10, 150]]},
+    {"prices": {}, "volume_tiers": "abc"},
+])
+def test_invalid_price_list_is_rejected(client, body):
+    response = client.put("/api/business/91/price-list", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["details"]
+    assert 91 not in pricing.business_price_lists
+
+
+def test_price_list_update_notifies_listeners(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(pricing, "_price_listeners", [lambda: calls.append(1)])
+    response = client.put("/api/business/92/price-list",
+                          json={"prices": {"1": 50}, "volume_tiers": [[1, 0], [5, 20]]})
+    assert response.status_code == 200
+    assert calls == [1]
+    assert pricing.volume_discount(6, 92) == 20
+    assert pricing.price_items([{"product_id": 1, "quantity": 1}], 92)["subtotal"] == 50.0
+
+
+@pytest.mark.parametrize("shipping", ["free", -500, 0])
+def test_convert_ignores_client_shipping(client, product, shipping):
+    quote_id = _accepted_quote(client, product)
+    response = client.post(f"/api/quotes/{quote_id}/convert", json={"shipping": shipping})
+    assert response.status_code == 201
+    order = response.get_json()["order"]
+    assert order["shipping"] == 10.0   # subtotal 30 < 100
+    assert order["total"] == pytest.approx(order["subtotal"] + 10.0 + order["tax"])
+
+
+def test_failed_convert_returns_the_stock(client, product, monkeypatch):
+    quote_id = _accepted_quote(client, product)
+
+    def broken_hold(order):
+        raise RuntimeError("disco lleno")
+
+    monkeypatch.setattr(orders, "hold_stock", broken_hold)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/quotes/{quote_id}/convert")
+    assert _stock(product) == 8
+    assert quotes.quotes_store.get(quote_id)["status"] == "accepted"
+
+
+@pytest.mark.parametrize("items", [[1, "x"], [None], "abc", {"product_id": 1},
+                                   [{"product_id": [1]}], [{"product_id": 1, "quantity": True}]])
+def test_malformed_lines_are_rejected(client, items):
+    response = client.post("/api/quotes/", json={"customer_id": 1, "items": items})
+    assert response.status_code == 400
+    assert response.get_json()["details"]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from api.cart_totals import SHIPPING_CENTS, tax_cents, to_cents
+from api.sample_data import (FREE_SHIPPING_CENTS, SAMPLE_PRODUCTS, STATUSES, build_orders,
+                             generate_order_columns)
+
+NOW = 1767225600 + 15 * 3600   # 2026-01-01 15:00 UTC
+
+
+def test_columns_are_consistent_and_reproducible():
+    columns = generate_order_columns(20000, users=500, days=30, now=NOW, seed=1)
+    again = generate_order_columns(20000, users=500, days=30, now=NOW, seed=1)
+    assert all(np.array_equal(columns[name], again[name]) for name in columns if name != "count")
+
+    created = columns["created_at"]
+    assert np.all(np.diff(created) >= 0)
+    assert created.max() <= NOW and created.min() >= NOW - 31 * 86400
+    assert set(np.unique(columns["user_id"]).tolist()) <= set(range(1, 501))
+
+    # Montos: subtotal = suma de las líneas; envío e impuesto con las reglas del checkout
+    prices = np.array([to_cents(p["price"]) for p in SAMPLE_PRODUCTS])
+    line_cents = prices[columns["item_product"]] * columns["item_quantity"]
+    offsets = columns["item_offsets"]
+    assert offsets[-1] == len(line_cents)
+    assert np.all(np.diff(offsets) >= 1)
+    assert np.array_equal(np.add.reduceat(line_cents, offsets[:-1]), columns["subtotal_cents"])
+    subtotal = columns["subtotal_cents"]
+    assert np.array_equal(columns["shipping_cents"],
+                          np.where(subtotal >= FREE_SHIPPING_CENTS, 0, SHIPPING_CENTS))
+    assert np.array_equal(columns["tax_cents"], tax_cents(subtotal))
+
+
+def test_status_follows_order_age():
+    columns = generate_order_columns(20000, days=30, now=NOW, seed=2)
+    age_days = (NOW - columns["created_at"]) / 86400
+    status = np.array(STATUSES)[columns["status"]]
+    assert not np.any((status == "delivered") & (age_days < 1))
+    assert not np.any(np.isin(status, ["pending_payment", "processing"]) & (age_days >= 5))
+    assert 0.03 < (status == "cancelled").mean() < 0.08
+
+
+def test_build_orders_matches_the_columns():
+    columns = generate_order_columns(300, users=[7, 8, 9], days=10, now=NOW, seed=3)
+    orders = build_orders(columns, ids=list(range(1, 301)))
+    assert [o.id for o in orders] == list(range(1, 301))
+    for i, order in enumerate(orders):
+        start, end = columns["item_offsets"][i], columns["item_offsets"][i + 1]
+        assert len(order.items) == end - start
+        assert order.user_id in (7, 8, 9)
+        assert order.status == STATUSES[columns["status"][i]]
+        assert round(order.subtotal * 100) == columns["subtotal_cents"][i]
+        assert order.total == pytest.approx(order.subtotal + order.shipping + order.tax)
+    assert build_orders(generate_order_columns(0, now=NOW, seed=4), ids=[]) == []
+
+
+@pytest.mark.parametrize("body", [
+    {"count": -1}, {"count": "5"}, {"count": True}, {"count": 10 ** 9},
+    {"days": -1}, {"days": 2.5}, {"users": []}, {"users": "abc"}, {"users": 0},
+    {"users": [1, "2"]}, {"user_id": None}, {"seed": "x"},
+])
+def test_generate_sample_rejects_invalid_input(make_app, body):
+    client = make_app("orders").test_client()
+    response = client.post("/api/orders/generate-sample", json=body)
+    assert response.status_code == 400
+
+
+def test_generate_sample_adds_orders(make_app):
+    from api.routes import orders
+
+    client = make_app("orders").test_client()
+    before = len(orders.orders_db)
+    response = client.post("/api/orders/generate-sample",
+                           json={"count": 25, "users": [973001, 973002], "days": 3, "seed": 5})
+    assert response.status_code == 200
+    assert len(orders.orders_db) == before + 25
+    assert {o.user_id for o in orders.orders_db[before:]} <= {973001, 973002}
@@ -0,0 +1,112 @@
+import multiprocessing
+import time
+
+import pytest
+
+from api.shared_cache import SharedMemoryCache
+
+fork = multiprocessing.get_context("fork")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def _in_child(target, *args):
+    """Correr target en otro proceso que abre su propio mapeo; devuelve lo que retorna"""
+    results = fork.Queue()
+    process = fork.Process(target=lambda: results.put(target(*args)))
+    process.start()
+    value = results.get(timeout=10)
+    process.join(10)
+    assert process.exitcode == 0
+    return value
+
+
+def test_roundtrip_and_expiry(path):
+    cache = SharedMemoryCache(path, slots=64, slot_size=1024)
+    key = cache.versioned_key("products", "list")
+    assert cache.get(key) is None
+    assert cache.set(key, {"items": [1, 2]}, time.time() + 60)
+    assert cache.get(key) == {"items": [1, 2]}
+
+    expired = cache.versioned_key("products", "old")
+    cache.set(expired, "x", time.time() - 1)
+    assert cache.get(expired) is None
+
+
+def test_values_larger_than_a_slot_are_refused(path):
+    cache = SharedMemoryCache(path, slots=8, slot_size=256)
+    assert not cache.set(cache.versioned_key("n", "k"), "x" * 1000, time.time() + 60)
+    assert cache.stats["too_large"] == 1
+
+
+def test_value_set_in_one_process_is_read_in_another(path):
+    cache = SharedMemoryCache(path, slots=64, slot_size=1024)
+    key = cache.versioned_key("products", "list")
+    cache.set(key, "computed once", time.time() + 60)
+
+    def read():
+        other = SharedMemoryCache(path, slots=64, slot_size=1024)
+        return other.get(other.versioned_key("products", "list"))
+
+    assert _in_child(read) == "computed once"
+
+
+def test_invalidation_in_one_process_is_seen_by_all(path):
+    cache = SharedMemoryCache(path, slots=64, slot_size=1024)
+    products = cache.versioned_key("products", "list")
+    orders = cache.versioned_key("orders", "list")
+    cache.set(products, "stale", time.time() + 60)
+    cache.set(orders, "kept", time.time() + 60)
+
+    def invalidate(namespace):
+        SharedMemoryCache(path, slots=64, slot_size=1024).invalidate(namespace)
+        return True
+
+    _in_child(invalidate, "products")
+    assert cache.versioned_key("products", "list") != products
+    assert cache.get(cache.versioned_key("products", "list")) is None
+    assert cache.get(cache.versioned_key("orders", "list")) == "kept"
+
+    # Sin namespace: nueva generación, nada de lo anterior es alcanzable
+    _in_child(invalidate, None)
+    assert cache.get(cache.versioned_key("orders", "list")) is None
+
+
+def test_value_computed_before_an_invalidation_is_not_served(path):
+    cache = SharedMemoryCache(path, slots=64, slot_size=1024)
+    key = cache.versioned_key("products", "list")   # antes de calcular el valor
+    cache.invalidate("products")                    # otro worker escribe entretanto
+    cache.set(key, "computed from old data", time.time() + 60)
+    assert cache.get(cache.versioned_key("products", "list")) is None
+
+
+def test_concurrent_writers_in_several_processes(path):
+    SharedMemoryCache(path, slots=4096, slot_size=256)
+
+    def write(worker):
+        cache = SharedMemoryCache(path, slots=4096, slot_size=256)
+        for i in range(200):
+            cache.set(cache.versioned_key("w", f"{worker}-{i}"), (worker, i), time.time() + 60)
+        return True
+
+    processes = [fork.Process(target=write, args=(w,)) for w in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    cache = SharedMemoryCache(path, slots=4096, slot_size=256)
+    found = sum(cache.get(cache.versioned_key("w", f"{w}-{i}")) == (w, i)
+                for w in range(4) for i in range(200))
+    assert found == 800
+
+
+def test_other_layout_reinitializes_the_segment(path):
+    cache = SharedMemoryCache(path, slots=64, slot_size=1024)
+    cache.set(cache.versioned_key("n", "k"), "v", time.time() + 60)
+    resized = SharedMemoryCache(path, slots=128, slot_size=1024)
+    assert resized.get(resized.versioned_key("n", "k")) is None
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from api.routes import inventory
+from api.stock_index import LowStockIndex
+
+
+def _naive_below(state, threshold):
+    return sorted((stock, pid) for pid, (stock, _) in state.items() if stock <= threshold)
+
+
+def _naive_below_minimum(state, margin=0):
+    return sorted((stock - minimum, pid) for pid, (stock, minimum) in state.items()
+                  if stock - minimum <= margin)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_index_matches_naive_scan_under_random_updates(seed):
+    rng = random.Random(seed)
+    index = LowStockIndex(max_alerts=100000)
+    received = []
+    index.subscribe(received.append)
+    state = {}
+    alerted = set()
+    expected_alerts = 0
+
+    for step in range(3000):
+        product_id = rng.randrange(150)
+        stock, minimum = state.get(product_id, (rng.randint(0, 40), rng.randint(0, 15)))
+        stock = max(0, stock + rng.randint(-8, 8))
+        if rng.random() < 0.05:
+            minimum = rng.randint(0, 15)
+
+        alert = index.update(product_id, stock, minimum)
+        state[product_id] = (stock, minimum)
+
+        # Una alerta al cruzar el mínimo; se rearma al volver a superarlo
+        if stock <= minimum and product_id not in alerted:
+            alerted.add(product_id)
+            expected_alerts += 1
+            assert alert is not None and alert["product_id"] == product_id
+        else:
+            assert alert is None
+        if stock > minimum:
+            alerted.discard(product_id)
+
+        if step % 50 == 0:
+            for threshold in (0, 5, 12, 30):
+                assert index.below(threshold) == [pid for _, pid in _naive_below(state, threshold)]
+            for margin in (-3, 0, 4):
+                assert index.below_minimum(margin) == \
+                    [pid for _, pid in _naive_below_minimum(state, margin)]
+
+    assert len(received) == len(index.alerts) == expected_alerts
+
+
+def test_low_stock_endpoint_agrees_with_inventory_scan(make_app):
+    client = make_app("inventory").test_client()
+    rng = random.Random(7)
+    product_ids = list(range(930000, 930040))
+    for product_id in product_ids:
+        client.post("/api/inventory/update-stock",
+                    json={"product_id": product_id, "quantity": rng.randint(1, 30), "type": "restock"})
+
+    for _ in range(600):
+        movement = {"product_id": rng.choice(product_ids), "quantity": rng.randint(1, 6),
+                    "type": rng.choice(["sale", "sale", "restock"])}
+        client.post("/api/inventory/update-stock", json=movement)
+
+    for threshold in (0, 3, 10, 25):
+        expected = sorted((inv["current_stock"], inv["product_id"]) for inv in inventory.inventory_db
+                          if inv["current_stock"] <= threshold)
+        assert inventory.stock_index.below(threshold) == [pid for _, pid in expected]
+    below = set(inventory.stock_index.below_minimum())
+    assert below == {inv["product_id"] for inv in inventory.inventory_db
+                     if inv["current_stock"] <= inv["minimum_stock"]}
@@ -0,0 +1,76 @@
+import itertools
+import random
+import time
+
+import pytest
+
+from api.routes import cart
+from api.timer_wheel import TimerWheel
+
+_user_ids = itertools.count(970500)
+
+
+@pytest.mark.parametrize("slots,levels", [(4, 3), (8, 2), (16, 3)])
+def test_wheel_matches_naive_model(slots, levels):
+    rng = random.Random(slots * levels)
+    wheel = TimerWheel(slots=slots, levels=levels, now=0)
+    horizon = slots ** levels
+    now = 0
+    due = {}   # clave -> primer tick en que vence
+
+    for _ in range(5000):
+        operation = rng.random()
+        key = rng.randrange(300)
+        if operation < 0.5:
+            # Incluye vencimientos pasados y más allá del horizonte
+            deadline = now + rng.randint(-5, horizon * 2)
+            wheel.schedule(key, deadline)
+            due[key] = max(deadline, now + 1)
+        elif operation < 0.6:
+            wheel.cancel(key)
+            due.pop(key, None)
+        else:
+            now += rng.choice([0, 1, 1, 2, slots, rng.randint(1, horizon)])
+            expired = wheel.advance(now)
+            expected = {k for k, tick in due.items() if tick <= now}
+            assert sorted(expired) == sorted(expected)
+            for k in expected:
+                del due[k]
+        assert len(wheel) == len(due)
+
+
+def test_expired_carts_are_removed_with_their_lines(make_app, monkeypatch):
+    started = time.time()
+    monkeypatch.setattr(cart, "CART_TTL_SECONDS", 60)
+    monkeypatch.setattr(cart, "expiry_wheel", TimerWheel(now=started))
+    client = make_app("cart").test_client()
+    notified = []
+    monkeypatch.setattr(cart, "_expiry_listeners", [lambda cart_id, lines: notified.append(cart_id)])
+
+    idle, active = next(_user_ids), next(_user_ids)
+    for user_id in (idle, active):
+        client.post("/api/cart/add", json={"user_id": user_id, "product_id": 1, "quantity": 1})
+    item_id = next(iter(cart.cart_lines[idle].values())).id
+
+    assert cart.expire_carts(started + 30) == 0
+    # Un cambio a los 30 s reprograma el vencimiento del carrito activo
+    cart._schedule_expiry(active, started + 30)
+
+    assert cart.expire_carts(started + 62) == 1
+    assert notified == [idle]
+    assert idle not in cart.carts_db and idle not in cart.cart_lines
+    assert item_id not in cart.cart_items_db
+    assert active in cart.carts_db
+
+    empty = client.get(f"/api/cart/?user_id={idle}").get_json()
+    assert empty["items"] == [] and empty["cart"]["created_at"] is None
+    assert cart.expire_carts(started + 95) == 1
+    assert active not in cart.carts_db
+
+
+def test_reading_a_cart_does_not_create_it(make_app):
+    client = make_app("cart").test_client()
+    user_id = next(_user_ids)
+    body = client.get(f"/api/cart/?user_id={user_id}").get_json()
+    assert body["summary"]["total"] == 0
+    assert user_id not in cart.carts_db
@@ -0,0 +1,223 @@
+import errno
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from api import webhook_ingest
+from api.routes import payments
+from api.webhook_ingest import WebhookIngestor, SIGNATURE_HEADER, sign_payload
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+        self.applied = threading.Event()
+
+    def __call__(self, events):
+        self.events.extend(events)
+        self.applied.set()
+
+
+def _wait_applied(ingestor, count, timeout=5):
+    deadline = time.time() + timeout
+    while ingestor.stats["applied"] < count and time.time() < deadline:
+        time.sleep(0.005)
+    return ingestor.stats["applied"]
+
+
+def test_signature_is_required():
+    ingestor = WebhookIngestor(Recorder(), secret="s3cret")
+    body = b'{"event_id": "e1"}'
+    assert ingestor.verify(body, sign_payload(body, "s3cret"))
+    assert not ingestor.verify(body, sign_payload(body, "other"))
+    assert not ingestor.verify(body + b" ", sign_payload(body, "s3cret"))
+    assert not ingestor.verify(body, None)
+
+
+def test_no_secret_rejects_unless_explicitly_allowed():
+    assert not WebhookIngestor(Recorder()).configured
+    assert not WebhookIngestor(Recorder()).verify(b"{}", None)
+    assert WebhookIngestor(Recorder(), allow_unsigned=True).verify(b"{}", None)
+
+
+@pytest.fixture
+def client(make_app, monkeypatch):
+    monkeypatch.setattr(payments, "webhook_ingestor", WebhookIngestor(Recorder(), secret="s3cret"))
+    return make_app("payments").test_client()
+
+
+def _post(client, event, secret="s3cret"):
+    body = json.dumps(event).encode("utf-8")
+    headers = {SIGNATURE_HEADER: sign_payload(body, secret)} if secret else {}
+    return client.post("/api/payments/webhook", data=body, headers=headers,
+                       content_type="application/json")
+
+
+def test_webhook_route_checks_signature_and_dedups(client):
+    assert _post(client, {"event_id": "r1"}, secret="wrong").status_code == 401
+    assert _post(client, {"event_id": "r1"}, secret=None).status_code == 401
+
+    first = _post(client, {"event_id": "r1"})
+    again = _post(client, {"event_id": "r1"})
+    assert first.status_code == again.status_code == 202
+    assert [first.get_json()["status"], again.get_json()["status"]] == ["accepted", "duplicate"]
+    assert _wait_applied(payments.webhook_ingestor, 1) == 1
+    assert payments.webhook_ingestor.apply_batch.events == [{"event_id": "r1"}]
+
+
+def test_webhook_route_without_secret_is_unavailable(client, monkeypatch):
+    monkeypatch.setattr(payments, "webhook_ingestor", WebhookIngestor(Recorder()))
+    assert _post(client, {"event_id": "x"}, secret=None).status_code == 503
+
+
+def test_accepted_events_are_on_disk_before_ingest_returns(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(webhook_ingest.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    ingestor = WebhookIngestor(Recorder(), path=str(tmp_path / "queue.jsonl"))
+
+    assert ingestor.ingest({"event_id": "d1"}) == "accepted"
+    assert len(synced) == 1
+    assert ingestor.ingest({"event_id": "d1"}) == "duplicate"
+    assert len(synced) == 1
+
+
+def test_concurrent_ingests_share_fsyncs(tmp_path, monkeypatch):
+    calls = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        calls.append(fd)
+        time.sleep(0.01)
+        real_fsync(fd)
+
+    monkeypatch.setattr(webhook_ingest.os, "fsync", slow_fsync)
+    ingestor = WebhookIngestor(Recorder(), path=str(tmp_path / "queue.jsonl"))
+    threads = [threading.Thread(target=ingestor.ingest, args=({"event_id": f"c{i}"},))
+               for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert ingestor.stats["accepted"] == 40
+    assert len(calls) < 40
+
+
+def test_fsync_failure_is_not_acknowledged(tmp_path, monkeypatch):
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    ingestor = WebhookIngestor(Recorder(), path=str(tmp_path / "queue.jsonl"))
+    monkeypatch.setattr(webhook_ingest.os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        ingestor.ingest({"event_id": "f1"})
+
+
+def test_unapplied_events_are_replayed_after_restart(tmp_path):
+    path = str(tmp_path / "queue.jsonl")
+    release = threading.Event()
+    first = WebhookIngestor(lambda events: release.wait(5), path=path, batch_size=1)
+    try:
+        for i in range(5):
+            first.ingest({"event_id": f"p{i}"})
+
+        # "Reinicio": otro ingestor sobre el mismo archivo ve lo no confirmado
+        recorder = Recorder()
+        second = WebhookIngestor(recorder, path=path)
+        assert recorder.applied.wait(5)
+        assert _wait_applied(second, 5) == 5
+        assert [e["event_id"] for e in recorder.events] == [f"p{i}" for i in range(5)]
+        assert second.ingest({"event_id": "p3"}) == "duplicate"
+    finally:
+        release.set()
+
+
+class FullDisk:
+    """Archivo que escribe unos bytes y falla con ENOSPC (disco lleno)"""
+
+    def __init__(self, real):
+        self.real = real
+
+    def tell(self):
+        return self.real.tell()
+
+    def write(self, data):
+        self.real.write(data[:5])
+        self.real.flush()
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    def close(self):
+        self.real.close()
+
+
+def test_failed_write_is_not_marked_as_seen(tmp_path):
+    path = str(tmp_path / "queue.jsonl")
+    release = threading.Event()
+    ingestor = WebhookIngestor(lambda events: release.wait(5), path=path)
+    try:
+        ingestor._file = FullDisk(ingestor._file)
+        with pytest.raises(OSError):
+            ingestor.ingest({"event_id": "w1"})
+        assert ingestor.pending() == 0
+
+        # El reintento del emisor se acepta y la línea cortada no quedó en el archivo
+        assert ingestor.ingest({"event_id": "w1"}) == "accepted"
+        with open(path) as f:
+            assert [json.loads(line) for line in f] == [{"event_id": "w1"}]
+    finally:
+        release.set()
+
+
+def test_failed_fsync_is_not_marked_as_seen(tmp_path, monkeypatch):
+    ingestor = WebhookIngestor(Recorder(), path=str(tmp_path / "queue.jsonl"))
+    real_fsync = os.fsync
+    monkeypatch.setattr(webhook_ingest.os, "fsync", lambda fd: (_ for _ in ()).throw(OSError("EIO")))
+    with pytest.raises(OSError):
+        ingestor.ingest({"event_id": "s1"})
+    monkeypatch.setattr(webhook_ingest.os, "fsync", real_fsync)
+    assert ingestor.ingest({"event_id": "s1"}) == "accepted"
+
+
+def test_failed_batch_is_retried_before_moving_the_offset(tmp_path):
+    path = str(tmp_path / "queue.jsonl")
+    calls = []
+
+    def flaky(events):
+        calls.append(list(events))
+        if len(calls) < 3:
+            raise RuntimeError("base caída")
+
+    ingestor = WebhookIngestor(flaky, path=path, retry_delay=0)
+    ingestor.ingest({"event_id": "b1"})
+    assert _wait_applied(ingestor, 1) == 1
+    assert calls == [[{"event_id": "b1"}]] * 3
+    assert ingestor.stats["retries"] == 2 and ingestor.stats["dead_lettered"] == 0
+
+
+def test_batch_that_keeps_failing_goes_to_dead_letters(tmp_path):
+    path = str(tmp_path / "queue.jsonl")
+
+    def broken(events):
+        raise RuntimeError("evento inválido")
+
+    ingestor = WebhookIngestor(broken, path=path, retry_delay=0, max_attempts=2)
+    ingestor.ingest({"event_id": "x1"})
+    deadline = time.time() + 5
+    while ingestor.stats["dead_lettered"] < 1 and time.time() < deadline:
+        time.sleep(0.005)
+    assert ingestor.stats["dead_lettered"] == 1 and ingestor.stats["applied"] == 0
+    with open(path + ".dead") as f:
+        assert [json.loads(line) for line in f] == [{"event_id": "x1"}]
+
+    # Descartado y confirmado: un reinicio no lo vuelve a aplicar
+    recorder = Recorder()
+    WebhookIngestor(recorder, path=path)
+    assert not recorder.applied.wait(0.2)
+
+    memory = WebhookIngestor(broken, retry_delay=0, max_attempts=1)
+    memory.drain_once([({"event_id": "x2"}, None)])
+    assert list(memory.dead_letters) == [{"event_id": "x2"}]